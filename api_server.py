@@ -0,0 +1,581 @@
+"""Read-only JSON API over the dashboard's data.
+
+A small asyncio HTTP/1.1 server (standard library only) for consumers
+that are not Streamlit sessions: bots, spreadsheets, other dashboards.
+It serves the parsed narrative snapshot, the market pulse and price
+history of every asset:
+
+    GET /api/v1/assets
+    GET /api/v1/assets/<asset>/snapshot?source=live|local|offline&fields=trading_signal,market_state.macro_regime
+    GET /api/v1/assets/<asset>/pulse
+    GET /api/v1/assets/<asset>/prices?range=1M&start=2026-09-01&end=2026-09-30&fields=Close&points=500&ticker=SLV
+    GET /healthz
+    GET /metrics
+
+Upstream data is kept warm by the same stale-while-revalidate
+BackgroundRefresher the dashboard uses, so requests never wait on n8n or
+Yahoo. Prices are read from the local price store; the first request for
+a ticker and bar size adds it to the refresher's delta downloads, so a
+key nobody asked for before may return no bars until that lands. Each response body is rendered once per data version and cached
+with its content-hash ETag (and gzip body, built on first use). A client
+polling with If-None-Match gets a 304 for the cost of a dict lookup and a
+string comparison: no recompute, no re-serialization, no body.
+
+`fields` takes comma-separated top-level keys or dotted paths (paths go
+through lists, e.g. dominant_narratives.narrative_name); on prices it
+selects OHLCV columns. On prices, `range` picks the bar size and the
+default lookback (anchored at the newest bar); `start`/`end` override it.
+
+    python api_server.py --host 0.0.0.0 --port 8502
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+import cache_backend
+import data_loader
+import metrics
+import narrative_engine
+from assets import ASSETS
+from burst_detector import BurstDetector, FeedIngestor
+from downsample import DEFAULT_MAX_POINTS, downsample_frame
+from macro_index import MacroIndex
+from payload_model import parse_payload
+from price_store import PriceStore, period_start
+from refresher import BackgroundRefresher, comex_is_open
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = os.environ.get("AGF_API_HOST", "127.0.0.1")
+PORT = int(os.environ.get("AGF_API_PORT", "8502"))
+
+SOURCES = ("live", "local", "offline")
+OHLCV = ("Open", "High", "Low", "Close", "Volume")
+MAX_POINTS_LIMIT = 20000
+# Rendered bodies kept, least recently used dropped first
+CACHE_ENTRIES = 512
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 512
+KEEPALIVE_SECONDS = 15
+MAX_HEADERS = 100
+
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------- REPRESENTATIONS ----------------
+class Representation:
+    """One rendered response body, its ETag and (lazily) its gzip encoding"""
+
+    __slots__ = ("body", "etag", "content_type", "_gzip")
+
+    def __init__(self, body, content_type="application/json"):
+        self.body = body
+        self.etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        self.content_type = content_type
+        self._gzip = None
+
+    @classmethod
+    def json(cls, value):
+        return cls(json.dumps(value, separators=(",", ":"), default=str).encode())
+
+    def gzipped(self):
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip
+
+
+class ResponseCache:
+    """Rendered bodies keyed by request, each valid for one data version
+
+    Runs on the event loop thread only. Concurrent misses for the same key
+    share one build (run in the default executor).
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, Representation)
+        self._building = {}  # (key, version) -> Future
+
+    async def get(self, key, version, build):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            metrics.incr("api.cache.hit")
+            return entry[1]
+        metrics.incr("api.cache.miss")
+        pending = self._building.get((key, version))
+        if pending is None:
+            pending = asyncio.get_running_loop().run_in_executor(None, build)
+            self._building[(key, version)] = pending
+            pending.add_done_callback(lambda f: self._store(key, version, f))
+        # A client that disconnects mid-build does not cancel it for the others
+        return await asyncio.shield(pending)
+
+    def _store(self, key, version, future):
+        del self._building[(key, version)]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._entries[key] = (version, future.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# ---------------- SELECTION ----------------
+def parse_fields(query):
+    """`fields` query values -> list of dotted paths, or None for everything"""
+    fields = [f.strip() for value in query.get("fields", ()) for f in value.split(",") if f.strip()]
+    return fields or None
+
+
+def _pick(value, path):
+    """The sub-tree of `value` at a dotted path; lists are mapped over"""
+    if not path:
+        return value
+    if isinstance(value, list):
+        return [_pick(v, path) for v in value]
+    if not isinstance(value, dict) or path[0] not in value:
+        raise KeyError(path[0])
+    return {path[0]: _pick(value[path[0]], path[1:])}
+
+
+def _merge(into, part):
+    for key, value in part.items():
+        if isinstance(value, dict) and isinstance(into.get(key), dict):
+            _merge(into[key], value)
+        elif isinstance(value, list) and isinstance(into.get(key), list):
+            into[key] = [
+                _merge(a, b) if isinstance(a, dict) and isinstance(b, dict) else b
+                for a, b in zip(into[key], value)
+            ]
+        else:
+            into[key] = value
+    return into
+
+
+def select_fields(value, fields):
+    """Keeps only the given dotted paths of a JSON-like dict"""
+    if not fields:
+        return value
+    out = {}
+    for field in fields:
+        try:
+            _merge(out, _pick(value, field.split(".")))
+        except KeyError as e:
+            raise ApiError(400, f"Unknown field {field!r} (no {e.args[0]!r})")
+    return out
+
+
+def _timestamp(query, name):
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        ts = pd.Timestamp(values[-1])
+    except ValueError:
+        raise ApiError(400, f"Invalid {name} {values[-1]!r}; expected an ISO date or time")
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+# ---------------- DATA ----------------
+class DataService:
+    """Keeps upstream data warm and renders the API's representations"""
+
+    def __init__(self, store=None, shared_cache=None):
+        self.store = store or PriceStore()
+        self.shared_cache = shared_cache or cache_backend.from_url()
+        self.macro_index = MacroIndex()
+        self.feed = FeedIngestor(BurstDetector())
+        self.refresher = BackgroundRefresher(max_workers=len(ASSETS) + 2)
+        self.prices = data_loader.PriceWatchlist(self.store)
+        self._offline = {}  # path -> (mtime, Payload)
+
+    def start(self):
+        store = self.store
+        for asset in ASSETS.values():
+            if asset.webhook_url:
+                self.refresher.register(
+                    f"payload:{asset.key}",
+                    metrics.timed("fetch.payload", lambda a=asset: self._fetch_live(a)),
+                    interval=600, market_interval=300,
+                )
+        self.refresher.register(
+            "local", metrics.timed("fetch.local_engine", self._build_local), interval=300,
+        )
+        # Same shared-cache key as the dashboard's job, so replicas of either share one download
+        market_key = f"market:1d:1mo:{','.join(data_loader.PULSE_TICKERS)}"
+        self.refresher.register(
+            "market", metrics.timed("fetch.market", lambda: self._shared(
+                market_key, lambda: data_loader.fetch_market_frame(store), 900, 60, cache_backend.FrameCodec,
+            )),
+            interval=900, market_interval=60,
+            seed=lambda: store.read_closes(data_loader.PULSE_TICKERS, "1d", start=period_start("1mo")),
+        )
+        # Delta updates for every (ticker, interval) a prices request has asked for
+        self.refresher.register(
+            "prices", metrics.timed("fetch.prices", self.prices.refresh), interval=600, market_interval=120,
+        )
+        self.refresher.start()
+        return self
+
+    def stop(self):
+        self.refresher.stop()
+
+    # Refresher jobs (threads)
+    def _shared(self, key, fetch, interval, market_interval, codec=cache_backend.JsonCodec):
+        """fetch() through the cache shared with other replicas and the dashboard"""
+        ttl = market_interval if comex_is_open() else interval
+        return self.shared_cache.get_or_fetch(key, fetch, ttl, codec)
+
+    def _fetch_live(self, asset):
+        def fetch():
+            raw, error = data_loader.fetch_webhook_payload(asset.webhook_url)
+            if error:
+                raise RuntimeError(error)
+            return raw
+        # Keyed like the dashboard's payload job, so both hit n8n once per interval
+        return parse_payload(self._shared(f"payload:{asset.webhook_url}", fetch, 600, 300))
+
+    def _build_local(self):
+        """Local engine payload of every asset, sharing one macro and feed read"""
+        frame = self.refresher.get("market").value
+        macro = self.macro_index.compute()
+        self.feed.poll()
+        return {
+            asset.key: parse_payload(narrative_engine.build_payload(
+                data_loader.price_history_from_frame(frame, asset.futures), macro=macro,
+                emerging=self.feed.detector.candidates(metal=asset.name.lower()), metal=asset.name.lower(),
+            ))
+            for asset in ASSETS.values()
+        }
+
+    # Versioned reads (event loop: must not block)
+    def payload(self, asset, source):
+        """(Payload, fetched_at) for a source; raises ApiError while it is unavailable"""
+        if source == "live":
+            if not asset.webhook_url:
+                raise ApiError(404, f"No n8n workflow configured for {asset.name}; use source=local")
+            snap = self.refresher.get(f"payload:{asset.key}")
+            if snap.value is None:
+                raise ApiError(503, f"Live payload not available yet: {snap.error or 'warming up'}")
+            return snap.value, snap.fetched_at
+        if source == "local":
+            snap = self.refresher.get("local")
+            if snap.value is None:
+                raise ApiError(503, f"Local engine not ready yet: {snap.error or 'warming up'}")
+            return snap.value[asset.key], snap.fetched_at
+        if not asset.offline_file:
+            raise ApiError(404, f"No offline snapshot for {asset.name}")
+        path = os.path.join(BASE_DIR, asset.offline_file)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise ApiError(404, f"Offline snapshot {asset.offline_file} is missing")
+        cached = self._offline.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                cached = self._offline[path] = (mtime, parse_payload(json.load(f)))
+        return cached[1], mtime
+
+    def price_version(self, ticker, interval):
+        """Watches a key for background updates; returns the prices job's fetch time"""
+        if self.prices.watch(ticker, interval):
+            self.refresher.refresh_now("prices")
+        return self.refresher.get("prices").fetched_at
+
+    def market(self):
+        """(market frame, fetched_at) of the shared 1-month daily frame"""
+        snap = self.refresher.get("market")
+        if snap.value is None:
+            raise ApiError(503, f"Market data not available yet: {snap.error or 'warming up'}")
+        return snap.value, snap.fetched_at
+
+    # Renderers (executor threads)
+    @staticmethod
+    def render_snapshot(asset, source, payload, fields, macro_sample=False):
+        body = {"asset": asset.key, "source": source, "digest": payload.digest, **payload.to_dict()}
+        if macro_sample:
+            body["macro_sample"] = True  # Gauges come from the bundled made-up series
+        return Representation.json(select_fields(body, fields))
+
+    @staticmethod
+    def render_pulse(asset, frame):
+        price, change, fx, etfs = data_loader.market_pulse_from_frame(frame, asset)
+        column = frame[asset.futures].dropna() if asset.futures in frame else None
+        return Representation.json({
+            "asset": asset.key,
+            "futures": asset.futures,
+            "price": price,
+            "change_pct": change,
+            "fx_pair": asset.fx,
+            "fx": fx,
+            "etfs": [{"ticker": e["Ticker"], "price": e["Price"], "change_pct": e["Change %"]} for e in etfs],
+            "as_of": column.index[-1].isoformat() if column is not None and not column.empty else None,
+        })
+
+    def render_prices(self, asset, ticker, range_key, start, end, columns, points):
+        interval, period = data_loader.PRICE_RANGES[range_key]
+        last = self.store.last_timestamp(ticker, interval)
+        bars = pd.DataFrame(columns=list(OHLCV))
+        if last is not None:
+            bars = self.store.read(ticker, interval, start=start or period_start(period, now=last), end=end)
+        count = len(bars)
+        if points:
+            bars = downsample_frame(bars, "Close", points)
+        bars = bars[columns]
+        return Representation.json({
+            "asset": asset.key,
+            "ticker": ticker,
+            "range": range_key,
+            "interval": interval,
+            "bars": count,
+            "points": len(bars),
+            "index": [ts.isoformat() for ts in bars.index],
+            "columns": {c: [None if pd.isna(v) else float(v) for v in bars[c]] for c in columns},
+        })
+
+
+# ---------------- ROUTES ----------------
+class ApiServer:
+    """Request routing, conditional GET and compression on top of DataService"""
+
+    def __init__(self, service):
+        self.service = service
+        self.cache = ResponseCache()
+
+    def _asset(self, key):
+        asset = ASSETS.get(key)
+        if asset is None:
+            raise ApiError(404, f"Unknown asset {key!r}; expected one of {', '.join(ASSETS)}")
+        return asset
+
+    async def route(self, path, query):
+        """Returns (Representation, extra headers) for a GET path"""
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if parts == ["healthz"]:
+            return self.health(), {"Cache-Control": "no-store"}
+        if parts == ["metrics"]:
+            return Representation(metrics.REGISTRY.to_openmetrics().encode(), "text/plain; version=0.0.4"), {
+                "Cache-Control": "no-store"}
+        if parts == ["api", "v1", "assets"]:
+            return await self.cache.get(("assets",), 0, lambda: Representation.json([
+                {"key": a.key, "name": a.name, "futures": a.futures, "etfs": list(a.etfs), "fx": a.fx,
+                 "sources": _sources(a)}
+                for a in ASSETS.values()
+            ])), {}
+        if len(parts) == 5 and parts[:3] == ["api", "v1", "assets"]:
+            asset = self._asset(parts[3])
+            handler = {"snapshot": self.snapshot, "pulse": self.pulse, "prices": self.prices}.get(parts[4])
+            if handler is not None:
+                return await handler(asset, query)
+        raise ApiError(404, f"No route for {path}")
+
+    async def snapshot(self, asset, query):
+        source = (query.get("source") or ["live" if asset.webhook_url else "local"])[-1]
+        if source not in SOURCES:
+            raise ApiError(400, f"Unknown source {source!r}; expected one of {', '.join(SOURCES)}")
+        payload, fetched_at = self.service.payload(asset, source)
+        fields = parse_fields(query)
+        rep = await self.cache.get(
+            ("snapshot", asset.key, source, tuple(fields or ())), payload.digest,
+            lambda: DataService.render_snapshot(
+                asset, source, payload, fields, source == "local" and self.service.macro_index.is_sample),
+        )
+        return rep, _age_headers(fetched_at)
+
+    async def pulse(self, asset, query):
+        frame, fetched_at = self.service.market()
+        rep = await self.cache.get(
+            ("pulse", asset.key), (fetched_at, id(frame)), lambda: DataService.render_pulse(asset, frame),
+        )
+        return rep, _age_headers(fetched_at)
+
+    async def prices(self, asset, query):
+        ticker = (query.get("ticker") or [asset.futures])[-1]
+        if ticker not in asset.tickers:
+            raise ApiError(400, f"Unknown ticker {ticker!r} for {asset.name}; expected one of {', '.join(asset.tickers)}")
+        range_key = (query.get("range") or ["1M"])[-1].upper()
+        if range_key not in data_loader.PRICE_RANGES:
+            raise ApiError(400, f"Unknown range {range_key!r}; expected one of {', '.join(data_loader.PRICE_RANGES)}")
+        start, end = _timestamp(query, "start"), _timestamp(query, "end")
+        columns = parse_fields(query) or list(OHLCV)
+        unknown = [c for c in columns if c not in OHLCV]
+        if unknown:
+            raise ApiError(400, f"Unknown price fields {unknown}; expected some of {', '.join(OHLCV)}")
+        try:
+            points = int((query.get("points") or [DEFAULT_MAX_POINTS])[-1])
+        except ValueError:
+            raise ApiError(400, "points must be an integer (0 disables decimation)")
+        points = max(0, min(points, MAX_POINTS_LIMIT))
+        # Served from the store; the prices job delta-downloads watched keys in the background
+        fetched_at = self.service.price_version(ticker, data_loader.PRICE_RANGES[range_key][0])
+        key = ("prices", asset.key, ticker, range_key, start, end, tuple(columns), points)
+        rep = await self.cache.get(
+            key, fetched_at,
+            lambda: self.service.render_prices(asset, ticker, range_key, start, end, columns, points),
+        )
+        return rep, _age_headers(fetched_at)
+
+    def health(self):
+        jobs = {}
+        for name in self.service.refresher.names():
+            snap = self.service.refresher.get(name)
+            jobs[name] = {"age": None if snap.age is None else round(snap.age, 1), "error": snap.error}
+        return Representation.json({"status": "ok", "jobs": jobs})
+
+    # ---------------- HTTP ----------------
+    async def respond(self, method, target, headers):
+        """Returns (status, headers, body) for one request"""
+        start = time.perf_counter()
+        metrics.incr("api.requests")
+        if method not in ("GET", "HEAD"):
+            return _error(405, f"{method} not allowed", {"Allow": "GET, HEAD"})
+        url = urlsplit(target)
+        try:
+            rep, extra = await self.route(url.path, parse_qs(url.query))
+        except ApiError as e:
+            return _error(e.status, str(e))
+        except Exception as e:
+            metrics.incr("api.errors")
+            return _error(500, f"{type(e).__name__}: {e}")
+        finally:
+            metrics.REGISTRY.observe("api.request", time.perf_counter() - start)
+
+        out = {"Content-Type": rep.content_type, "ETag": rep.etag, "Vary": "Accept-Encoding",
+               "Cache-Control": "no-cache", **extra}
+        if _etag_matches(headers.get("if-none-match"), rep.etag):
+            metrics.incr("api.not_modified")
+            return 304, out, b""
+        body = rep.body
+        if len(body) >= GZIP_MIN_BYTES and _accepts_gzip(headers.get("accept-encoding", "")):
+            body = rep.gzipped()
+            out["Content-Encoding"] = "gzip"
+        return 200, out, body
+
+    async def handle(self, reader, writer):
+        """Serves requests on one connection until it closes or idles out"""
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), KEEPALIVE_SECONDS)
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await _write(writer, *_error(400, "Malformed request line"), keep_alive=False)
+                    break
+                headers = {}
+                for _ in range(MAX_HEADERS):
+                    line = await asyncio.wait_for(reader.readline(), KEEPALIVE_SECONDS)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)  # GET/HEAD bodies are ignored
+                status, out, body = await self.respond(method.upper(), target, headers)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                await _write(writer, status, out, b"" if method.upper() == "HEAD" else body,
+                             keep_alive, len(body))
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def _sources(asset):
+    """Payload sources an asset can serve"""
+    return [s for s in SOURCES if (s != "live" or asset.webhook_url) and (s != "offline" or asset.offline_file)]
+
+
+def _age_headers(fetched_at):
+    if fetched_at is None:
+        return {}
+    return {"Last-Modified": _http_date(fetched_at), "X-Data-Age": f"{max(0.0, time.time() - fetched_at):.0f}"}
+
+
+def _http_date(ts):
+    return time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(ts))
+
+
+def _etag_matches(header, etag):
+    """Weak If-None-Match comparison"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _accepts_gzip(header):
+    for part in header.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _error(status, message, headers=None):
+    body = json.dumps({"error": message}).encode()
+    return status, {"Content-Type": "application/json", "Cache-Control": "no-store", **(headers or {})}, body
+
+
+async def _write(writer, status, headers, body, keep_alive, length=None):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    if status != 304:
+        lines.append(f"Content-Length: {len(body) if length is None else length}")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+# ---------------- CLI ----------------
+async def serve(host=HOST, port=PORT, service=None):
+    service = (service or DataService()).start()
+    app = ApiServer(service)
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"Serving on http://{host}:{port}/api/v1/assets", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve narrative snapshots, market pulse and prices as JSON")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Asset registry.
+
+One entry per precious metal the dashboard covers: its COMEX/NYMEX
+futures, ETF watchlist, FX pair for the local-currency tile and where its
+narrative payload comes from. Market data for every asset is fetched in
+one batched download (see data_loader.fetch_market_frame); adding an asset
+adds tickers to that batch and jobs to the parallel refresher pool rather
+than sequential round trips.
+
+Payload sources per asset:
+
+* an n8n webhook URL, overridable per asset with AGF_WEBHOOK_<KEY>
+  (e.g. AGF_WEBHOOK_GOLD): silver uses the dashboard's workflow
+  (N8N_WEBHOOK_URL); assets without one use the local narrative engine
+* an offline snapshot file (silver only ships n8n_data.json)
+"""
+import os
+
+
+class Asset:
+    __slots__ = ("key", "name", "futures", "etfs", "fx", "webhook_url", "offline_file")
+
+    def __init__(self, key, name, futures, etfs, fx="INR=X", webhook_url=None, offline_file=None):
+        self.key = key
+        self.name = name
+        self.futures = futures
+        self.etfs = tuple(etfs)
+        self.fx = fx
+        self.webhook_url = os.environ.get(f"AGF_WEBHOOK_{key.upper()}") or webhook_url
+        self.offline_file = offline_file
+
+    @property
+    def tickers(self):
+        """Futures, FX pair and ETFs, in market-frame column order"""
+        return [self.futures, self.fx, *self.etfs]
+
+    def __repr__(self):
+        return f"Asset({self.key!r}, {self.futures!r})"
+
+
+SILVER_WEBHOOK_URL = os.environ.get(
+    "N8N_WEBHOOK_URL", "https://arjunbhosale.app.n8n.cloud/webhook/NARRATIVEDETECTINGAGENTWORKFLOW"
+)
+
+ASSETS = {
+    a.key: a for a in (
+        Asset("silver", "Silver", "SI=F", ["SLV", "SIVR", "SIL"],
+              webhook_url=SILVER_WEBHOOK_URL, offline_file="n8n_data.json"),
+        Asset("gold", "Gold", "GC=F", ["GLD", "IAU", "GDX"]),
+        Asset("platinum", "Platinum", "PL=F", ["PPLT"]),
+        Asset("palladium", "Palladium", "PA=F", ["PALL"]),
+    )
+}
+DEFAULT_ASSET = "silver"
+
+
+def get_asset(key):
+    return ASSETS.get(key) or ASSETS[DEFAULT_ASSET]
+
+
+def all_tickers(assets=None):
+    """Every ticker of the given assets (default: all), de-duplicated, in one list"""
+    seen = {}
+    for asset in assets or ASSETS.values():
+        for t in asset.tickers:
+            seen.setdefault(t, None)
+    return list(seen)
+
+
+def futures_tickers(assets=None):
+    return [a.futures for a in assets or ASSETS.values()]
@@ -0,0 +1,184 @@
+"""Signal backtesting.
+
+Replays recorded trading-signal snapshots (timestamp, signal, confidence)
+against SI=F bars. Everything is array math over the whole history:
+signals are aligned to bars with searchsorted, so years of intraday bars
+and thousands of signals run in milliseconds.
+
+Snapshots are appended to a JSONL file as payloads arrive; a signal is
+held from its timestamp until the next snapshot.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SIGNAL_HISTORY_PATH = os.environ.get(
+    "AGF_SIGNAL_HISTORY", os.path.join(BASE_DIR, "signal_history.jsonl")
+)
+
+# Net exposure per normalized signal (see payload_model.SIGNALS)
+SIGNAL_POSITION = {"strong_buy": 1.0, "buy": 0.5, "neutral": 0.0, "sell": -0.5, "strong_sell": -1.0}
+HISTORY_COLUMNS = ["source", "signal", "confidence", "digest"]
+DEFAULT_HORIZONS = ("1h", "1d", "5d")
+CONFIDENCE_BINS = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+# ---------------- HISTORY ----------------
+_last_recorded = {}
+_record_lock = threading.Lock()
+
+
+def record_signal(payload, source="live", path=SIGNAL_HISTORY_PATH, now=None):
+    """Appends a payload's trading signal to the history file
+
+    Consecutive snapshots with the same digest are written once per process.
+    Returns True if a line was written.
+    """
+    with _record_lock:
+        if _last_recorded.get((path, source)) == payload.digest:
+            return False
+        _last_recorded[(path, source)] = payload.digest
+    signal = payload.trading_signal
+    row = {
+        "timestamp": (now or pd.Timestamp.now(tz="UTC")).isoformat(),
+        "source": source,
+        "signal": signal.signal,
+        "confidence": signal.confidence,
+        "digest": payload.digest,
+    }
+    # One short O_APPEND write per line, so concurrent replicas don't interleave
+    with open(path, "a") as f:
+        f.write(json.dumps(row) + "\n")
+    return True
+
+
+def _empty_history():
+    """A history frame with no rows, still indexed by UTC timestamp"""
+    return pd.DataFrame(columns=HISTORY_COLUMNS, index=pd.DatetimeIndex([], tz="UTC", name="timestamp"))
+
+
+def load_signal_history(path=SIGNAL_HISTORY_PATH, source=None):
+    """Returns signal snapshots indexed by UTC timestamp, oldest first
+
+    Repeats of the previous snapshot (e.g. written by several replicas) are
+    dropped; a signal that reappears later is kept.
+    """
+    if not os.path.exists(path):
+        return _empty_history()
+    df = pd.read_json(path, lines=True, dtype={"digest": str})
+    if df.empty:
+        return _empty_history()
+    if source is not None:
+        df = df[df["source"] == source]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    df = df.sort_values("timestamp", kind="stable")
+    df = df[df["digest"].ne(df["digest"].shift())]
+    return df.set_index("timestamp")
+
+
+# ---------------- BACKTEST ----------------
+def _ns(index):
+    """Epoch nanoseconds of a DatetimeIndex, whatever its stored unit"""
+    return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+
+def _forward_returns(bar_times, closes, entry_idx, signal_times, horizon):
+    """Close-to-close return from each entry bar to the first bar at or after
+    signal time + horizon; NaN where the horizon runs past the data or ends
+    on the entry bar itself (a horizon shorter than the bar interval)"""
+    exit_idx = np.searchsorted(bar_times, signal_times + pd.Timedelta(horizon).value, side="left")
+    valid = (exit_idx < len(closes)) & (exit_idx > entry_idx)
+    out = np.full(len(entry_idx), np.nan)
+    out[valid] = closes[exit_idx[valid]] / closes[entry_idx[valid]] - 1.0
+    return out
+
+
+def run_backtest(signals, bars, horizons=DEFAULT_HORIZONS, confidence_bins=CONFIDENCE_BINS):
+    """Scores signal snapshots against bars
+
+    `signals` is indexed by timestamp with `signal` and `confidence` columns;
+    `bars` is indexed by timestamp with a `Close` column. Returns a dict:
+
+    * summary: counts, total return, max drawdown, turnover
+    * horizons: per horizon hit rate and mean raw/signed forward return
+    * calibration: per confidence bucket hit rate for each horizon
+    * equity: per bar position, equity curve and drawdown
+    """
+    closes_s = bars["Close"].dropna().sort_index()
+    signals = signals[signals.index >= closes_s.index[0]] if len(closes_s) else signals.iloc[:0]
+    closes_s = closes_s[~closes_s.index.duplicated(keep="last")]
+    bar_times = _ns(closes_s.index)
+    closes = closes_s.to_numpy(dtype=float)
+
+    # Each signal enters at the first bar at or after it was issued
+    signal_times = _ns(signals.index)
+    entry_idx = np.searchsorted(bar_times, signal_times, side="left")
+    in_range = entry_idx < len(closes)
+    signals, signal_times, entry_idx = signals[in_range], signal_times[in_range], entry_idx[in_range]
+
+    position = signals["signal"].map(SIGNAL_POSITION).fillna(0.0).to_numpy()
+    direction = np.sign(position)
+    confidence = signals["confidence"].astype(float).to_numpy()
+    directional = direction != 0
+
+    horizon_rows, signed_by_horizon = [], {}
+    for h in horizons:
+        fwd = _forward_returns(bar_times, closes, entry_idx, signal_times, h)
+        signed = direction * fwd
+        scored = directional & ~np.isnan(fwd)
+        signed_by_horizon[h] = np.where(scored, signed, np.nan)
+        horizon_rows.append({
+            "horizon": h,
+            "signals": int(scored.sum()),
+            "hit_rate": float((signed[scored] > 0).mean()) if scored.any() else np.nan,
+            "mean_return": float(np.nanmean(fwd[scored])) if scored.any() else np.nan,
+            "mean_signed_return": float(signed[scored].mean()) if scored.any() else np.nan,
+        })
+    horizons_df = pd.DataFrame(horizon_rows).set_index("horizon")
+
+    # Calibration: does higher confidence actually hit more often?
+    bucket = pd.cut(confidence, bins=list(confidence_bins), include_lowest=True)
+    calib = pd.DataFrame({"bucket": bucket, "confidence": confidence})
+    for h, signed in signed_by_horizon.items():
+        calib[f"hit_{h}"] = np.where(np.isnan(signed), np.nan, (signed > 0).astype(float))
+    calib = calib[directional]
+    calibration = calib.groupby("bucket", observed=False).agg(
+        signals=("confidence", "size"),
+        mean_confidence=("confidence", "mean"),
+        **{f"hit_rate_{h}": (f"hit_{h}", "mean") for h in horizons},
+    )
+
+    # Hold each signal's position from its entry bar until the next signal
+    held = np.zeros(len(closes))
+    if len(entry_idx):
+        last_signal = np.searchsorted(entry_idx, np.arange(len(closes)), side="right") - 1
+        has_signal = last_signal >= 0
+        held[has_signal] = position[last_signal[has_signal]]
+    bar_returns = np.zeros(len(closes))
+    bar_returns[1:] = closes[1:] / closes[:-1] - 1.0
+    strategy = np.zeros(len(closes))
+    strategy[1:] = held[:-1] * bar_returns[1:]
+    equity = np.cumprod(1.0 + strategy)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0 if len(equity) else equity
+    trades = np.abs(np.diff(held, prepend=0.0))
+
+    # Turnover is per day of the signal history, not of the whole bar history
+    span_days = (bar_times[-1] - bar_times[entry_idx[0]]) / 86_400e9 if len(entry_idx) else 0.0
+    summary = {
+        "signals": int(len(signals)),
+        "directional_signals": int(directional.sum()),
+        "bars": int(len(closes)),
+        "total_return": float(equity[-1] - 1.0) if len(equity) else 0.0,
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+        "turnover": float(trades.sum()),
+        "turnover_per_day": float(trades.sum() / span_days) if span_days else 0.0,
+        "exposure": float((held != 0).mean()) if len(held) else 0.0,
+    }
+    equity_df = pd.DataFrame(
+        {"position": held, "equity": equity, "drawdown": drawdown}, index=closes_s.index
+    )
+    return {"summary": summary, "horizons": horizons_df, "calibration": calibration, "equity": equity_df}
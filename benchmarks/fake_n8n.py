@@ -0,0 +1,114 @@
+"""Local stand-in for the n8n narrative webhook.
+
+Answers GET or POST on any path with an n8n_data.json-shaped payload
+(the repo's file, or a synthetic one with --narratives N), after a
+configurable latency, and fails a configurable share of requests with a
+502. Requests are counted, so a load run can report upstream calls.
+
+    python benchmarks/fake_n8n.py --port 8765 --latency 1.5 --failure-rate 0.1
+    N8N_WEBHOOK_URL=http://127.0.0.1:8765/webhook streamlit run front.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+OFFLINE_PAYLOAD = os.path.join(ROOT, "n8n_data.json")
+
+
+class FakeN8n:
+    """Threaded webhook server; start() runs it in a daemon thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, jitter=0.0, failure_rate=0.0, narratives=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        if narratives is None:
+            with open(OFFLINE_PAYLOAD, "rb") as f:
+                self.body = f.read()
+        else:
+            sys.path.insert(0, BENCH_DIR)
+            import synthetic
+            self.body = synthetic.make_payload_bytes(narratives)
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/webhook/fake-narratives"
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with fake._lock:
+                    fake.calls += 1
+                    fail = random.random() < fake.failure_rate
+                    fake.failures += fail
+                time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)))
+                status, body = (502, b'{"message":"fake n8n: injected failure"}') if fail else (200, fake.body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-n8n", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake n8n narrative webhook")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with a 502")
+    parser.add_argument("--narratives", type=int, help="synthetic payload size (default: n8n_data.json)")
+    args = parser.parse_args(argv)
+
+    fake = FakeN8n(args.host, args.port, args.latency, args.jitter, args.failure_rate, args.narratives)
+    print(f"Fake n8n webhook on {fake.url}", flush=True)
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(fake.stats()))
+
+
+if __name__ == "__main__":
+    main()
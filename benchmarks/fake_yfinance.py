@@ -0,0 +1,104 @@
+"""Offline stand-in for the parts of yfinance the app calls.
+
+Install it before the app imports yfinance (price_store imports it lazily
+on the first refresh):
+
+    import sys, fake_yfinance
+    sys.modules["yfinance"] = fake_yfinance
+
+download() returns deterministic OHLCV bars up to "now", shaped like
+yfinance's own (tz-naive dates for daily bars, UTC timestamps intraday,
+(ticker, field) columns with group_by="ticker"). A bar's price depends
+only on its ticker and timestamp, so overlapping delta downloads agree.
+Calls are counted and can be given latency and a failure rate
+(AGF_FAKE_YF_LATENCY seconds, AGF_FAKE_YF_FAILURE_RATE in [0, 1]).
+"""
+import os
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+LATENCY = float(os.environ.get("AGF_FAKE_YF_LATENCY", "0.05"))
+FAILURE_RATE = float(os.environ.get("AGF_FAKE_YF_FAILURE_RATE", "0"))
+
+BASE_PRICES = {
+    "SI=F": 32.0, "GC=F": 2400.0, "PL=F": 1000.0, "PA=F": 1100.0, "INR=X": 83.2,
+    "SLV": 29.0, "SIVR": 30.5, "SIL": 40.0, "GLD": 220.0, "IAU": 45.0, "GDX": 38.0,
+    "PPLT": 90.0, "PALL": 95.0,
+}
+FREQS = {"1m": "min", "5m": "5min", "30m": "30min", "1h": "h", "1d": "B", "1wk": "W-FRI"}
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 30, "6mo": 182, "1y": 365, "2y": 730, "5y": 1826, "10y": 3652}
+
+_calls = {"download": 0, "bars": 0, "failures": 0}
+_lock = threading.Lock()
+
+
+def calls():
+    """Copy of the call counters"""
+    with _lock:
+        return dict(_calls)
+
+
+def _closes(ticker, index):
+    seed = zlib.crc32(ticker.encode())
+    t = index.asi8 / 1e9 / 86400  # Days since the epoch
+    phase = seed % 1000
+    wave = 0.08 * np.sin(t / 45 + phase) + 0.03 * np.sin(t / 6 + phase / 7) + 0.004 * np.sin(t * 40 + phase)
+    return BASE_PRICES.get(ticker, 50.0) * np.exp(wave)
+
+
+def _bars(ticker, index):
+    close = _closes(ticker, index)
+    volume = (1000 + (zlib.crc32(ticker.encode()) % 500) * (1 + np.abs(np.sin(index.asi8 / 3.6e12)))).astype(int)
+    return pd.DataFrame({
+        "Open": close * 0.999, "High": close * 1.004, "Low": close * 0.996, "Close": close,
+        "Adj Close": close, "Volume": volume,
+    }, index=index)
+
+
+def _index(period, interval, start):
+    now = pd.Timestamp.now(tz="UTC")
+    freq = FREQS.get(interval, "B")
+    if start is not None:
+        begin = pd.Timestamp(start)
+        begin = begin.tz_localize("UTC") if begin.tzinfo is None else begin.tz_convert("UTC")
+    else:
+        begin = now - pd.Timedelta(days=PERIOD_DAYS.get(period, 30))
+    # Aligned to the bar grid, so overlapping downloads return the same timestamps
+    begin = begin.normalize() if freq in ("B", "W-FRI") else begin.ceil(freq)
+    index = pd.date_range(begin, now, freq=freq)
+    if interval in ("1d", "1wk"):
+        index = index.tz_convert(None).normalize()
+    return index.rename("Date" if interval in ("1d", "1wk") else "Datetime")
+
+
+def download(tickers, period="1mo", interval="1d", start=None, end=None, group_by="column", **kwargs):
+    tickers = tickers.split() if isinstance(tickers, str) else list(tickers)
+    if LATENCY:
+        time.sleep(LATENCY)
+    with _lock:
+        _calls["download"] += 1
+        if FAILURE_RATE and random.random() < FAILURE_RATE:
+            _calls["failures"] += 1
+            raise ConnectionError("fake_yfinance: injected failure")
+    index = _index(period, interval, start)
+    aligned = index.tz_localize("UTC") if index.tz is None else index
+    frames = {t: _bars(t, aligned).set_axis(index) for t in tickers}
+    with _lock:
+        _calls["bars"] += len(index) * len(tickers)
+    df = pd.concat(frames, axis=1)
+    if group_by != "ticker":
+        df = df.swaplevel(0, 1, axis=1).sort_index(axis=1)
+    return df
+
+
+class Ticker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period="1mo", interval="1d", start=None, end=None, **kwargs):
+        return download(self.ticker, period, interval, start, end, group_by="ticker")[self.ticker]
@@ -0,0 +1,269 @@
+"""Concurrent-session load test for one dashboard replica.
+
+Simulates N users on one Streamlit process and reports how rerun latency,
+upstream traffic and memory change as N grows. Nothing leaves the
+machine: the n8n webhook is fake_n8n.FakeN8n (configurable latency and
+failure rate) and yfinance is replaced by fake_yfinance via sys.modules.
+
+Each level of N runs in a fresh worker process, which stands in for one
+replica with cold caches and its own price store. Inside it, N threads
+each drive a streamlit.testing AppTest session of front.py. A session
+signs in through the login form, then performs random interactions
+(plain reruns, theme toggle, asset switch, data source, price range,
+confidence filter) with think time in between. Every AppTest.run() is
+one timed rerun.
+
+    python benchmarks/load.py --sessions 1 2 4 8 16 --actions 20
+    python benchmarks/load.py --sessions 8 --n8n-latency 3 --n8n-failure-rate 0.2
+
+Per level the report shows p50/p90/p99/max rerun latency, login latency,
+script errors, n8n calls and yfinance downloads, and the replica's RSS
+(start, end, peak). It is written to benchmarks/results/load.json.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+FRONT_PATH = os.path.join(ROOT, "front.py")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "load.json")
+
+SESSION_LEVELS = (1, 2, 4, 8)
+ACTIONS = 20
+THINK_SECONDS = 0.5
+RUN_TIMEOUT = 120
+
+PRICE_RANGES = ("1D", "5D", "1M", "6M", "1Y")
+SOURCES = ("Live n8n", "Local engine", "Offline file")
+# Interaction -> relative weight
+ACTION_WEIGHTS = {
+    "rerun": 4, "toggle_theme": 1, "switch_asset": 2, "data_source": 2, "price_range": 2, "filter": 1,
+}
+
+
+def _quantile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _find(elements, label, match=str.__eq__):
+    """The first element whose label matches, or LookupError"""
+    for element in elements:
+        if match(element.label, label):
+            return element
+    raise LookupError(f"No widget labelled {label!r} on the page")
+
+
+def _rss_mb():
+    """Current resident set size of this process (Linux), else the peak"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+# ---------------- WORKER (one replica) ----------------
+class Session:
+    """One simulated user driving an AppTest of front.py"""
+
+    def __init__(self, number, actions, think, seed):
+        from streamlit.testing.v1 import AppTest
+        self.number = number
+        self.actions = actions
+        self.think = think
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_file(FRONT_PATH, default_timeout=RUN_TIMEOUT)
+        self.latencies = []
+        self.login_latency = None
+        self.errors = []
+
+    def _run(self):
+        start = time.perf_counter()
+        self.app.run()
+        elapsed = time.perf_counter() - start
+        self.errors.extend(e.message for e in self.app.exception)
+        return elapsed
+
+    def login(self):
+        self._run()  # Login page
+        _find(self.app.text_input, "Username").input(f"user{self.number}")
+        _find(self.app.text_input, "Email Address").input(f"user{self.number}@gmail.com")
+        _find(self.app.button, "Sign In").click()
+        self.login_latency = self._run()
+
+    def act(self):
+        app, rng = self.app, self.rng
+        action = rng.choices(list(ACTION_WEIGHTS), weights=list(ACTION_WEIGHTS.values()))[0]
+        if action == "toggle_theme":
+            toggle = _find(app.sidebar.toggle, "Dark Mode")
+            toggle.set_value(not toggle.value)
+        elif action == "switch_asset":
+            from assets import ASSETS
+            app.session_state["asset"] = rng.choice(list(ASSETS))
+        elif action == "data_source":
+            radio = _find(app.sidebar.radio, "Data Source", str.endswith)
+            radio.set_value(rng.choice(SOURCES))
+        elif action == "price_range":
+            app.session_state["price_range"] = rng.choice(PRICE_RANGES)
+        elif action == "filter":
+            sliders = [s for s in app.slider if s.label == "Min Confidence"]
+            if sliders:
+                sliders[0].set_value(rng.choice((0.0, 0.3, 0.6)))
+        self.latencies.append(self._run())
+
+    def drive(self, start_barrier):
+        try:
+            start_barrier.wait()
+            self.login()
+            for _ in range(self.actions):
+                time.sleep(self.rng.uniform(0, 2 * self.think))
+                self.act()
+        except Exception as e:
+            self.errors.append(f"session {self.number}: {type(e).__name__}: {e}")
+
+
+def run_worker(sessions, actions, think, seed):
+    """Runs one load level in this process; returns the level's report"""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    import fake_yfinance
+    sys.modules["yfinance"] = fake_yfinance
+    import metrics
+
+    rss_start = _rss_mb()
+    users = [Session(i, actions, think, seed + i) for i in range(sessions)]
+    barrier = threading.Barrier(sessions)
+    threads = [threading.Thread(target=u.drive, args=(barrier,), name=f"session-{u.number}") for u in users]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies = [x for u in users for x in u.latencies]
+    logins = [u.login_latency for u in users if u.login_latency is not None]
+    errors = [e for u in users for e in u.errors]
+    timers = metrics.REGISTRY.summary()["timers"]
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "rerun_p50_s": _quantile(latencies, 0.50),
+        "rerun_p90_s": _quantile(latencies, 0.90),
+        "rerun_p99_s": _quantile(latencies, 0.99),
+        "rerun_max_s": max(latencies) if latencies else None,
+        "rerun_mean_s": statistics.fmean(latencies) if latencies else None,
+        "login_p50_s": _quantile(logins, 0.50),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "yfinance": fake_yfinance.calls(),
+        "fetch_counts": {k: v["count"] for k, v in timers.items() if k.startswith("fetch.")},
+        "rss_start_mb": round(rss_start, 1),
+        "rss_end_mb": round(_rss_mb(), 1),
+        "rss_peak_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+# ---------------- DRIVER ----------------
+def run_level(args, sessions, fake, workdir):
+    """Runs one level of N sessions in a fresh replica process"""
+    level_dir = os.path.join(workdir, f"n{sessions}")
+    os.makedirs(level_dir, exist_ok=True)
+    env = dict(
+        os.environ,
+        N8N_WEBHOOK_URL=fake.url,
+        AGF_PRICE_STORE=os.path.join(level_dir, "price_store"),
+        AGF_CACHE_URL="sqlite:///" + os.path.join(level_dir, "cache.sqlite"),
+        AGF_METRICS_DIR=os.path.join(level_dir, "metrics"),
+        AGF_SIGNAL_HISTORY=os.path.join(level_dir, "signal_history.jsonl"),
+        AGF_CLUSTER_STATE=os.path.join(level_dir, "clusters.sqlite"),
+        AGF_FAKE_YF_LATENCY=str(args.yf_latency),
+        AGF_FAKE_YF_FAILURE_RATE=str(args.yf_failure_rate),
+    )
+    before = fake.stats()
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(sessions),
+           "--actions", str(args.actions), "--think", str(args.think), "--seed", str(args.seed)]
+    proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Worker for {sessions} session(s) failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    after = fake.stats()
+    report["n8n"] = {k: after[k] - before[k] for k in after}
+    return report
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test one dashboard replica with N concurrent sessions")
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(SESSION_LEVELS), help="levels of N")
+    parser.add_argument("--actions", type=int, default=ACTIONS, help="interactions per session after login")
+    parser.add_argument("--think", type=float, default=THINK_SECONDS, help="mean think time between actions (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n8n-latency", type=float, default=1.0, help="fake webhook response time (s)")
+    parser.add_argument("--n8n-jitter", type=float, default=0.25, help="+/- webhook latency jitter (s)")
+    parser.add_argument("--n8n-failure-rate", type=float, default=0.0, help="share of webhook calls that fail")
+    parser.add_argument("--narratives", type=int, help="synthetic webhook payload size (default: n8n_data.json)")
+    parser.add_argument("--yf-latency", type=float, default=0.2, help="fake yfinance download time (s)")
+    parser.add_argument("--yf-failure-rate", type=float, default=0.0, help="share of downloads that fail")
+    parser.add_argument("--out", default=RESULTS_PATH, help="report JSON path")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.actions, args.think, args.seed)))
+        return 0
+
+    sys.path.insert(0, BENCH_DIR)
+    from fake_n8n import FakeN8n
+    fake = FakeN8n(latency=args.n8n_latency, jitter=args.n8n_jitter, failure_rate=args.n8n_failure_rate,
+                   narratives=args.narratives).start()
+    levels = []
+    print(f"{'N':>4} {'reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'login':>7} "
+          f"{'errors':>6} {'n8n':>5} {'yf':>5} {'RSS MB':>16}")
+    try:
+        with tempfile.TemporaryDirectory(prefix="agf-load-") as workdir:
+            for sessions in args.sessions:
+                r = run_level(args, sessions, fake, workdir)
+                levels.append(r)
+                print(f"{sessions:>4} {r['reruns']:>7} {_ms(r['rerun_p50_s']):>8} {_ms(r['rerun_p90_s']):>8} "
+                      f"{_ms(r['rerun_p99_s']):>8} {_ms(r['rerun_max_s']):>8} {_ms(r['login_p50_s']):>7} "
+                      f"{r['errors']:>6} {r['n8n']['calls']:>5} {r['yfinance']['download']:>5} "
+                      f"{r['rss_start_mb']:>5.0f}→{r['rss_end_mb']:.0f} ({r['rss_peak_mb']:.0f})", flush=True)
+    finally:
+        fake.stop()
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "worker")},
+        "levels": levels,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+    return 1 if any(r["errors"] for r in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Stage benchmarks for the payload -> dashboard pipeline.
+
+Times each step a dashboard render goes through, one at a time, on
+synthetic inputs of growing size (see synthetic.py):
+
+    narratives   json_parse, payload_parse, narrative_bucketing,
+                 format_supporting_data, macro_radar.{build,serialize},
+                 narrative_scatter.{build,serialize}
+    price bars   price.downsample, price_line.{build,serialize}
+
+Figures are built with the uncached builders, and "serialize" is the
+Plotly JSON encoding st.plotly_chart sends to the browser. Each stage
+reports the median and minimum of several runs (fewer for slow stages).
+
+Results are written as JSON. Medians are checked against per-size budgets
+(thresholds.json) and, optionally, against an earlier results file; the
+exit status is 1 if any stage regressed, so the suite can gate a deploy:
+
+    python benchmarks/run.py --quick
+    python benchmarks/run.py --baseline benchmarks/results/main.json --max-ratio 1.3
+    python benchmarks/run.py --update-thresholds     # re-baseline the budgets on this machine
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+import plotly.io as pio  # noqa: E402
+
+import charts  # noqa: E402
+import synthetic  # noqa: E402
+from downsample import DEFAULT_MAX_POINTS, downsample_frame  # noqa: E402
+from narrative_index import NarrativeIndex  # noqa: E402
+from payload_model import BEARISH, BULLISH, NEUTRAL, format_supporting_data, parse_payload  # noqa: E402
+
+THRESHOLDS_PATH = os.path.join(BENCH_DIR, "thresholds.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "latest.json")
+
+NARRATIVE_SIZES = (10, 100, 1_000, 10_000, 100_000)
+BAR_SIZES = (10, 1_000, 100_000, 1_000_000, 10_000_000)
+QUICK_NARRATIVE_SIZES = (10, 100, 1_000, 10_000)
+QUICK_BAR_SIZES = (10, 1_000, 100_000, 1_000_000)
+
+REPEAT = 5
+# --update-thresholds sets each budget to this multiple of the measured
+# median (with a floor, so microsecond stages do not trip on noise)
+THRESHOLD_HEADROOM = 3.0
+THRESHOLD_FLOOR_SECONDS = 0.005
+# A stage stops repeating once it has used this much time (it always runs once)
+STAGE_BUDGET_SECONDS = 5.0
+
+
+def measure(fn, repeat=REPEAT, budget=STAGE_BUDGET_SECONDS):
+    """Runs `fn` up to `repeat` times; returns (last result, [seconds per run])"""
+    times = []
+    result = None
+    gc.collect()
+    while len(times) < repeat and sum(times) < budget:
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def _serialize(fig):
+    # What st.plotly_chart sends: the figure's JSON, without re-validation
+    return pio.to_json(fig, validate=False)
+
+
+# ---------------- STAGES ----------------
+def narrative_stages(n, repeat):
+    """Yields (stage, seconds per run, extra) for a payload with n narratives"""
+    raw_bytes = synthetic.make_payload_bytes(n)
+    raw, times = measure(lambda: json.loads(raw_bytes), repeat)
+    yield "json_parse", times, {"payload_bytes": len(raw_bytes)}
+
+    payload, times = measure(lambda: parse_payload(raw), repeat)
+    yield "payload_parse", times, {}
+    narratives = payload.dominant_narratives
+
+    def bucket():
+        index = NarrativeIndex(narratives)
+        return [index.query(direction=d) for d in (BULLISH, BEARISH, NEUTRAL)]
+    _, times = measure(bucket, repeat)
+    yield "narrative_bucketing", times, {}
+
+    _, times = measure(lambda: [format_supporting_data(x.supporting_data) for x in narratives], repeat)
+    yield "format_supporting_data", times, {}
+
+    local = {k: v / 2 for k, v in payload.macro_pressure_index.items()}
+    fig, times = measure(lambda: charts._build_macro_radar(payload.macro_pressure_index, True, local), repeat)
+    yield "macro_radar.build", times, {}
+    _, times = measure(lambda: _serialize(fig), repeat)
+    yield "macro_radar.serialize", times, {}
+
+    fig, times = measure(lambda: charts._build_narrative_scatter(narratives, True), repeat)
+    yield "narrative_scatter.build", times, {}
+    body, times = measure(lambda: _serialize(fig), repeat)
+    yield "narrative_scatter.serialize", times, {"figure_bytes": len(body)}
+
+
+def price_stages(n, repeat):
+    """Yields (stage, seconds per run, extra) for a price history with n bars"""
+    bars = synthetic.make_bars(n)
+    hist, times = measure(lambda: downsample_frame(bars, "Close", DEFAULT_MAX_POINTS), repeat)
+    yield "price.downsample", times, {"points": len(hist)}
+    del bars
+
+    fig, times = measure(lambda: charts._build_price_line(hist, "Silver Futures (SI=F)", True), repeat)
+    yield "price_line.build", times, {}
+    body, times = measure(lambda: _serialize(fig), repeat)
+    yield "price_line.serialize", times, {"figure_bytes": len(body)}
+
+
+# ---------------- REGRESSIONS ----------------
+def check_thresholds(results, thresholds):
+    """Stages whose median exceeds its budget for that size"""
+    breaches = []
+    for r in results:
+        budget = thresholds.get(r["stage"], {}).get(str(r["size"]))
+        if budget is not None and r["median_s"] > budget:
+            breaches.append({**_ref(r), "median_s": r["median_s"], "limit_s": budget, "check": "threshold"})
+    return breaches
+
+
+def check_baseline(results, baseline, max_ratio, min_seconds=THRESHOLD_FLOOR_SECONDS):
+    """Stages more than `max_ratio` times slower than in an earlier run
+
+    Stages under `min_seconds` in both runs are skipped; at that scale
+    timer noise dominates.
+    """
+    before = {(r["stage"], r["size"]): r["median_s"] for r in baseline.get("results", ())}
+    breaches = []
+    for r in results:
+        old = before.get((r["stage"], r["size"]))
+        if old is None or max(old, r["median_s"]) < min_seconds:
+            continue
+        if r["median_s"] > old * max_ratio:
+            breaches.append({**_ref(r), "median_s": r["median_s"], "baseline_s": old,
+                             "ratio": round(r["median_s"] / old, 2), "check": "baseline"})
+    return breaches
+
+
+def make_thresholds(results, headroom=THRESHOLD_HEADROOM, floor=THRESHOLD_FLOOR_SECONDS):
+    """Budgets {stage: {size: seconds}} from a run's medians"""
+    thresholds = {}
+    for r in results:
+        budget = max(r["median_s"] * headroom, floor)
+        thresholds.setdefault(r["stage"], {})[str(r["size"])] = float(f"{budget:.2g}")
+    return thresholds
+
+
+def _ref(r):
+    return {"stage": r["stage"], "size": r["size"]}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the payload -> dashboard pipeline")
+    parser.add_argument("--quick", action="store_true", help="stop at 10k narratives and 1M bars")
+    parser.add_argument("--narratives", type=int, nargs="*", help="narrative counts (default: 10..100k)")
+    parser.add_argument("--bars", type=int, nargs="*", help="price bar counts (default: 10..10M)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per stage")
+    parser.add_argument("--out", default=RESULTS_PATH, help="results JSON path")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="per-stage budgets JSON ('' to skip)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--max-ratio", type=float, default=1.5, help="allowed slowdown against --baseline")
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help=f"rewrite --thresholds from this run ({THRESHOLD_HEADROOM:g}x the medians)")
+    args = parser.parse_args(argv)
+
+    narrative_sizes = args.narratives if args.narratives is not None else (
+        QUICK_NARRATIVE_SIZES if args.quick else NARRATIVE_SIZES)
+    bar_sizes = args.bars if args.bars is not None else (QUICK_BAR_SIZES if args.quick else BAR_SIZES)
+
+    results = []
+    suites = [("narratives", size, narrative_stages) for size in narrative_sizes]
+    suites += [("bars", size, price_stages) for size in bar_sizes]
+    for dimension, size, stages in suites:
+        for stage, times, extra in stages(size, args.repeat):
+            r = {
+                "stage": stage, "dimension": dimension, "size": size,
+                "median_s": statistics.median(times), "min_s": min(times), "runs": len(times), **extra,
+            }
+            results.append(r)
+            print(f"{stage:<28} {dimension:>10}={size:<10,} median {r['median_s'] * 1000:10.3f} ms"
+                  f"   min {r['min_s'] * 1000:10.3f} ms   ({r['runs']} runs)", flush=True)
+
+    regressions = []
+    if args.update_thresholds and args.thresholds:
+        thresholds = {}
+        if os.path.exists(args.thresholds):
+            with open(args.thresholds) as f:
+                thresholds = json.load(f)
+        for stage, budgets in make_thresholds(results).items():
+            thresholds.setdefault(stage, {}).update(budgets)
+        with open(args.thresholds, "w") as f:
+            json.dump(thresholds, f, indent=2)
+            f.write("\n")
+        print(f"Budgets for {len(results)} measurements written to {args.thresholds}")
+    elif args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            regressions += check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions += check_baseline(results, json.load(f), args.max_ratio)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"environment": environment(), "results": results, "regressions": regressions}, f, indent=2)
+
+    for r in regressions:
+        limit = f"limit {r['limit_s'] * 1000:.1f} ms" if r["check"] == "threshold" else \
+            f"baseline {r['baseline_s'] * 1000:.1f} ms, x{r['ratio']}"
+        print(f"REGRESSION {r['stage']} at {r['size']:,}: {r['median_s'] * 1000:.1f} ms ({limit})", file=sys.stderr)
+    print(f"{len(results)} measurements written to {args.out}; {len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Synthetic inputs for the benchmarks.
+
+Payloads in the n8n_data.json schema with any number of narratives, and
+daily-or-finer price histories with any number of bars. Output is
+deterministic for a given size and seed. Names, drivers and supporting
+data are drawn from bounded vocabularies so facet cardinality grows the
+way a real payload would, not one distinct value per narrative.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from payload_model import DIRECTIONS, HORIZONS, LEVELS, SIGNALS
+
+NARRATIVE_TYPES = ("macro", "industrial", "supply", "monetary", "speculative", "geopolitical", "other")
+THEMES = (
+    "Inflation Hedge", "Industrial & Green Energy Demand", "Supply Shortage / Deficit",
+    "Speculative & ETF Momentum", "Rate Cut Expectations", "Dollar Weakness", "Solar Capex Boom",
+    "Mine Output Stall", "Central Bank Buying", "Safe Haven Flows", "Recession Scare", "COMEX Squeeze",
+)
+DRIVERS = tuple(
+    f"{a} {b}" for a in ("inflation", "solar", "etf", "mine", "rate", "usd", "recycling", "jewelry",
+                         "comex", "india", "china", "fed")
+    for b in ("demand", "supply", "fears", "flows", "outlook", "inventory", "premium", "policy")
+)
+EVIDENCE = {
+    "macro": ("CPI index trend", "Fed funds path", "Real yields", "DXY move", "Term spread"),
+    "market": ("Spot price action", "ETF volume", "Futures open interest", "Lease rates", "Basis"),
+    "social": ("Retail chatter", "Analyst notes", "Forum mentions", "Newsletter calls"),
+}
+MACRO_KEYS = ("cpi_pressure", "interest_rate_pressure", "recession_risk", "usd_strength_pressure",
+              "overall_macro_stress")
+
+
+def make_payload(n_narratives, n_emerging=None, seed=0):
+    """Raw payload dict with `n_narratives` dominant narratives"""
+    rng = np.random.default_rng(seed)
+    n_emerging = max(1, n_narratives // 10) if n_emerging is None else n_emerging
+    conf = rng.random(n_narratives).round(2)
+    mom = rng.random(n_narratives).round(2)
+    themes = rng.integers(len(THEMES), size=n_narratives)
+    types = rng.integers(len(NARRATIVE_TYPES), size=n_narratives)
+    directions = rng.integers(len(DIRECTIONS), size=n_narratives)
+    horizons = rng.integers(len(HORIZONS) - 1, size=n_narratives)
+    drivers = rng.integers(len(DRIVERS), size=(n_narratives, 3))
+
+    narratives = []
+    for i in range(n_narratives):
+        narratives.append({
+            "narrative_name": f"{THEMES[themes[i]]} #{i}",
+            "narrative_type": NARRATIVE_TYPES[types[i]],
+            "confidence_score": float(conf[i]),
+            "momentum_score": float(mom[i]),
+            "key_drivers": [DRIVERS[d] for d in drivers[i]],
+            "supporting_data": {
+                category: list(items[(i + k) % len(items)] for k in range(1 + (i % 3)))
+                for category, items in EVIDENCE.items()
+            },
+            "price_impact_direction": DIRECTIONS[directions[i]],
+            "expected_time_horizon": HORIZONS[horizons[i]],
+            "reasoning_summary": f"{THEMES[themes[i]]} is driven by {DRIVERS[drivers[i][0]]} "
+                                 f"and {DRIVERS[drivers[i][1]]}, confirmed by price and positioning data.",
+        })
+    emerging = [
+        {
+            "theme": f"{THEMES[i % len(THEMES)]} (emerging {i})",
+            "early_signals": [f"Early signal {i}.{k}" for k in range(3)],
+            "confidence_score": round(float(rng.random()), 2),
+            "risk_level": LEVELS[i % len(LEVELS)],
+            "monitoring_priority": LEVELS[(i + 1) % len(LEVELS)],
+            "why_it_matters": "Could shift the balance of narratives if it keeps building.",
+        }
+        for i in range(n_emerging)
+    ]
+    return {
+        "market_state": {
+            "silver_trend": "bullish", "volatility_level": "high", "macro_regime": "CPI-driven",
+            "regime_explanation": "Synthetic benchmark payload.",
+        },
+        "dominant_narratives": narratives,
+        "emerging_narratives": emerging,
+        "macro_pressure_index": {k: round(float(v), 2) for k, v in zip(MACRO_KEYS, rng.random(len(MACRO_KEYS)))},
+        "market_summary": {
+            "current_market_story": "Synthetic benchmark payload.",
+            "narrative_vs_macro_balance": "balanced",
+            "forward_outlook": "n/a",
+        },
+        "trading_signal": {
+            "signal": SIGNALS[int(rng.integers(len(SIGNALS)))],
+            "confidence": round(float(rng.random()), 2),
+            "reasoning": ["Synthetic"],
+        },
+    }
+
+
+def make_payload_bytes(n_narratives, seed=0):
+    """The payload as the n8n webhook sends it: a JSON list wrapper, UTF-8 encoded"""
+    return json.dumps([make_payload(n_narratives, seed=seed)]).encode()
+
+
+def make_bars(n_bars, freq="1min", seed=0, end="2026-10-16"):
+    """Close-price history with `n_bars` rows on a UTC DatetimeIndex (geometric random walk)"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=n_bars, freq=freq, name="Date")
+    returns = rng.normal(0, 0.001, n_bars)
+    close = 30.0 * np.exp(np.cumsum(returns))
+    return pd.DataFrame({"Close": close}, index=index)
@@ -0,0 +1,340 @@
+"""Streaming emerging-narrative detector.
+
+Reads news/social documents (the corpus.jsonl schema: timestamp, source,
+text or title) from a JSONL file, either once or tail-followed as lines
+are appended, and flags terms and two-word phrases whose mention rate is
+bursting.
+
+Counts are kept per time bucket. When a bucket closes, each term seen in
+it updates an exponentially weighted baseline (mean and variance of its
+per-bucket count). A term is bursting when its count in the open bucket
+sits well above that baseline:
+
+    z = (count - mean) / sqrt(var + mean + 1)
+
+The `mean + 1` term is a Poisson floor, so rare terms need several
+mentions to fire. Each document costs O(its own terms): closing a bucket
+folds only the terms seen in it, and a term is re-checked for pruning
+PRUNE_AFTER buckets after it was last seen, so documents are never
+re-scanned. Reading the bursts also closes the open bucket once the
+clock has moved past it: the wall clock for a live feed, the newest
+document's time when replaying a historical one. Terms whose baseline has
+decayed to nothing are dropped, and memory tracks the active vocabulary
+rather than the whole history.
+
+Candidates come out as emerging_narratives dicts (theme, early_signals,
+confidence_score, risk_level, monitoring_priority, why_it_matters).
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from narrative_engine import CORPUS_PATH, NARRATIVE_LEXICON, _parse_timestamp
+
+FEED_PATH = os.environ.get("AGF_FEED_PATH", CORPUS_PATH)
+
+BUCKET_SECONDS = 3600
+# Baseline half-life in buckets
+HALF_LIFE = 24
+BURST_Z = 3.0
+MIN_COUNT = 3
+# Closed buckets needed before anything is reported (every term is "new" at first)
+WARMUP_BUCKETS = 6
+# Buckets after its last mention that a term is checked for pruning, and
+# the baseline below which it is dropped
+PRUNE_AFTER = 48
+MIN_BASELINE = 0.01
+EXAMPLES = 3
+MAX_CANDIDATES = 5
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a about after again all also am an and any are as at be been before being but by can could
+    did do does for from had has have he her his how i if in into is it its just like more most
+    my new no not now of off on one only or our out over says so some such than that the their
+    them then there these they this to too up us was we were what when which who will with would
+    you your silver metal metals price prices market markets today week
+""".split())
+
+# Lexicon terms -> (narrative type, direction), to label phrases that match a known theme
+_LEXICON_TERMS = {
+    term.strip(): spec for spec in NARRATIVE_LEXICON for term in spec["terms"]
+}
+
+
+def doc_terms(text):
+    """Unigrams plus adjacent-word bigrams of a document, each counted once"""
+    words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS and len(w) > 2]
+    terms = set(words)
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return terms
+
+
+class TermStats:
+    """EWMA baseline of one term's per-bucket count"""
+
+    __slots__ = ("mean", "var", "bucket")
+
+    def __init__(self, bucket):
+        self.mean = 0.0
+        self.var = 0.0
+        self.bucket = bucket  # Last bucket folded into the baseline
+
+    def baseline(self, bucket, alpha):
+        """(mean, var) as of `bucket`, counting the buckets since the last
+        update as zeros (closed form of repeated zero-count updates)"""
+        decay = (1 - alpha) ** max(bucket - self.bucket - 1, 0)
+        return self.mean * decay, (self.var + self.mean * self.mean) * decay - (self.mean * decay) ** 2
+
+    def fold(self, count, bucket, alpha):
+        """Folds the zero-count buckets since the last update, then `count`"""
+        mean, var = self.baseline(bucket, alpha)
+        delta = count - mean
+        self.mean = mean + alpha * delta
+        self.var = (1 - alpha) * (var + alpha * delta * delta)
+        self.bucket = bucket
+
+
+class BurstDetector:
+    """Incremental term/phrase burst detection over time buckets"""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, half_life=HALF_LIFE, z_threshold=BURST_Z, min_count=MIN_COUNT,
+                 clock=time.time):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock  # Closes the open bucket when no documents arrive; see replay_clock()
+        self.alpha = 1 - 0.5 ** (1 / half_life)
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.stats = {}
+        self.current = None  # Open bucket number
+        self.counts = Counter()  # Term counts in the open bucket
+        self.examples = {}  # term -> first EXAMPLES documents mentioning it in the open bucket
+        self._expiry = deque()  # (bucket, terms last seen in it), oldest first
+        self.buckets = 0  # Buckets closed so far
+        self.docs = 0
+        self.last_ts = None
+        self._lock = threading.Lock()
+
+    def _close_bucket(self, next_bucket):
+        """Folds the open bucket into the baselines and prunes dead terms"""
+        folded = []
+        for term, count in self.counts.items():
+            stats = self.stats.get(term)
+            if stats is None:
+                if count == 1:
+                    continue  # A one-off mention barely moves a zero baseline; not worth tracking
+                stats = self.stats[term] = TermStats(self.current - 1)
+            stats.fold(count, self.current, self.alpha)
+            folded.append(term)
+        self._expiry.append((self.current, folded))
+        self.counts.clear()
+        self.examples.clear()
+        self.buckets += 1
+        self.current = next_bucket
+
+        # Terms not mentioned for PRUNE_AFTER buckets: drop them once their
+        # baseline has decayed, otherwise check again later
+        while self._expiry and self._expiry[0][0] <= next_bucket - PRUNE_AFTER:
+            bucket, terms = self._expiry.popleft()
+            keep = []
+            for term in terms:
+                stats = self.stats.get(term)
+                if stats is None or stats.bucket != bucket:
+                    continue  # Mentioned again since; queued under a later bucket
+                if stats.baseline(next_bucket, self.alpha)[0] < MIN_BASELINE:
+                    del self.stats[term]
+                else:
+                    keep.append(term)
+            if keep:
+                self._expiry.append((bucket, keep))
+                break  # Re-queued entries are checked again on the next close
+
+    def add(self, text, ts=None):
+        """Ingests one document; late documents count towards the open bucket"""
+        ts = time.time() if ts is None else ts
+        bucket = int(ts // self.bucket_seconds)
+        with self._lock:
+            if self.current is None:
+                self.current = bucket
+            elif bucket > self.current:
+                self._close_bucket(bucket)
+            counts, examples = self.counts, self.examples
+            for term in doc_terms(text):
+                count = counts[term] = counts[term] + 1
+                if count <= EXAMPLES:
+                    examples.setdefault(term, []).append(text)
+            self.docs += 1
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+    def replay_clock(self):
+        """The newest document time, for replaying a historical feed: the wall
+        clock would count every one of its buckets as closed"""
+        return self.last_ts or 0.0
+
+    def add_doc(self, doc):
+        """Ingests a parsed feed line (dict with text/title and timestamp)"""
+        text = doc.get("text") or doc.get("title") or ""
+        if text:
+            self.add(text, _parse_timestamp(doc.get("timestamp")) or None)
+
+    # ---------------- SCORING ----------------
+    def _score(self, term, count):
+        stats = self.stats.get(term)
+        mean, var = stats.baseline(self.current, self.alpha) if stats else (0.0, 0.0)
+        return (count - mean) / math.sqrt(max(var, 0.0) + mean + 1.0), mean
+
+    def bursts(self):
+        """[(term, z, count, baseline mean)] for bursting terms, strongest first
+
+        An open bucket whose time has passed is closed first, so a burst
+        stops being reported once its window is over even if the feed has
+        gone quiet.
+        """
+        with self._lock:
+            bucket = int(self.clock() // self.bucket_seconds)
+            if self.current is not None and bucket > self.current:
+                self._close_bucket(bucket)
+            found = []
+            if self.buckets < WARMUP_BUCKETS:
+                return found
+            for term, count in self.counts.items():
+                if count < self.min_count:
+                    continue
+                z, mean = self._score(term, count)
+                if z >= self.z_threshold:
+                    found.append((term, z, count, mean))
+        found.sort(key=lambda b: (-b[1], -b[2], b[0].count(" ") == 0))
+        return found
+
+    def themes(self):
+        """Bursting terms grouped by shared words: [(strongest burst, related terms)]
+
+        "comex delivery", "delivery squeeze" and "squeeze" firing together
+        are one theme, named after the strongest of them (phrases win ties).
+        """
+        groups = []  # [lead burst, related terms, words], strongest lead first
+        for burst in self.bursts():
+            words = set(burst[0].split())
+            overlapping = [g for g in groups if words & g[2]]
+            if not overlapping:
+                groups.append([burst, [], words])
+                continue
+            # Joins the strongest overlapping group and bridges any others into it
+            head = overlapping[0]
+            head[1].append(burst[0])
+            head[2] |= words
+            for g in overlapping[1:]:
+                head[1].extend([g[0][0]] + g[1])
+                head[2] |= g[2]
+                groups.remove(g)
+        return [(lead, related) for lead, related, _ in groups]
+
+    def candidates(self, limit=MAX_CANDIDATES, metal=None):
+        """Bursting themes as emerging_narratives dicts; `metal` names the asset in the text"""
+        out = []
+        themes = self.themes()[:limit]
+        with self._lock:
+            examples = {lead[0]: list(self.examples.get(lead[0], ())) for lead, _ in themes}
+        for (term, z, count, mean), related in themes:
+            spec = _LEXICON_TERMS.get(term)
+            strength = min(1.0, (z - self.z_threshold) / self.z_threshold)
+            direction = f"a {spec['price_impact_direction']} {spec['narrative_type']}" if spec else "a new"
+            out.append({
+                "theme": term.title(),
+                "early_signals": examples.get(term, []),
+                "confidence_score": round(0.35 + 0.4 * strength, 2),
+                "risk_level": "high" if spec and spec["price_impact_direction"] == "bearish" else "medium",
+                "monitoring_priority": "high" if strength >= 0.5 else "medium",
+                "why_it_matters": (
+                    f"'{term}' appeared in {count} documents this {self.bucket_seconds // 60}-minute window "
+                    f"against a baseline of {mean:.1f} (burst z={z:.1f})"
+                    + (f", alongside {', '.join(related[:3])}" if related else "")
+                    + f"; it could develop into {direction} narrative"
+                    + (f" for {metal}." if metal else ".")
+                ),
+            })
+        return out
+
+
+# ---------------- FEED ----------------
+class FeedIngestor:
+    """Feeds a detector from a JSONL file, reading only bytes appended since the last poll"""
+
+    def __init__(self, detector, path=FEED_PATH):
+        self.detector = detector
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Ingests new complete lines; returns the number of documents read
+
+        A replaced or truncated file is read again from the start.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if st.st_ino != self.inode or st.st_size < self.offset:
+                self.inode, self.offset = st.st_ino, 0
+            if st.st_size == self.offset:
+                return 0
+            read = 0
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written line: pick it up next poll
+                    self.offset += len(line)
+                    try:
+                        doc = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(doc, dict):
+                        self.detector.add_doc(doc)
+                        read += 1
+            return read
+
+    def follow(self, interval=1.0):
+        """Polls forever, yielding the candidates after each batch of new documents"""
+        while True:
+            if self.poll():
+                yield self.detector.candidates()
+            else:
+                time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag bursting themes in a news/social JSONL feed")
+    parser.add_argument("path", nargs="?", default=FEED_PATH)
+    parser.add_argument("--follow", action="store_true", help="keep reading as lines are appended")
+    parser.add_argument("--replay", action="store_true",
+                        help="with --follow, keep time by the feed's timestamps instead of the wall clock")
+    parser.add_argument("--bucket", type=int, default=BUCKET_SECONDS, help="bucket size in seconds")
+    parser.add_argument("--z", type=float, default=BURST_Z, help="burst z-score threshold")
+    args = parser.parse_args(argv)
+
+    detector = BurstDetector(bucket_seconds=args.bucket, z_threshold=args.z)
+    if args.replay or not args.follow:
+        detector.clock = detector.replay_clock  # One-shot reads are of history, not a live stream
+    feed = FeedIngestor(detector, args.path)
+    if not args.follow:
+        feed.poll()
+        print(json.dumps(feed.detector.candidates(), indent=2))
+        return
+    try:
+        for candidates in feed.follow():
+            print(json.dumps(candidates), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
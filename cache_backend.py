@@ -0,0 +1,295 @@
+"""Shared cross-process cache.
+
+Lets several dashboard replicas share one upstream fetch per refresh
+interval. Serialized values are stored with a TTL in a backend every
+replica can reach; a short-lived lock per key makes sure only one replica
+fetches while the others wait for its result. Within a process, identical
+concurrent calls are coalesced as well.
+
+Backends, chosen by URL (env AGF_CACHE_URL):
+
+* ``sqlite:///path/to/cache.sqlite``: replicas on one host (default)
+* ``redis://host:6379/0``: any Redis-protocol server, spoken over a plain
+  socket so no client library is needed
+"""
+import io
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import metrics
+from http_client import SingleFlight
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_URL = os.environ.get(
+    "AGF_CACHE_URL", "sqlite:///" + os.path.join(BASE_DIR, ".cache", "shared.sqlite")
+)
+KEY_PREFIX = "agf:"
+
+# How long a fetching replica may hold a key's lock, and how long the
+# others wait for its result before fetching themselves
+LOCK_TTL = 60
+LOCK_WAIT = 30
+POLL_SECONDS = 0.2
+
+
+# ---------------- CODECS ----------------
+class JsonCodec:
+    @staticmethod
+    def dumps(value):
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    @staticmethod
+    def loads(blob):
+        return json.loads(blob)
+
+
+class FrameCodec:
+    """DataFrames as Parquet bytes (keeps dtypes and the tz-aware index)"""
+
+    @staticmethod
+    def dumps(df):
+        buf = io.BytesIO()
+        df.to_parquet(buf)
+        return buf.getvalue()
+
+    @staticmethod
+    def loads(blob):
+        import pandas as pd
+        return pd.read_parquet(io.BytesIO(blob))
+
+
+# ---------------- SQLITE ----------------
+class SqliteBackend:
+    """Cache table plus lock table in one WAL-mode SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT, expires_at REAL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(value), now + ttl),
+        )
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def acquire(self, key, ttl):
+        """Returns a lock token, or None if another holder has the key"""
+        token = uuid.uuid4().hex
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)",
+                (key, token, now + ttl),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return token if cur.rowcount == 1 else None
+
+    def release(self, key, token):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+
+# ---------------- REDIS ----------------
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+# Deletes the lock only if we still own it
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class RedisBackend:
+    """Minimal RESP2 client; one socket per thread"""
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password)
+
+    # Wire protocol
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock, self._local.reader = sock, sock.makefile("rb")
+        if self.password:
+            self._command("AUTH", self.password)
+        if self.db:
+            self._command("SELECT", self.db)
+
+    def _command(self, *args):
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            self._local.sock.sendall(b"".join(parts))
+            return self._read_reply()
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self._local.reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = self._local.reader = None
+
+    # Cache API
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl):
+        self._command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def acquire(self, key, ttl):
+        token = uuid.uuid4().hex
+        reply = self._command("SET", "lock:" + key, token, "NX", "PX", max(1, int(ttl * 1000)))
+        return token if reply == "OK" else None
+
+    def release(self, key, token):
+        self._command("EVAL", _RELEASE_SCRIPT, 1, "lock:" + key, token)
+
+
+# ---------------- SHARED CACHE ----------------
+_UNAVAILABLE = object()  # acquire() failed because the backend is down
+
+
+class SharedCache:
+    """get_or_fetch over a backend: one upstream call per key per TTL across
+    every process sharing the backend"""
+
+    def __init__(self, backend, prefix=KEY_PREFIX, lock_ttl=LOCK_TTL, lock_wait=LOCK_WAIT):
+        self.backend = backend
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._flight = SingleFlight()
+
+    def _safe(self, op, *args, default=None):
+        """Runs a backend call; a broken backend degrades to direct fetches"""
+        try:
+            return op(*args)
+        except Exception:
+            metrics.incr("cache.shared.error")
+            return default
+
+    def get(self, key, codec=JsonCodec):
+        blob = self._safe(self.backend.get, self.prefix + key)
+        return None if blob is None else codec.loads(blob)
+
+    def get_or_fetch(self, key, fetch, ttl, codec=JsonCodec):
+        """Returns the cached value for `key`, or calls `fetch` (at most once
+        across processes while the lock is held) and stores its result"""
+        blob = self._safe(self.backend.get, self.prefix + key)
+        if blob is not None:
+            metrics.incr("cache.shared.hit")
+            return codec.loads(blob)
+        return self._flight.do(key, lambda: self._fill(key, fetch, ttl, codec))
+
+    def _fill(self, key, fetch, ttl, codec):
+        full_key = self.prefix + key
+        token = self._safe(self.backend.acquire, full_key, self.lock_ttl, default=_UNAVAILABLE)
+        deadline = time.monotonic() + self.lock_wait
+        while token is None and time.monotonic() < deadline:
+            # Another replica is fetching: wait for its result, or for the lock
+            # to come free if its fetch failed
+            time.sleep(POLL_SECONDS)
+            blob = self._safe(self.backend.get, full_key)
+            if blob is not None:
+                metrics.incr("cache.shared.wait_hit")
+                return codec.loads(blob)
+            token = self._safe(self.backend.acquire, full_key, self.lock_ttl, default=_UNAVAILABLE)
+        # No token here means the holder is slow or the backend is down:
+        # fetch anyway rather than fail the caller
+        try:
+            blob = self._safe(self.backend.get, full_key)
+            if blob is not None:
+                metrics.incr("cache.shared.hit")
+                return codec.loads(blob)
+            metrics.incr("cache.shared.miss")
+            value = fetch()
+            self._safe(self.backend.set, full_key, codec.dumps(value), ttl)
+            return value
+        finally:
+            if token not in (None, _UNAVAILABLE):
+                self._safe(self.backend.release, full_key, token)
+
+
+def from_url(url=CACHE_URL, **kwargs):
+    """Builds a SharedCache for a sqlite:/// or redis:// URL"""
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        backend = SqliteBackend(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):])
+    elif scheme in ("redis", "rediss"):
+        if scheme == "rediss":
+            raise ValueError("TLS Redis (rediss://) is not supported; use a local TLS proxy")
+        backend = RedisBackend.from_url(url)
+    else:
+        raise ValueError(f"Unsupported cache URL scheme {scheme!r}; expected sqlite:/// or redis://")
+    return SharedCache(backend, **kwargs)
@@ -0,0 +1,203 @@
+"""Dashboard figures.
+
+Plotly figures are memoized per process in a bounded LRU keyed by a
+content hash of their inputs plus the theme. Reruns triggered by unrelated
+widgets (dark-mode toggle, expanders, pagination) reuse the finished figure
+instead of rebuilding DataFrames and Plotly objects.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import metrics
+import theme
+
+MAX_FIGURES = 32
+
+
+def content_hash(*parts):
+    """Stable sha1 over JSON-serializable parts"""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame's index and values"""
+    import pandas as pd
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+
+class FigureCache:
+    """Thread-safe LRU of built figures"""
+
+    def __init__(self, max_entries=MAX_FIGURES):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                metrics.incr("cache.figure.hit")
+                return fig
+        metrics.incr("cache.figure.miss")
+        with metrics.timer("figure.build"):
+            fig = build()
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def __len__(self):
+        return len(self._figures)
+
+
+# Process-wide; shared by every session
+FIGURES = FigureCache()
+
+
+def _themed(fig, dark_mode):
+    fig.update_layout(font_color=theme.get_palette(dark_mode)["text"])
+    return fig
+
+
+# ---------------- BUILDERS ----------------
+def _build_macro_radar(macro_data, dark_mode, local=None):
+    import plotly.graph_objects as go  # Lazy: only paid on a cache miss
+    categories = [k.replace("_", " ").title() for k in macro_data.keys()]
+    values = [v * 100 for v in macro_data.values()]
+
+    fig = go.Figure(data=go.Scatterpolar(
+      r=values,
+      theta=categories,
+      fill='toself',
+      name='Macro Pressure'
+    ))
+    if local:
+        # Locally computed gauges on the same axes, for comparison
+        fig.add_trace(go.Scatterpolar(
+          # Gauges the local series cannot compute yet are left as gaps
+          r=[local[k] * 100 if k in local else None for k in macro_data.keys()],
+          theta=categories,
+          line=dict(dash='dash'),
+          name='Local Macro Series'
+        ))
+
+    fig.update_layout(
+      polar=dict(
+        radialaxis=dict(
+          visible=True,
+          range=[0, 100]
+        )),
+      showlegend=bool(local),
+      margin=dict(l=40, r=40, t=40, b=40),
+      height=300
+    )
+    return _themed(fig, dark_mode)
+
+
+def _build_narrative_scatter(narratives, dark_mode, trails=None):
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    df = pd.DataFrame([n.to_dict() for n in narratives])
+
+    fig = px.scatter(
+        df,
+        x="confidence_score",
+        y="momentum_score",
+        size=[10]*len(df), # Fixed bubble size or based on another metric
+        color="narrative_type",
+        hover_name="narrative_name", # Shows title on hover
+        hover_data=["key_drivers"],
+        title="Narrative Matrix: Confidence vs Momentum",
+        labels={"confidence_score": "Confidence", "momentum_score": "Momentum", "narrative_type": "Type"}
+    )
+    # Path of each narrative through earlier snapshots, ending at its current bubble
+    line_color = theme.get_palette(dark_mode)["text"]
+    for name, (confidence, momentum) in (trails or {}).items():
+        fig.add_trace(go.Scatter(
+            x=confidence, y=momentum, mode="lines+markers", name=name, showlegend=False,
+            line=dict(color=line_color, width=1, dash="dot"),
+            marker=dict(size=4, color=line_color),
+            opacity=0.45,
+            hovertemplate=f"{name}<br>Confidence %{{x:.2f}}<br>Momentum %{{y:.2f}}<extra></extra>",
+        ))
+    # Removed fixed textposition to keep chart clean
+    fig.update_layout(height=400, xaxis_range=[0, 1], yaxis_range=[0, 1])
+    return _themed(fig, dark_mode)
+
+
+def _build_price_line(price_hist, title, dark_mode):
+    import plotly.express as px
+    fig = px.line(
+        price_hist,
+        y="Close",
+        title=title,
+        labels={"Close": "Price (USD)", "Date": "Date"}
+    )
+    fig.update_layout(height=350, showlegend=False)
+    return _themed(fig, dark_mode)
+
+
+def _build_intraday_line(price_hist, dark_mode):
+    import plotly.express as px
+    fig = px.line(price_hist, y="Close")
+    fig.update_traces(line_color=theme.get_palette(dark_mode)["cyan"])
+    fig.update_layout(
+        height=140, showlegend=False, margin=dict(l=0, r=0, t=10, b=0),
+        xaxis_title=None, yaxis_title=None,
+    )
+    return _themed(fig, dark_mode)
+
+
+# ---------------- CACHED FIGURES ----------------
+def macro_radar(macro_data, dark_mode=True, local=None):
+    """Radar chart for the macro pressure index, optionally overlaid with
+    locally computed gauges"""
+    key = ("macro_radar", content_hash(macro_data, local), dark_mode)
+    return FIGURES.get_or_build(key, lambda: _build_macro_radar(macro_data, dark_mode, local))
+
+
+def _trails_hash(trails):
+    h = hashlib.sha1()
+    for name, (confidence, momentum) in sorted(trails.items()):
+        h.update(name.encode())
+        h.update(confidence.tobytes())
+        h.update(momentum.tobytes())
+    return h.hexdigest()
+
+
+def narrative_scatter(narratives, digest="", dark_mode=True, trails=None):
+    """Confidence vs momentum scatter; None if there are no narratives
+
+    `digest` is the snapshot's content hash (Payload.digest). Without it the
+    narratives themselves are hashed. `trails` optionally maps narrative
+    names to (confidence, momentum) arrays drawn as trajectories.
+    """
+    if not narratives:
+        return None
+    snapshot = digest or content_hash([n.to_dict() for n in narratives])
+    key = ("narrative_scatter", snapshot, _trails_hash(trails) if trails else None, dark_mode)
+    return FIGURES.get_or_build(key, lambda: _build_narrative_scatter(narratives, dark_mode, trails))
+
+
+def price_line(price_hist, title, dark_mode=True):
+    """Close-price line chart for a DataFrame with a Close column"""
+    key = ("price_line", frame_hash(price_hist), title, dark_mode)
+    return FIGURES.get_or_build(key, lambda: _build_price_line(price_hist, title, dark_mode))
+
+
+def intraday_line(price_hist, dark_mode=True):
+    """Compact, untitled session line for the market pulse"""
+    key = ("intraday_line", frame_hash(price_hist), dark_mode)
+    return FIGURES.get_or_build(key, lambda: _build_intraday_line(price_hist, dark_mode))
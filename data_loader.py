@@ -0,0 +1,173 @@
+"""Page data loading.
+
+Upstream fetches for the background refresher jobs (the n8n payloads and
+one batched delta download of every asset's tickers into the price
+store, read back as one aligned Close frame) and the views renders take
+from their snapshots.
+"""
+import threading
+
+import pandas as pd
+
+import http_client
+from assets import ASSETS, DEFAULT_ASSET, all_tickers, futures_tickers
+from downsample import DEFAULT_MAX_POINTS, downsample_frame
+from price_store import period_start
+
+# Futures, FX pairs and ETFs of every registered asset
+PULSE_TICKERS = all_tickers()
+
+DEFAULT_INR = 83.0
+
+# Chart range -> (bar interval, lookback period); bar sizes stay within what
+# Yahoo serves for each lookback
+PRICE_RANGES = {
+    "1D": ("1m", "1d"),
+    "5D": ("5m", "5d"),
+    "1M": ("30m", "1mo"),
+    "6M": ("1h", "6mo"),
+    "1Y": ("1h", "1y"),
+    "5Y": ("1d", "5y"),
+    "10Y": ("1d", "10y"),
+}
+
+
+# ---------------- UPSTREAM FETCHES ----------------
+def fetch_webhook_payload(url):
+    """POSTs to the n8n webhook and returns (data, error_message)"""
+    try:
+        return http_client.get_client(url).post_json(), None
+    except Exception as e:
+        error_text = str(e)
+        if hasattr(e, 'response') and e.response is not None:
+             error_text = f"Server Error ({e.response.status_code}): {e.response.text}"
+        return None, error_text
+
+
+def fetch_market_frame(store, tickers=PULSE_TICKERS, period="1mo", interval="1d"):
+    """Pulls only new bars for all tickers in one batched call, then reads an
+    aligned Close frame for the period from the local store"""
+    store.update(tickers, interval)
+    return store.read_closes(tickers, interval, start=period_start(period))
+
+
+def fetch_price_range(store, range_key, ticker=ASSETS[DEFAULT_ASSET].futures, max_points=DEFAULT_MAX_POINTS,
+                      method="lttb", refresh=True):
+    """Returns (closes decimated to ~max_points, raw bar count) for a chart range
+
+    The lookback is anchored at the newest stored bar, so "1D" still shows the
+    last session over a weekend. If the delta download fails (or `refresh` is
+    False), whatever is already on disk is served.
+    """
+    interval, period = PRICE_RANGES[range_key]
+    if refresh:
+        try:
+            store.update(ticker, interval)
+        except Exception:
+            pass  # Stale bars beat an empty chart
+    last = store.last_timestamp(ticker, interval)
+    if last is None:
+        return None, 0
+    hist = store.read(ticker, interval, start=period_start(period, now=last))[["Close"]].dropna()
+    return downsample_frame(hist, "Close", max_points, method), len(hist)
+
+
+def fetch_session_frame(store, tickers=None, max_points=DEFAULT_MAX_POINTS, refresh=True):
+    """Latest 1-minute session of several futures as one wide Close frame
+
+    All tickers are delta-updated in a single batched download; each column
+    is decimated to ~max_points on its own timestamps (NaN elsewhere).
+    """
+    tickers = tickers or futures_tickers()
+    if refresh:
+        try:
+            store.update(tickers, "1m")
+        except Exception:
+            pass  # Serve the stored session
+    columns = {}
+    for t in tickers:
+        hist, _ = fetch_price_range(store, "1D", t, max_points, refresh=False)
+        if hist is not None:
+            columns[t] = hist["Close"]
+    return pd.DataFrame(columns).reindex(columns=tickers)
+
+
+class PriceWatchlist:
+    """(ticker, interval) keys that renders read straight from the store
+
+    Renders only register the keys they show; a background job calls
+    refresh() to delta-update all of them, one batched download per
+    interval, so no render waits on Yahoo.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def watch(self, ticker, interval):
+        """Adds a key; True if it was not watched before"""
+        with self._lock:
+            if (ticker, interval) in self._keys:
+                return False
+            self._keys[(ticker, interval)] = None
+            return True
+
+    def refresh(self):
+        """Delta-updates every watched key; returns {(ticker, interval): rows appended}"""
+        with self._lock:
+            keys = list(self._keys)
+        by_interval = {}
+        for ticker, interval in keys:
+            by_interval.setdefault(interval, []).append(ticker)
+        appended = {}
+        for interval, tickers in by_interval.items():
+            for ticker, rows in self.store.update(tickers, interval).items():
+                appended[(ticker, interval)] = rows
+        return appended
+
+
+# ---------------- FRAME VIEWS ----------------
+def _last_two(series):
+    """Returns (latest, previous) non-null closes of a series, or (None, None)"""
+    series = series.dropna()
+    if series.empty:
+        return None, None
+    curr = series.iloc[-1]
+    prev = series.iloc[-2] if len(series) > 1 else curr
+    return float(curr), float(prev)
+
+
+def market_pulse_from_frame(frame, asset=ASSETS[DEFAULT_ASSET]):
+    """Derives (futures price, change %, USD/INR, ETF rows) for an asset from an aligned frame"""
+    if frame is None or frame.empty or asset.futures not in frame:
+        return 0, 0, 0, []
+
+    current_si, prev_si = _last_two(frame[asset.futures])
+    if current_si is None:
+        current_si, prev_si = 0, 0
+    si_change = ((current_si - prev_si) / prev_si) * 100 if prev_si else 0
+
+    current_inr, _ = _last_two(frame[asset.fx]) if asset.fx in frame else (None, None)
+    if current_inr is None:
+        current_inr = DEFAULT_INR
+
+    etf_data = []
+    for sym in asset.etfs:
+        if sym not in frame:
+            continue
+        curr, prev = _last_two(frame[sym])
+        if curr is not None:
+            chg = ((curr - prev) / prev) * 100 if prev else 0
+            etf_data.append({"Ticker": sym, "Price": curr, "Change %": chg})
+
+    return current_si, si_change, current_inr, etf_data
+
+
+def price_history_from_frame(frame, ticker=ASSETS[DEFAULT_ASSET].futures):
+    """Returns a single ticker's closes in the yfinance .history() shape"""
+    if frame is None or frame.empty or ticker not in frame:
+        return None
+    hist = frame[[ticker]].dropna().rename(columns={ticker: "Close"})
+    hist.columns.name = None
+    return hist if not hist.empty else None
@@ -0,0 +1,86 @@
+"""Server-side series decimation.
+
+Long price series are reduced to a fixed point budget before they reach
+the browser, so chart payload size and render time stay flat whatever
+range is selected. Both methods keep original rows (no interpolation):
+
+* LTTB (Largest-Triangle-Three-Buckets) keeps the visually significant
+  points of a line.
+* min/max keeps the extremes of each bucket, so no spike is ever hidden.
+"""
+import numpy as np
+
+# Roughly two points per horizontal pixel of a full-width chart
+DEFAULT_MAX_POINTS = 1500
+METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x, y, threshold):
+    """Row positions picked by LTTB; always keeps the first and last point"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def minmax_indices(y, threshold):
+    """Row positions of each bucket's min and max, in time order"""
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    starts = edges[:-1]
+    # reduceat gives each bucket's extreme; locate it with one argmin/argmax per bucket
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    is_low = y == lows[bucket_of]
+    is_high = y == highs[bucket_of]
+    first_low = np.unique(bucket_of[is_low], return_index=True)[1]
+    first_high = np.unique(bucket_of[is_high], return_index=True)[1]
+    picked = np.concatenate([np.flatnonzero(is_low)[first_low], np.flatnonzero(is_high)[first_high]])
+    return np.unique(np.concatenate([picked, [0, n - 1]]))
+
+
+def downsample_frame(df, column="Close", max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """Returns at most ~max_points rows of `df`, chosen on `column`
+
+    Frames already within budget are returned unchanged. NaNs in `column`
+    are dropped first.
+    """
+    if df is None or len(df) <= max_points:
+        return df
+    df = df[df[column].notna()]
+    if len(df) <= max_points:
+        return df
+    if method == "minmax":
+        idx = minmax_indices(df[column].to_numpy(), max_points)
+    elif method == "lttb":
+        x = df.index.asi8 if hasattr(df.index, "asi8") else np.arange(len(df))
+        idx = lttb_indices(x, df[column].to_numpy(), max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}; expected one of {METHODS}")
+    return df.iloc[idx]
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import time
 import pydeck as pdk
-import yfinance as yf
+from indicators import classify, compute
+from price_store import PriceStore, period_start
 
 # =========================================================
 # ===================== BACKEND ===========================
@@ -36,12 +37,18 @@ def backend_get_geo_india():
         "Growth":["Fast","Fast","Slow","Organic"]
     })
 
+@st.cache_resource
+def backend_get_price_store():
+    return PriceStore()
+
 @st.cache_data(ttl=300)
 def backend_get_market_data():
-    ticker = yf.Ticker("SI=F")
-    hist = ticker.history(period="7d", interval="30m")
+    # Only bars newer than the last stored one are downloaded
+    store = backend_get_price_store()
+    store.update("SI=F", "30m")
+    hist = store.read("SI=F", "30m", start=period_start("7d"))
 
-    if hist.empty:
+    if len(hist) < 2:
         return None
 
     latest = hist.iloc[-1]
@@ -49,12 +56,15 @@ def backend_get_market_data():
 
     price = round(latest["Close"], 2)
     change_pct = round(((price - previous["Close"]) / previous["Close"]) * 100, 2)
-    trend = "Bullish 📈" if change_pct >= 0 else "Bearish 📉"
+    # EMA/volatility regime over the whole week rather than one bar's change
+    regime = classify(compute(hist, "30m"))
+    trend = {"bullish": "Bullish 📈", "bearish": "Bearish 📉"}.get(regime["trend"], "Neutral ➖")
 
     return {
         "price": price,
         "change_pct": change_pct,
         "trend": trend,
+        "volatility": regime["volatility_level"].title(),
         "history": hist[["Close"]].rename(columns={"Close":"Silver Price"})
     }
 
@@ -144,7 +154,7 @@ k1, k2, k3, k4 = st.columns(4)
 k1.metric("🧠 Narratives", len(narratives))
 k2.metric("🌍 Countries", len(geo_world))
 k3.metric("📈 Trend", market["trend"])
-k4.metric("⚡ Volatility", "High")
+k4.metric("⚡ Volatility", market["volatility"])
 
 # ---------------- MARKET ----------------
 st.subheader("📡 Live Silver Market Snapshot")
@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
-import time
-import pydeck as pdk
-import requests
 import json
 import os
+import metrics
+import theme
+
+# Per-section render timings for this rerun (see the Ops Panel)
+stopwatch = metrics.Stopwatch()
 
 # ---------------- CONFIG ----------------
 st.set_page_config(
@@ -23,335 +24,303 @@ with st.sidebar:
     status_color = "#00D17A" if is_dark_mode else "#ef4444"
     st.markdown(f"<span style='color: {status_color}; font-weight: 700; font-size: 0.85rem;'>{status_text}</span>", unsafe_allow_html=True)
 
-# Define Premium Theme Palettes
-if is_dark_mode:
-    tm = {
-        "bg": "#07090B", # Deep Charcoal
-        "bg_grad_1": "rgba(255, 255, 255, 0.02)",
-        "glass_bg": "rgba(18, 22, 26, 0.92)", # Frosted Glass
-        "border": "rgba(255, 255, 255, 0.04)",
-        "text": "#E6EEF6",
-        "muted": "#9AA4B2",
-        "cyan": "#00F6FF",
-        "magenta": "#FF4DD2",
-        "green": "#00D17A",
-        "amber": "#FFB86B",
-        "shadow": "0 18px 40px rgba(0,0,0,0.6)"
-    }
-else:
-    # Pro Light Mode (Inverted High Contrast)
-    tm = {
-        "bg": "#F5F7FA",
-        "bg_grad_1": "rgba(0, 0, 0, 0.03)",
-        "glass_bg": "rgba(255, 255, 255, 0.9)",
-        "border": "rgba(0, 0, 0, 0.06)",
-        "text": "#111827",
-        "muted": "#6B7280",
-        "cyan": "#00A3A8", # Darker for white bg
-        "magenta": "#D128A8",
-        "green": "#008F53",
-        "amber": "#D97706",
-        "shadow": "0 4px 12px rgba(0,0,0,0.08)"
-    }
-
 # ---------------- STYLES ----------------
-st.markdown(f"""
-<style>
-/* IMPORTS: Sora (Headers), Montserrat (Numbers), Inter (Body) */
-@import url('https://fonts.googleapis.com/css2?family=Sora:wght@600;700&family=Montserrat+Alternates:wght@700;800&family=Inter:wght@400;500;600&display=swap');
-
-/* VARIABLES */
-:root {{
-    --bg: {tm["bg"]};
-    --glass: {tm["glass_bg"]};
-    --border: {tm["border"]};
-    --fg: {tm["text"]};
-    --muted: {tm["muted"]};
-    --cyan: {tm["cyan"]};
-    --magenta: {tm["magenta"]};
-    --green: {tm["green"]};
-    --amber: {tm["amber"]};
-}}
-
-/* BASE SETTINGS */
-body {{
-    background-color: var(--bg);
-    color: var(--fg);
-    font-family: 'Inter', sans-serif;
-}}
-
-[data-testid="stAppViewContainer"] {{
-    background-color: var(--bg);
-    background-image: 
-        radial-gradient(circle at 10% 20%, rgba(0, 246, 255, 0.03) 0%, transparent 20%),
-        radial-gradient(circle at 90% 80%, rgba(255, 77, 210, 0.03) 0%, transparent 20%);
-}}
-
-[data-testid="stHeader"] {{
-    background: transparent;
-}}
-
-/* GLOWING TEXT UTILITY (Softened) */
-.neon-text {{
-    color: var(--fg);
-    text-shadow: 
-        0 0 10px rgba(0, 246, 255, 0.5),
-        0 0 20px rgba(0, 246, 255, 0.3);
-}}
-
-.neon-text-magenta {{
-    color: #fff;
-    text-shadow: 
-        0 0 10px rgba(255, 255, 255, 0.6),
-        0 0 20px rgba(255, 77, 210, 0.4),
-        0 0 40px rgba(255, 77, 210, 0.2);
-}}
-
-/* GLOBAL HEADER GLOW (Tasteful) */
-h1, h2, h3, h4 {{
-    font-family: 'Sora', sans-serif;
-    letter-spacing: -0.5px;
-    color: var(--fg) !important;
-    text-shadow: 0 4px 12px rgba(0, 0, 0, 0.5); /* Deep shadow for contrast */
-}}
-
-/* HOVER GLOW FOR HEADERS */
-h1:hover, h2:hover {{
-    text-shadow: 0 0 15px rgba(255, 255, 255, 0.15);
-    transition: text-shadow 0.3s ease;
-}}
-
-/* LOGIN CARD */
-.login-card {{
-    background: var(--glass);
-    border: 1px solid var(--border);
-    backdrop-filter: blur(14px);
-    padding: 40px;
-    border-radius: 20px;
-    box-shadow: {tm["shadow"]};
-    width: 100%;
-    max-width: 400px;
-    margin: auto;
-    animation: slideUp 0.6s cubic-bezier(.22,.98,.36,1) forwards;
-}}
-
-/* ANIMATIONS */
-@keyframes slideUp {{
-    from {{ opacity: 0; transform: translateY(10px); }}
-    to {{ opacity: 1; transform: translateY(0); }}
-}}
-@keyframes pulse {{
-    0% {{ box-shadow: 0 0 0 0 rgba(0, 246, 255, 0.4); }}
-    70% {{ box-shadow: 0 0 0 10px rgba(0, 246, 255, 0); }}
-    100% {{ box-shadow: 0 0 0 0 rgba(0, 246, 255, 0); }}
-}}
-@keyframes neonBreathe {{
-    0% {{ box-shadow: 0 0 20px rgba(0, 209, 122, 0.15); border-color: rgba(0, 209, 122, 0.2); }}
-    50% {{ box-shadow: 0 0 40px rgba(0, 209, 122, 0.35); border-color: rgba(0, 209, 122, 0.5); }}
-    100% {{ box-shadow: 0 0 20px rgba(0, 209, 122, 0.15); border-color: rgba(0, 209, 122, 0.2); }}
-}}
-
-/* PARTICLE GRID BACKGROUND (Subtle) */
-[data-testid="stAppViewContainer"]::before {{
-    content: '';
-    position: fixed;
-    top: 0;
-    left: 0;
-    width: 100%;
-    height: 100%;
-    pointer-events: none;
-    background-image: 
-        radial-gradient(circle, rgba(255,255,255,0.015) 1px, transparent 1px);
-    background-size: 40px 40px;
-    z-index: 0;
-    opacity: 0.5;
-}}
-
-/* GLASS CARD CLASS */
-.glass-card {{
-    background: linear-gradient(180deg, rgba(255,255,255,0.03), rgba(255,255,255,0.01));
-    backdrop-filter: blur(14px) saturate(120%);
-    border: 1px solid var(--border);
-    border-radius: 16px;
-    color: var(--fg);
-    transition: transform 0.38s cubic-bezier(.22,.98,.36,1), box-shadow 0.38s;
-    animation: slideUp 0.4s ease-out;
-}}
-.glass-card:hover {{
-    transform: translateY(-6px);
-    box-shadow: 0 18px 40px rgba(0,0,0,0.6);
-    border-top-color: var(--cyan);
-}}
-
-/* SIGNAL CARD (Neon Breathing) */
-.signal-card {{
-    background: var(--glass);
-    border: 2px solid rgba(0, 209, 122, 0.3);
-    border-radius: 18px;
-    padding: 28px;
-    text-align: center;
-    box-shadow: 0 6px 30px rgba(0,0,0,0.2);
-    margin-bottom: 20px;
-}}
-.signal-card.breathing {{
-    animation: neonBreathe 2s infinite ease-in-out;
-}}
-
-/* KPI CONTAINER */
-.kpi-container {{
-    font-family: 'Montserrat Alternates', sans-serif;
-    font-weight: 800;
-    color: var(--fg);
-    animation: slideUp 0.5s ease-out;
-}}
-.kpi-value {{
-    font-size: 3.5rem;
-    line-height: 1;
-    text-shadow: 0 0 20px rgba(0, 246, 255, 0.15);
-}}
-.kpi-label {{
-    font-family: 'Inter', sans-serif;
-    font-weight: 500;
-    color: var(--muted);
-    font-size: 0.85rem;
-    text-transform: uppercase;
-    letter-spacing: 1.5px;
-}}
-
-/* PROGRESS BAR (Momentum) */
-.progress-bar-container {{
-    background: rgba(255,255,255,0.05);
-    border-radius: 8px;
-    height: 10px;
-    overflow: hidden;
-}}
-.progress-bar-fill {{
-    height: 100%;
-    background: linear-gradient(90deg, var(--cyan), var(--green));
-    border-radius: 8px;
-    transition: width 0.8s cubic-bezier(.22,.98,.36,1);
-}}
-
-/* TAG CHIPS */
-.tag-chip {{
-    background: rgba(255,255,255,0.05);
-    border: 1px solid var(--border);
-    padding: 5px 14px;
-    border-radius: 6px;
-    font-size: 0.7rem;
-    font-family: 'Sora', sans-serif;
-    color: var(--muted);
-    display: inline-block;
-    margin: 4px;
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-}}
-
-/* EXPANDER GLASS STYLE */
-div[data-testid="stExpander"] {{
-    background: var(--glass);
-    backdrop-filter: blur(14px);
-    border: 1px solid var(--border);
-    border-radius: 16px;
-    box-shadow: {tm["shadow"]};
-    transition: transform 0.38s cubic-bezier(.22,.98,.36,1);
-    animation: slideUp 0.4s ease-out;
-}}
-div[data-testid="stExpander"]:hover {{
-    transform: translateY(-4px);
-    border-top: 1px solid var(--cyan);
-}}
-
-/* BUTTONS */
-div[data-testid="stButton"] > button {{
-    background: linear-gradient(135deg, var(--cyan) 0%, #00C2FF 100%);
-    color: #000;
-    font-weight: 700;
-    font-family: 'Sora', sans-serif;
-    border: none;
-    border-radius: 999px;
-    padding: 0.6rem 1.5rem;
-    transition: all 0.3s ease;
-    box-shadow: 0 4px 15px rgba(0, 246, 255, 0.3);
-}}
-div[data-testid="stButton"] > button:hover {{
-    transform: scale(1.05);
-    box-shadow: 0 6px 25px rgba(0, 246, 255, 0.5);
-}}
-
-/* REDUCED MOTION SUPPORT */
-@media (prefers-reduced-motion: reduce) {{
-    *, *::before, *::after {{
-        animation-duration: 0.01ms !important;
-        animation-iteration-count: 1 !important;
-        transition-duration: 0.01ms !important;
-    }}
-}}
-
-</style>
-""", unsafe_allow_html=True)
+# Built once per theme per process; reruns only re-send the cached string
+st.markdown(theme.get_stylesheet(is_dark_mode), unsafe_allow_html=True)
 
 # ---------------- DATA LOADING ----------------
-# UPDATED: Sending POST request to match n8n configuration
-N8N_WEBHOOK_URL = "https://arjunbhosale.app.n8n.cloud/webhook/NARRATIVEDETECTINGAGENTWORKFLOW"
+# Webhooks, tickers and offline files per metal (n8n URLs are sent a POST)
+from assets import ASSETS, DEFAULT_ASSET, futures_tickers, get_asset
+
+# Data source modes (sidebar selector)
+SOURCE_LIVE = "Live n8n"
+SOURCE_LOCAL = "Local engine"
+SOURCE_OFFLINE = "Offline file"
 
 # PATH RESOLUTION FOR ASSETS
-import os
-import base64
+import math
+import backtest
+import cache_backend
+import charts
+import data_loader
+import narrative_engine
+import price_store
+from price_store import period_start
+from downsample import downsample_frame
+from indicators import EMA_FAST, EMA_SLOW, IndicatorEngine
+from macro_index import MacroIndex
+from narrative_index import SORT_KEYS, NarrativeIndex
+from narrative_clusters import NarrativeClusterer, fingerprint
+from burst_detector import BurstDetector, FeedIngestor
+from momentum_history import HALF_LIFE_SECONDS, MomentumHistory
+from payload_model import BULLISH, BEARISH, NEUTRAL, format_supporting_data, parse_payload
+from refresher import BackgroundRefresher, comex_is_open
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 logo_path = os.path.join(BASE_DIR, "logo.png")
 
-def get_base64_of_bin_file(bin_file):
-    with open(bin_file, 'rb') as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
+logo_uri = theme.get_logo_data_uri(logo_path)
+logo_html = f'<img src="{logo_uri}" width="120" style="margin-bottom: 20px;">' if logo_uri else "" # Fallback
 
-try:
-    img_base64 = get_base64_of_bin_file(logo_path)
-    logo_html = f'<img src="data:image/png;base64,{img_base64}" width="120" style="margin-bottom: 20px;">'
-except:
-    logo_html = "" # Fallback
+@st.cache_resource
+def get_price_store():
+    """One on-disk bar store per process, shared by every session"""
+    return price_store.PriceStore()
 
-@st.cache_data(ttl=600)  # Cache for 10 minutes
-def fetch_live_data_cached():
-    """Fetching data without any UI elements to avoid CacheReplayClosureError"""
-    try:
-        response = requests.post(N8N_WEBHOOK_URL)
-        response.raise_for_status()
-        return response.json(), None  # Return (data, error_message)
-    except Exception as e:
-        error_text = str(e)
-        if hasattr(e, 'response') and e.response is not None:
-             error_text = f"Server Error ({e.response.status_code}): {e.response.text}"
-        return None, error_text
-
-def get_market_data():
-    # 1. Try fetching live data with UI feedback
-    with st.spinner("🧠 Connecting to n8n logic core..."):
-        data, error = fetch_live_data_cached()
+@st.cache_resource
+def get_shared_cache():
+    """Cache shared by every replica (AGF_CACHE_URL: sqlite:/// or redis://)"""
+    return cache_backend.from_url()
+
+def shared_fetch(key, fetch, interval, market_interval, codec=cache_backend.JsonCodec):
+    """Wraps a fetch so all replicas together make one upstream call per refresh interval"""
+    def run():
+        ttl = market_interval if comex_is_open() else interval
+        return get_shared_cache().get_or_fetch(key, fetch, ttl, codec)
+    return run
+
+def signal_source(source, asset):
+    """Signal-history source label; silver keeps the plain live/local labels"""
+    return source if asset.key == DEFAULT_ASSET else f"{source}:{asset.key}"
+
+def fetch_webhook_raw(url):
+    data, error = data_loader.fetch_webhook_payload(url)
+    if error:
+        raise RuntimeError(error)
+    return data
+
+@st.cache_resource
+def get_clusterer():
+    """Persistent narrative clusters, shared by all sessions"""
+    return NarrativeClusterer()
+
+@st.cache_resource(max_entries=8)
+def get_cluster_ids(digest, _narratives):
+    """fingerprint -> cluster ID for one snapshot; assigned once per digest"""
+    clusterer = get_clusterer()
+    with metrics.timer("clusters.assign"):
+        ids = clusterer.assign_snapshot(_narratives, digest)
+    clusterer.save()
+    return {fingerprint(n): cid for n, cid in zip(_narratives, ids)}
+
+@st.cache_resource
+def get_momentum_history():
+    """Bounded per-narrative momentum tracks, shared by all sessions"""
+    return MomentumHistory()
+
+def record_momentum(asset, source, payload):
+    """One momentum point per narrative of a fetched snapshot; repeats of the same digest are ignored"""
+    narratives = payload.dominant_narratives
+    cluster_ids = get_cluster_ids(payload.digest, narratives)
+    keys = [(asset.key, source, cluster_ids.get(fingerprint(n))) for n in narratives]
+    get_momentum_history().observe_snapshot(keys, narratives, payload.digest)
+
+def fetch_live_payload(asset):
+    """Runs on the refresher thread: raises so the last good payload is kept"""
+    url = asset.webhook_url
+    raw = shared_fetch(f"payload:{url}", lambda: fetch_webhook_raw(url), interval=600, market_interval=300)()
+    payload = parse_payload(raw)  # Parsed once per snapshot, reused by every rerun
+    backtest.record_signal(payload, source=signal_source("live", asset))
+    record_momentum(asset, SOURCE_LIVE, payload)
+    return payload
+
+@st.cache_resource
+def get_indicator_engine():
+    return IndicatorEngine(get_price_store(), interval="1d")
+
+def indicator_snapshots():
+    """{asset key: local regime} from the indicator engine, without downloading"""
+    engine = get_indicator_engine()
+    return {a.key: engine.snapshot(a.futures) for a in ASSETS.values()}
+
+def fetch_indicators():
+    """Delta-updates daily futures bars for every asset in one batch, then extends the indicator frames"""
+    get_price_store().update(futures_tickers(), "1d")
+    return indicator_snapshots()
+
+# Market pulse redraw cadence; it only re-reads refresher snapshots
+PULSE_REFRESH_SECONDS = 5
+INTRADAY_POINTS = 400
+
+@st.cache_resource
+def get_refresher():
+    """Process-wide background refresher keeping the payload and market data warm"""
+    store = get_price_store()
+    # Every job can run at once, so a refresh takes as long as the slowest source
+    refresher = BackgroundRefresher(max_workers=len(ASSETS) + 3)
+    for asset in ASSETS.values():
+        if asset.webhook_url:
+            refresher.register(
+                f"payload:{asset.key}", metrics.timed("fetch.payload", lambda a=asset: fetch_live_payload(a)),
+                interval=600, market_interval=300,
+            )
+    # Seeded from disk so the very first render has prices to show
+    refresher.register(
+        "market", metrics.timed("fetch.market", shared_fetch(
+            f"market:1d:1mo:{','.join(data_loader.PULSE_TICKERS)}", lambda: data_loader.fetch_market_frame(store),
+            interval=900, market_interval=60, codec=cache_backend.FrameCodec,
+        )),
+        interval=900, market_interval=60,
+        seed=lambda: store.read_closes(data_loader.PULSE_TICKERS, "1d", start=period_start("1mo"))
+    )
+    # 1-minute session lines of every asset's futures for the market pulse fragment
+    refresher.register(
+        "intraday", metrics.timed("fetch.intraday", shared_fetch(
+            f"intraday:1m:1d:{','.join(futures_tickers())}", lambda: data_loader.fetch_session_frame(store, max_points=INTRADAY_POINTS),
+            interval=900, market_interval=30, codec=cache_backend.FrameCodec,
+        )),
+        interval=900, market_interval=30,
+        seed=lambda: data_loader.fetch_session_frame(store, max_points=INTRADAY_POINTS, refresh=False)
+    )
+    # Local trend/volatility regime per asset from daily futures bars, extended incrementally
+    refresher.register(
+        "indicators", metrics.timed("fetch.indicators", shared_fetch(
+            f"indicators:1d:{','.join(futures_tickers())}", fetch_indicators, interval=900, market_interval=300,
+        )),
+        interval=900, market_interval=300,
+        seed=indicator_snapshots
+    )
+    # Delta updates for the chart ranges and backtest bars renders have asked for
+    refresher.register(
+        "prices", metrics.timed("fetch.prices", get_price_watchlist().refresh),
+        interval=600, market_interval=120,
+    )
+    return refresher.start()
+
+@st.cache_resource
+def get_price_watchlist():
+    return data_loader.PriceWatchlist(get_price_store())
+
+def watch_prices(ticker, interval):
+    """Registers a key for background updates; returns the prices job's fetch time for cache keys"""
+    refresher = get_refresher()
+    if get_price_watchlist().watch(ticker, interval):
+        refresher.refresh_now("prices")
+    return refresher.get("prices").fetched_at
+
+def fetch_live_data_cached(asset):
+    """Last good n8n payload from the refresher; never waits on the network"""
+    snap = get_refresher().get(f"payload:{asset.key}")
+    if snap.fetched_at is None:
+        metrics.incr("cache.payload.miss")
+        return None, snap.error  # Still warming up (or never succeeded)
+    metrics.incr("cache.payload.hit")
+    return snap.value, None  # Return (data, error_message)
+
+def fetch_market_frame():
+    """Every asset's futures, FX pair and ETF watchlist (1 month, daily) from the refresher"""
+    snap = get_refresher().get("market")
+    metrics.incr("cache.market.miss" if snap.fetched_at is None else "cache.market.hit")
+    return snap.value
+
+def fetch_price_history(asset):
+    # Futures closes, sliced from the shared market frame
+    return data_loader.price_history_from_frame(fetch_market_frame(), asset.futures)
+
+@st.cache_resource(ttl=600, max_entries=32)
+def _read_price_range(range_key, ticker, updated_at):
+    with metrics.timer("fetch.price_range"):
+        return data_loader.fetch_price_range(get_price_store(), range_key, ticker, refresh=False)
+
+def fetch_price_range(range_key, ticker):
+    """Closes for a chart range from disk, decimated server-side to a fixed point budget;
+    the prices job fetches new bars in the background"""
+    updated_at = watch_prices(ticker, data_loader.PRICE_RANGES[range_key][0])
+    return _read_price_range(range_key, ticker, updated_at)
+
+def format_age(seconds):
+    if seconds is None:
+        return "warming up"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    return f"{seconds // 60:.0f}m {seconds % 60:.0f}s"
+
+@st.cache_resource
+def get_macro_index():
+    """Macro pressure gauges from the AGF_MACRO_DIR series, updated as rows are appended"""
+    return MacroIndex()
+
+@st.cache_resource
+def get_feed_ingestor():
+    """Burst detector over the local news/social feed, fed incrementally as it grows"""
+    return FeedIngestor(BurstDetector())
+
+def fetch_feed_candidates(metal):
+    """Emerging-narrative candidates after reading any newly appended feed lines"""
+    feed = get_feed_ingestor()
+    with metrics.timer("fetch.feed"):
+        metrics.incr("feed.docs", feed.poll())
+        return feed.detector.candidates(metal=metal)
+
+@st.cache_resource(ttl=300)  # Local compute is cheap, refresh every 5 minutes
+def build_local_payload(asset_key):
+    """Runs the in-process narrative engine on local price history + corpus"""
+    asset = get_asset(asset_key)
+    metrics.incr("cache.local_payload.miss")
+    with metrics.timer("fetch.local_engine"):
+        payload = parse_payload(narrative_engine.build_payload(
+            fetch_price_history(asset), macro=get_macro_index().compute(), emerging=fetch_feed_candidates(asset.name.lower()),
+            metal=asset.name.lower(),
+        ))
+    backtest.record_signal(payload, source=signal_source("local", asset))
+    record_momentum(asset, SOURCE_LOCAL, payload)
+    return payload
+
+@st.cache_resource
+def parse_offline_file(file_path, mtime, asset_key):
+    """Parsed once per file version (mtime is part of the cache key)"""
+    with open(file_path, "r") as f:
+        payload = parse_payload(json.load(f))
+    record_momentum(get_asset(asset_key), SOURCE_OFFLINE, payload)
+    return payload
+
+def load_offline_file(asset):
+    if not asset.offline_file:
+        return None
+    file_path = os.path.join(BASE_DIR, asset.offline_file)
+    if os.path.exists(file_path):
+        return parse_offline_file(file_path, os.path.getmtime(file_path), asset.key)
+    return None
+
+def get_local_payload(asset):
+    metrics.incr("cache.local_payload.lookup")
+    with st.spinner("🧠 Running local narrative engine..."):
+        return build_local_payload(asset.key)
+
+def get_market_data(source=SOURCE_LIVE, asset=ASSETS[DEFAULT_ASSET]):
+    """Returns (payload, error, source that produced the payload)"""
+    # 0. Local modes never touch the network for the payload
+    if source == SOURCE_LOCAL:
+        return get_local_payload(asset), None, SOURCE_LOCAL
+    if source == SOURCE_OFFLINE:
+        if asset.offline_file:
+            return load_offline_file(asset), None, SOURCE_OFFLINE
+        st.info(f"ℹ️ No offline snapshot for {asset.name}; showing the local narrative engine.")
+        return get_local_payload(asset), None, SOURCE_LOCAL
+    if not asset.webhook_url:
+        st.info(f"ℹ️ No n8n workflow is configured for {asset.name} (AGF_WEBHOOK_{asset.key.upper()}); showing the local narrative engine.")
+        return get_local_payload(asset), None, SOURCE_LOCAL
+
+    # 1. Take the latest live snapshot (kept warm in the background)
+    data, error = fetch_live_data_cached(asset)
     
     if data:
-        if isinstance(data, list) and len(data) > 0:
-            data = data[0]
         st.toast("✅ Live market data fetched successfully!", icon="📡")
-        return data, None
+        return data, None, SOURCE_LIVE
 
     # 2. Handle Errors
     if error:
         st.error(f"⚠️ Live Connection Failed: {error}")
         st.warning("🔄 Switching to offline/cached data mode...")
+    else:
+        error = "Live snapshot is still warming up"
+        st.info("⏳ Live n8n snapshot is warming up, showing offline data meanwhile.")
 
-    # 3. Fallback to local file
-    file_path = "n8n_data.json"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            if isinstance(data, list) and len(data) > 0:
-                return data[0], error # Return data + error status
-            return data, error
-    
-    return None, error
+    # 3. Fallback to local file (or the local engine if the asset has none)
+    offline = load_offline_file(asset)
+    if offline is not None:
+        return offline, error, SOURCE_OFFLINE
+    return get_local_payload(asset), error, SOURCE_LOCAL
 
 # ---------------- SESSION ----------------
 if "logged_in" not in st.session_state:
@@ -386,29 +355,54 @@ if not st.session_state.logged_in:
     st.stop()
 
 # ---------------- DATA LOADING (AFTER LOGIN) ----------------
-data, error = get_market_data()
+with st.sidebar:
+    asset_key = st.segmented_control(
+        "🪙 Asset", list(ASSETS), default=DEFAULT_ASSET, key="asset",
+        format_func=lambda k: ASSETS[k].name,
+    ) or DEFAULT_ASSET
+    asset = get_asset(asset_key)
+    data_source = st.radio(
+        "🔌 Data Source",
+        [SOURCE_LIVE, SOURCE_LOCAL, SOURCE_OFFLINE],
+        help="Local engine builds the payload in-process from price history and corpus.jsonl"
+    )
+    show_ops_panel = st.toggle("⏱️ Ops Panel", value=False)
+
+data, error, payload_source = get_market_data(data_source, asset)
+stopwatch.lap("section.setup_and_data")
 
 # ---------------- SIDEBAR ----------------
 with st.sidebar:
     st.image(logo_path, use_container_width=True)
     st.markdown("### 📊 Market Summary")
     if data:
-        ms = data.get("market_state", {})
+        ms = data.market_state
+        local = (get_refresher().get("indicators").value or {}).get(asset.key)
+        trend_check = volatility_check = ""
+        if local:
+            # Locally computed, reproducible regime next to the agent's claim
+            trend_mark = "✓" if local["trend"] == ms.silver_trend else "⚠"
+            vol_mark = "✓" if local["volatility_level"] == ms.volatility_level else "⚠"
+            vol_text = f" · {local['realized_vol']*100:.0f}% ann." if local["realized_vol"] is not None else ""
+            trend_check = f"<div style='font-size:0.75rem; color:var(--muted);'>{trend_mark} Local: {local['trend'].title()} · EMA{EMA_FAST} {'&gt;' if local['ema_fast'] > local['ema_slow'] else '&lt;'} EMA{EMA_SLOW}</div>"
+            volatility_check = f"<div style='font-size:0.75rem; color:var(--muted);'>{vol_mark} Local: {local['volatility_level'].title()}{vol_text}</div>"
         
         # Vertical Tag Stack for Sidebar
         st.markdown(f"""
         <div style='background:rgba(255,255,255,0.03); padding:15px; border-radius:12px; border:1px solid var(--border);'>
             <div style='margin-bottom:12px;'>
                 <span style='font-size:0.8rem; color:var(--muted); text-transform:uppercase;'>Macro Regime</span>
-                <div style='font-size:1.2rem; font-weight:700; color:var(--cyan);'>{ms.get('macro_regime', 'N/A')}</div>
+                <div style='font-size:1.2rem; font-weight:700; color:var(--cyan);'>{ms.macro_regime}</div>
             </div>
             <div style='margin-bottom:12px;'>
                 <span style='font-size:0.8rem; color:var(--muted); text-transform:uppercase;'>Trend</span>
-                <div style='font-size:1.2rem; font-weight:700; color:var(--purple);'>{ms.get('silver_trend', 'N/A').title()}</div>
+                <div style='font-size:1.2rem; font-weight:700; color:var(--purple);'>{ms.silver_trend.title()}</div>
+                {trend_check}
             </div>
              <div>
                 <span style='font-size:0.8rem; color:var(--muted); text-transform:uppercase;'>Volatility</span>
-                <div style='font-size:1.2rem; font-weight:700; color:var(--amber);'>{ms.get('volatility_level', 'N/A').title()}</div>
+                <div style='font-size:1.2rem; font-weight:700; color:var(--amber);'>{ms.volatility_level.title()}</div>
+                {volatility_check}
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -416,12 +410,20 @@ with st.sidebar:
     st.markdown("---")
     
     # Data Source Status
-    if error:
+    if error or data_source == SOURCE_OFFLINE:
          st.markdown(f"<div style='background:rgba(220,53,69,0.2); color:#ff6b6b; padding:8px; border-radius:8px; text-align:center; border:1px solid #ff6b6b;'>🔴 Offline Mode</div>", unsafe_allow_html=True)
+    elif data_source == SOURCE_LOCAL:
+         st.markdown(f"<div style='background:linear-gradient(90deg, rgba(0,246,255,0.2), transparent); color:var(--cyan); padding:8px 12px; border-radius:99px; border:1px solid var(--cyan); font-size:0.85rem; font-weight:600;'>🧠 Source: Local Narrative Engine</div>", unsafe_allow_html=True)
     else:
          st.markdown(f"<div style='background:linear-gradient(90deg, rgba(0,209,122,0.2), transparent); color:var(--green); padding:8px 12px; border-radius:99px; border:1px solid var(--green); font-size:0.85rem; font-weight:600;'>🟢 Source: Live n8n Workflow</div>", unsafe_allow_html=True)
 
-    st.caption("Powered by n8n Workflow Engine")
+    refresher = get_refresher()
+    payload_age = format_age(refresher.get(f"payload:{asset.key}").age) if asset.webhook_url else "local"
+    st.caption(
+        f"🕒 Payload age: {payload_age} • "
+        f"Market age: {format_age(refresher.get('market').age)}"
+    )
+    st.caption("Powered by the local narrative engine" if data_source == SOURCE_LOCAL else "Powered by n8n Workflow Engine")
 
 # ---------------- HEADER ----------------
 l, r = st.columns([8,1])
@@ -451,110 +453,183 @@ if not data:
     st.error("❌ No data received from n8n backend. Please check n8n_data.json.")
     st.stop()
 
-# ---------------- MAIN DASHBOARD ----------------
+stopwatch.lap("section.sidebar_header")
+
+# ---------------- OPS PANEL ----------------
+def finish_rerun():
+    """Records the rerun total, exports metrics and draws the Ops Panel"""
+    stopwatch.total("rerun.total")
+    metrics.REGISTRY.export_if_due()  # .metrics/metrics.json + metrics.prom
+
+    if not show_ops_panel:
+        return
+    with st.sidebar:
+        st.markdown("### ⏱️ Ops Panel")
+        ops = metrics.REGISTRY.summary()
+        st.dataframe(
+            [
+                {"Timer": name, "p50 (ms)": t["p50"] * 1000, "p95 (ms)": t["p95"] * 1000, "Count": t["count"]}
+                for name, t in ops["timers"].items()
+            ],
+            hide_index=True, use_container_width=True,
+            column_config={
+                "p50 (ms)": st.column_config.NumberColumn(format="%.1f"),
+                "p95 (ms)": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+        st.dataframe(
+            [{"Counter": k, "Value": v} for k, v in ops["counters"].items()],
+            hide_index=True, use_container_width=True,
+        )
+        st.caption(f"Exported to {metrics.METRICS_DIR}")
+
+# ---------------- BACKTEST TAB ----------------
+@st.cache_resource(ttl=300, max_entries=4)
+def run_signal_backtest(interval, source, history_mtime, ticker, updated_at):
+    """Backtests recorded signals against stored futures bars; keyed by history file mtime
+    and the prices job's last update"""
+    bars = get_price_store().read(ticker, interval)
+    signals = backtest.load_signal_history(source=source)
+    with metrics.timer("backtest.run"):
+        return backtest.run_backtest(signals, bars)
+
+def render_backtest_tab():
+    st.subheader("🧪 Signal Backtest")
+    st.caption(f"Recorded {asset.name.lower()} trading-signal snapshots replayed against {asset.futures}. Each signal is held until the next snapshot.")
+    bt_c1, bt_c2 = st.columns(2)
+    interval = bt_c1.selectbox("Bars", ["1h", "1d"], key="bt_interval")
+    source = bt_c2.selectbox("Signal source", ["live", "local"], key="bt_source",
+                             help="live: n8n webhook snapshots, local: in-process engine snapshots")
+
+    history_path = backtest.SIGNAL_HISTORY_PATH
+    mtime = os.path.getmtime(history_path) if os.path.exists(history_path) else 0
+    updated_at = watch_prices(asset.futures, interval)
+    result = run_signal_backtest(interval, signal_source(source, asset), mtime, asset.futures, updated_at)
+    summary = result["summary"]
+    if summary["directional_signals"] == 0:
+        st.info(f"No {source} buy/sell signals overlap the stored price history yet. Snapshots are recorded to {os.path.basename(history_path)} as payloads arrive.")
+        return
+
+    horizons = result["horizons"]
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Signals", f"{summary['signals']:,}", f"{summary['directional_signals']:,} buy/sell", delta_color="off")
+    hit_rate = horizons["hit_rate"].iloc[1]
+    k2.metric(f"Hit Rate ({horizons.index[1]})", "n/a" if math.isnan(hit_rate) else f"{hit_rate*100:.0f}%")
+    k3.metric("Strategy Return", f"{summary['total_return']*100:+.1f}%")
+    k4.metric("Max Drawdown", f"{summary['max_drawdown']*100:.1f}%")
+    k5.metric("Turnover / Day", f"{summary['turnover_per_day']:.2f}")
+
+    st.markdown("#### Forward Returns by Horizon")
+    st.dataframe(horizons.style.format({
+        "hit_rate": "{:.1%}", "mean_return": "{:+.3%}", "mean_signed_return": "{:+.3%}",
+    }, na_rep="–"), use_container_width=True)
+
+    st.markdown("#### Confidence Calibration")
+    calibration = result["calibration"].rename(index=str)
+    st.dataframe(calibration.style.format(
+        {c: "{:.1%}" for c in calibration.columns if c.startswith("hit_rate")} | {"mean_confidence": "{:.2f}"},
+        na_rep="–",
+    ), use_container_width=True)
+
+    st.markdown("#### Equity & Drawdown")
+    equity = result["equity"]
+    st.line_chart(downsample_frame(equity, "equity")[["equity"]], height=250)
+    st.area_chart(downsample_frame(equity, "drawdown", method="minmax")[["drawdown"]], height=180)
 
-import yfinance as yf
+# ---------------- MAIN DASHBOARD ----------------
+main_tab, backtest_tab = st.tabs(["📊 Dashboard", "🧪 Backtest"], key="main_view", on_change="rerun")
+if backtest_tab.open:
+    # Lazy: the dashboard sections below only run while their tab is open
+    with backtest_tab:
+        render_backtest_tab()
+    finish_rerun()
+    st.stop()
 
-@st.cache_data(ttl=300) # Cache for 5 minutes
 def fetch_market_pulse():
-    """Fetches live Silver price, INR rate, and ETF data"""
+    """Live futures price, INR rate, and ETF data for the selected asset from the shared market frame"""
     try:
-        # Batch fetch all tickers
-        tickers = yf.Tickers("SI=F INR=X SLV SIVR SIL")
-        
-        # Silver Futures
-        si = tickers.tickers["SI=F"].history(period="2d")
-        current_si = si["Close"].iloc[-1] if not si.empty else 0
-        prev_si = si["Close"].iloc[-2] if len(si) > 1 else current_si
-        si_change = ((current_si - prev_si) / prev_si) * 100
-        
-        # USD/INR
-        inr = tickers.tickers["INR=X"].history(period="1d")
-        current_inr = inr["Close"].iloc[-1] if not inr.empty else 83.0
-        
-        # ETFs
-        etf_data = []
-        for sym in ["SLV", "SIVR", "SIL"]:
-            hist = tickers.tickers[sym].history(period="2d")
-            if not hist.empty:
-                curr = hist["Close"].iloc[-1]
-                prev = hist["Close"].iloc[-2] if len(hist) > 1 else curr
-                chg = ((curr - prev) / prev) * 100
-                etf_data.append({"Ticker": sym, "Price": curr, "Change %": chg})
-                
-        return current_si, si_change, current_inr, etf_data
+        return data_loader.market_pulse_from_frame(fetch_market_frame(), asset)
     except Exception:
         return 0, 0, 0, []
 
-@st.cache_data(ttl=3600) # Cache price data for 1 hour
-def fetch_price_history():
-    try:
-        # Fetch Silver Futures (SI=F)
-        ticker = yf.Ticker("SI=F")
-        hist = ticker.history(period="1mo")
-        return hist
-    except Exception as e:
-        return None
-
 # 0. MARKET PULSE (HERO SECTION)
-current_ag, ag_change, current_inr, etfs = fetch_market_pulse()
+# Isolated fragment: re-runs on its own timer and redraws only these elements
+@st.fragment(run_every=PULSE_REFRESH_SECONDS)
+def render_market_pulse():
+    """Pulse tiles + session line; reads refresher snapshots only, never the network"""
+    with metrics.timer("fragment.market_pulse"):
+        _render_market_pulse()
 
-mp_c1, mp_c2, mp_c3 = st.columns([1.5, 1, 2])
+def _render_market_pulse():
+    current_ag, ag_change, current_inr, etfs = fetch_market_pulse()
 
-with mp_c1:
-    delta_color = "var(--green)" if ag_change >= 0 else "#ef4444"
-    arrow = "▲" if ag_change >= 0 else "▼"
-    
-    st.markdown(f"""
-    <div class='kpi-container'>
-        <div class='kpi-label'>Silver Futures (USD)</div>
-        <div class='kpi-value neon-text'>{current_ag:.2f}</div>
-        <div style='font-size: 1.2rem; color: {delta_color}; font-weight: 700; margin-top: 5px;'>
-            {arrow} {ag_change:.2f}%
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    mp_c1, mp_c2, mp_c3 = st.columns([1.5, 1, 2])
 
-with mp_c2:
-    st.markdown(f"""
-    <div class='kpi-container' style='opacity:0.8'>
-        <div class='kpi-label'>USD / INR</div>
-        <div class='kpi-value' style='font-size:2.5rem;'>₹{current_inr:.2f}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    with mp_c1:
+        delta_color = "var(--green)" if ag_change >= 0 else "#ef4444"
+        arrow = "▲" if ag_change >= 0 else "▼"
+        
+        st.markdown(f"""
+        <div class='kpi-container'>
+            <div class='kpi-label'>{asset.name} Futures (USD)</div>
+            <div class='kpi-value neon-text'>{current_ag:.2f}</div>
+            <div style='font-size: 1.2rem; color: {delta_color}; font-weight: 700; margin-top: 5px;'>
+                {arrow} {ag_change:.2f}%
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
 
-with mp_c3:
-    st.markdown("<div class='kpi-label' style='margin-bottom:10px;'>ETF WATCHLIST</div>", unsafe_allow_html=True)
-    if etfs:
-        cols = st.columns(len(etfs))
-        for idx, etf in enumerate(etfs):
-            c_color = "var(--green)" if etf['Change %'] >= 0 else "#ef4444"
-            with cols[idx]:
-                st.markdown(f"""
-                <div style='background:rgba(255,255,255,0.05); padding:10px; border-radius:12px; text-align:center; border:1px solid var(--border);'>
-                    <div style='font-weight:700; color:var(--fg); font-size:0.9rem;'>{etf['Ticker']}</div>
-                    <div style='font-size:1.1rem; color:{c_color}; font-weight:800;'>{etf['Change %']:+.1f}%</div>
-                </div>
-                """, unsafe_allow_html=True)
+    with mp_c2:
+        st.markdown(f"""
+        <div class='kpi-container' style='opacity:0.8'>
+            <div class='kpi-label'>USD / INR</div>
+            <div class='kpi-value' style='font-size:2.5rem;'>₹{current_inr:.2f}</div>
+        </div>
+        """, unsafe_allow_html=True)
 
+    with mp_c3:
+        st.markdown("<div class='kpi-label' style='margin-bottom:10px;'>ETF WATCHLIST</div>", unsafe_allow_html=True)
+        if etfs:
+            cols = st.columns(len(etfs))
+            for idx, etf in enumerate(etfs):
+                c_color = "var(--green)" if etf['Change %'] >= 0 else "#ef4444"
+                with cols[idx]:
+                    st.markdown(f"""
+                    <div style='background:rgba(255,255,255,0.05); padding:10px; border-radius:12px; text-align:center; border:1px solid var(--border);'>
+                        <div style='font-weight:700; color:var(--fg); font-size:0.9rem;'>{etf['Ticker']}</div>
+                        <div style='font-size:1.1rem; color:{c_color}; font-weight:800;'>{etf['Change %']:+.1f}%</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+    # Session line (1m bars, downsampled) plus snapshot age
+    session = data_loader.price_history_from_frame(get_refresher().get("intraday").value, asset.futures)
+    if session is not None:
+        st.plotly_chart(charts.intraday_line(session, is_dark_mode), use_container_width=True,
+                        config={"displayModeBar": False})
+    age = get_refresher().get("market").age
+    updated = "warming up" if age is None else f"updated {format_age(age)} ago"
+    st.caption(f"Market pulse {updated} · redraws every {PULSE_REFRESH_SECONDS}s")
+
+render_market_pulse()
+stopwatch.lap("section.market_pulse")
 st.markdown("---")
 
 # 1. MARKET STATE & SUMMARY
 st.subheader("📡 Market Summary & Signal")
-m_summary = data.get("market_summary", {})
-signal = data.get("trading_signal", {})
+m_summary = data.market_summary
+signal = data.trading_signal
 
 col1, col2 = st.columns([2, 1])
 
 with col1:
-    st.info(f"**Current Story:** {m_summary.get('current_market_story', 'N/A')}")
-    st.markdown(f"**Forward Outlook:** {m_summary.get('forward_outlook', 'N/A')}")
+    st.info(f"**Current Story:** {m_summary.current_market_story}")
+    st.markdown(f"**Forward Outlook:** {m_summary.forward_outlook}")
 
 with col2:
-    sig_label = signal.get("signal", "NEUTRAL").upper().replace("_", " ")
-    confidence = signal.get("confidence", 0.0)
-    sig_color = "var(--green)" if "buy" in sig_label.lower() else "#ef4444"
-    if "neutral" in sig_label.lower(): sig_color = "var(--muted)"
+    sig_label = signal.label
+    confidence = signal.confidence
+    sig_color = "var(--green)" if signal.side == "buy" else "#ef4444"
+    if signal.side == "neutral": sig_color = "var(--muted)"
     
     # Add breathing class if confidence > 75%
     breathing_class = "breathing" if confidence > 0.75 else ""
@@ -567,189 +642,241 @@ with col2:
     """, unsafe_allow_html=True)
     
     with st.expander("📝 See Reasoning", expanded=False):
-        for reason in signal.get("reasoning", []):
+        for reason in signal.reasoning:
             st.markdown(f"- {reason}")
-
-import plotly.express as px
-import plotly.graph_objects as go
-
-# ... (Previous code) ...
-
-# ---------------- CHARTS ----------------
-def create_macro_radar(macro_data):
-    """Creates a Radar Chart for Macro Pressure"""
-    categories = [k.replace("_", " ").title() for k in macro_data.keys()]
-    values = [v * 100 for v in macro_data.values()]
-    
-    fig = go.Figure(data=go.Scatterpolar(
-      r=values,
-      theta=categories,
-      fill='toself',
-      name='Macro Pressure'
-    ))
-    
-    fig.update_layout(
-      polar=dict(
-        radialaxis=dict(
-          visible=True,
-          range=[0, 100]
-        )),
-      showlegend=False,
-      margin=dict(l=40, r=40, t=40, b=40),
-      height=300
-    )
-    return fig
-
-def create_narrative_scatter(narratives):
-    """Creates a Scatter Plot for Narrative Confidence vs Momentum"""
-    df = pd.DataFrame(narratives)
-    if df.empty: return None
-    
-    fig = px.scatter(
-        df, 
-        x="confidence_score", 
-        y="momentum_score",
-        size=[10]*len(df), # Fixed bubble size or based on another metric
-        color="narrative_type",
-        hover_name="narrative_name", # Shows title on hover
-        hover_data=["key_drivers"],
-        title="Narrative Matrix: Confidence vs Momentum",
-        labels={"confidence_score": "Confidence", "momentum_score": "Momentum", "narrative_type": "Type"}
-    )
-    # Removed fixed textposition to keep chart clean
-    fig.update_layout(height=400, xaxis_range=[0, 1], yaxis_range=[0, 1])
-    return fig
+stopwatch.lap("section.signal")
 
 # ... (Inside Main Dashboard) ...
 
 # 2. MACRO PRESSURE INDEX (Replacing simple metrics with Radar + Metrics)
 st.markdown("### 📉 Macro Pressure Index")
-macro = data.get("macro_pressure_index", {})
+macro = data.macro_pressure_index
+# Reproducible gauges from local macro series; already the payload's own in local mode
+local_macro = get_macro_index().compute() if data_source != SOURCE_LOCAL else None
 
 mac_col1, mac_col2 = st.columns([1, 2])
 with mac_col1:
     # Key Metrics List
     for k, v in macro.items():
-        st.metric(k.replace("_", " ").title(), f"{v*100:.0f}%")
+        local_label = "Sample" if get_macro_index().is_sample else "Local"
+        local_text = f"{local_label}: {local_macro[k]*100:.0f}%" if local_macro and k in local_macro else None
+        st.metric(k.replace("_", " ").title(), f"{v*100:.0f}%", local_text, delta_color="off", delta_arrow="off")
 with mac_col2:
     # Radar Chart
-    st.plotly_chart(create_macro_radar(macro), use_container_width=True)
+    st.plotly_chart(charts.macro_radar(macro, is_dark_mode, local_macro), use_container_width=True)
+    if local_macro:
+        as_of = max(d for d in get_macro_index().as_of().values() if d)
+        sample = " SAMPLE DATA: made-up series from macro_sample/, not market data." if get_macro_index().is_sample else ""
+        st.caption(f"Dashed: computed locally from macro series (as of {as_of}).{sample}")
+    elif data_source == SOURCE_LOCAL and get_macro_index().is_sample:
+        st.caption("SAMPLE DATA: the local gauges come from made-up series in macro_sample/, not market data.")
+stopwatch.lap("section.macro_radar")
 
 st.markdown("---")
 
 # 3. DOMINANT NARRATIVES (TUG OF WAR)
 st.subheader("📊 Dominant Narratives: Bull vs Bear")
-narratives = data.get("dominant_narratives", [])
+narratives = data.dominant_narratives
+
+cluster_ids = get_cluster_ids(data.digest, narratives)
+
+def momentum_key(n):
+    return (asset.key, payload_source, cluster_ids.get(fingerprint(n)))
+
+# Tracks are recorded by the payload producers; the render only reads them
+momentum_history = get_momentum_history()
+
+def momentum_trails():
+    """name -> (confidence, momentum) path of every narrative seen more than once"""
+    trails = {}
+    for n in narratives:
+        series = momentum_history.series(momentum_key(n))
+        if series is not None and len(series["times"]) > 1:
+            trails[n.narrative_name] = (series["confidence"], series["momentum"])
+    return trails
 
 # Insert Scatter Chart before the list
 if narratives:
-    st.plotly_chart(create_narrative_scatter(narratives), use_container_width=True)
+    st.plotly_chart(charts.narrative_scatter(narratives, data.digest, is_dark_mode, momentum_trails()), use_container_width=True)
+stopwatch.lap("section.narrative_scatter")
+
+@st.cache_resource(max_entries=8)
+def get_narrative_index(digest, _narratives):
+    """Built once per snapshot (keyed by payload digest), shared by all sessions"""
+    return NarrativeIndex(_narratives)
+
+n_index = get_narrative_index(data.digest, narratives)
+
+# Filter & sort controls (pure index lookups, no rescans)
+with st.expander("🔎 Filter & Sort Narratives", expanded=False):
+    f1, f2, f3 = st.columns(3)
+    sel_types = f1.multiselect("Type", n_index.types(), format_func=str.title)
+    sel_horizons = f2.multiselect("Horizon", n_index.horizons(), format_func=str.title)
+    sel_drivers = f3.multiselect("Key Driver", n_index.drivers())
+    f4, f5, f6 = st.columns(3)
+    min_conf = f4.slider("Min Confidence", 0.0, 1.0, 0.0, 0.05)
+    min_mom = f5.slider("Min Momentum", 0.0, 1.0, 0.0, 0.05)
+    sort_by = f6.selectbox("Sort By", list(SORT_KEYS), format_func=str.title)
+    merge_duplicates = st.toggle("Merge near-duplicates", help="Show only the most confident narrative of each cluster")
+
+narrative_filters = dict(
+    types=sel_types, horizons=sel_horizons, drivers=sel_drivers,
+    min_confidence=min_conf, min_momentum=min_mom, sort_by=sort_by
+)
 
 # Split Narratives
-bullish_narratives = [n for n in narratives if "bull" in n.get("price_impact_direction", "").lower()]
-bearish_narratives = [n for n in narratives if "bear" in n.get("price_impact_direction", "").lower()]
-neutral_narratives = [n for n in narratives if "bull" not in n.get("price_impact_direction", "").lower() and "bear" not in n.get("price_impact_direction", "").lower()]
-
-def format_supporting_data(supp_data):
-    """Helper to convert raw JSON supporting data into readable markdown"""
-    if not supp_data: return "_No specific data points._"
-    
-    md = ""
-    for category, items in supp_data.items():
-        if items:
-             md += f"**{category.title()}:**\n"
-             for item in items:
-                 md += f"- {item}\n"
-    return md
-
-def render_narrative_card(n, color):
-    """Renders a single narrative card"""
+bullish_narratives = n_index.query(direction=BULLISH, **narrative_filters)
+bearish_narratives = n_index.query(direction=BEARISH, **narrative_filters)
+neutral_narratives = n_index.query(direction=NEUTRAL, **narrative_filters)
+
+def merge_clusters(items):
+    """Keeps the most confident narrative per cluster, in the current order"""
+    best = {}
+    for n in items:
+        cid = cluster_ids.get(fingerprint(n))
+        if cid not in best or n.confidence_score > best[cid].confidence_score:
+            best[cid] = n
+    keep = {id(n) for n in best.values()}
+    return [n for n in items if id(n) in keep]
+
+if merge_duplicates:
+    bullish_narratives = merge_clusters(bullish_narratives)
+    bearish_narratives = merge_clusters(bearish_narratives)
+    neutral_narratives = merge_clusters(neutral_narratives)
+
+NARRATIVE_PAGE_SIZE = 6
+EMERGING_PAGE_SIZE = 5
+
+def paginate(items, key, page_size):
+    """Returns (visible slice, offset) and draws a page selector when needed"""
+    n_pages = max(1, math.ceil(len(items) / page_size))
+    page = 1
+    if n_pages > 1:
+        # Clamp a remembered page that no longer exists after filtering
+        if st.session_state.get(key, 1) > n_pages:
+            st.session_state[key] = n_pages
+        page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key=key)
+    start = (page - 1) * page_size
+    if n_pages > 1:
+        st.caption(f"Showing {start + 1}–{min(start + page_size, len(items))} of {len(items)}")
+    return items[start:start + page_size], start
+
+def render_narrative_card(n, color, key):
+    """Renders a single narrative card; the body is only built while expanded"""
     # Determine class based on color
     card_class = "bull-card" if color == "#28a745" else "bear-card" if color == "#dc3545" else "neutral-card"
     
     st.markdown(f'<div class="{card_class}">', unsafe_allow_html=True)
-    with st.expander(f"{n.get('narrative_name')} ({n.get('narrative_type').upper()}) - Conf: {n.get('confidence_score')}"):
-        st.markdown(f"**Impact:** <span style='color:{color};font-weight:bold'>{n.get('price_impact_direction', '').title()}</span>", unsafe_allow_html=True)
-        st.markdown(f"**Horizon:** {n.get('expected_time_horizon', '').title()}")
-        st.progress(n.get('momentum_score', 0.0), text=f"Momentum: {n.get('momentum_score')}")
-        
-        st.write("**Key Drivers:**")
-        # Chips style for drivers (Black text on Grey)
-        drivers_html = "".join([f"<span class='custom-chip'>{d}</span>" for d in n.get("key_drivers", [])])
-        st.markdown(drivers_html, unsafe_allow_html=True)
-        
-        st.markdown("---")
-        st.markdown(f"_{n.get('reasoning_summary')}_")
-        st.caption("🔍 Supporting Evidence")
-        st.markdown(format_supporting_data(n.get("supporting_data", {})))
+    card = st.expander(f"{n.narrative_name} ({n.narrative_type.upper()}) - Conf: {n.confidence_score}", key=key, on_change="rerun")
+    if card.open:
+        with card:
+            st.markdown(f"**Impact:** <span style='color:{color};font-weight:bold'>{n.price_impact_direction.title()}</span>", unsafe_allow_html=True)
+            st.markdown(f"**Horizon:** {n.expected_time_horizon.title()}")
+            st.progress(n.momentum_score, text=f"Momentum: {n.momentum_score}")
+            series = momentum_history.series(momentum_key(n))
+            if series is not None and len(series["times"]) > 1:
+                decayed = series["decayed"]
+                st.metric(
+                    "Momentum (time-decayed)", f"{decayed[-1]:.2f}", f"{decayed[-1] - decayed[-2]:+.2f}",
+                    chart_data=series["momentum"].round(3).tolist(), chart_type="area",
+                    help=f"Last {len(decayed)} snapshots; older ones fade with a {HALF_LIFE_SECONDS // 3600}h half-life",
+                )
+            cluster = get_clusterer().cluster(cluster_ids.get(fingerprint(n)))
+            if cluster is not None:
+                aliases = f" · also seen as {', '.join(cluster.aliases)}" if cluster.aliases else ""
+                st.caption(f"🧬 Cluster {cluster.cid} · seen in {cluster.snapshots} snapshot(s){aliases}")
+
+            st.write("**Key Drivers:**")
+            # Chips style for drivers (Black text on Grey)
+            drivers_html = "".join([f"<span class='custom-chip'>{d}</span>" for d in n.key_drivers])
+            st.markdown(drivers_html, unsafe_allow_html=True)
+
+            st.markdown("---")
+            st.markdown(f"_{n.reasoning_summary}_")
+            st.caption("🔍 Supporting Evidence")
+            st.markdown(format_supporting_data(n.supporting_data))
     st.markdown('</div>', unsafe_allow_html=True)
 
+def render_narrative_feed(items, color, section):
+    """Renders only the visible page of cards for one direction"""
+    page_items, _ = paginate(items, f"{section}_page", NARRATIVE_PAGE_SIZE)
+    seen = {}
+    for n in page_items:
+        # Keyed by identity, not position, so an open card stays with its narrative when the list reorders
+        fp = fingerprint(n)
+        seen[fp] = seen.get(fp, 0) + 1
+        render_narrative_card(n, color, key=f"{section}_card_{fp}_{seen[fp]}")
+
 col_bull, col_bear = st.columns(2)
 
 with col_bull:
     st.markdown("### 🐂 Bullish Narratives")
     if bullish_narratives:
-        for n in bullish_narratives:
-            render_narrative_card(n, "#28a745") # Green
+        render_narrative_feed(bullish_narratives, "#28a745", "bull") # Green
     else:
         st.info("No significant bullish drivers detected.")
 
 with col_bear:
     st.markdown("### 🐻 Bearish Narratives")
     if bearish_narratives:
-        for n in bearish_narratives:
-            render_narrative_card(n, "#dc3545") # Red
+        render_narrative_feed(bearish_narratives, "#dc3545", "bear") # Red
     else:
         st.success("No significant bearish risks detected.")
         
 if neutral_narratives:
     st.markdown("### ⚖️ Neutral / Mixed Factors")
-    for n in neutral_narratives:
-        render_narrative_card(n, "#6c757d") # Grey
+    render_narrative_feed(neutral_narratives, "#6c757d", "neutral") # Grey
+stopwatch.lap("section.narrative_cards")
 
 # 4. EMERGING NARRATIVES
 st.subheader("🌱 Emerging Narratives")
-emerging = data.get("emerging_narratives", [])
+emerging = data.emerging_narratives
 
 if emerging:
-    for idx, e in enumerate(emerging):
+    page_emerging, offset = paginate(emerging, "emerging_page", EMERGING_PAGE_SIZE)
+    for idx, e in enumerate(page_emerging, start=offset):
         # Determine color-coded priority
-        priority = e.get("monitoring_priority", "medium").lower()
+        priority = e.monitoring_priority
         p_color = "red" if priority == "high" else "orange" if priority == "medium" else "green"
         
         with st.container():
-            st.markdown(f"#### {idx+1}. {e.get('theme')}")
+            st.markdown(f"#### {idx+1}. {e.theme}")
             c1, c2, c3 = st.columns([1,1,2])
-            c1.markdown(f"**Confidence:** {e.get('confidence_score')}")
-            c2.markdown(f"**Risk:** {e.get('risk_level').upper()}")
+            c1.markdown(f"**Confidence:** {e.confidence_score}")
+            c2.markdown(f"**Risk:** {e.risk_level.upper()}")
             c3.markdown(f"<span style='color:{p_color}; font-weight:bold'>Priority: {priority.upper()}</span>", unsafe_allow_html=True)
             
-            st.info(f"**Why it matters:** {e.get('why_it_matters')}")
+            st.info(f"**Why it matters:** {e.why_it_matters}")
             
-            with st.expander("Early Signals"):
-                for s in e.get("early_signals", []):
-                    st.markdown(f"- {s}")
+            signals = st.expander("Early Signals", key=f"emerging_signals_{idx}", on_change="rerun")
+            if signals.open:
+                signals.markdown("\n".join(f"- {s}" for s in e.early_signals))
         st.markdown("---")
 else:
     st.info("No emerging narratives detected currently.")
+stopwatch.lap("section.emerging")
 
 # 5. PRICE CHART (Moved to Footer)
 st.markdown("---")
-st.subheader("📈 Live Silver Price Action (1 Month)")
-price_hist = fetch_price_history()
+st.subheader(f"📈 Live {asset.name} Price Action")
+price_range = st.segmented_control(
+    "Range", list(data_loader.PRICE_RANGES), default="1M", key="price_range",
+    label_visibility="collapsed",
+) or "1M"
+price_hist, raw_bars = fetch_price_range(price_range, asset.futures)
 
 if price_hist is not None and not price_hist.empty:
-    # Create interactive line chart
-    fig_price = px.line(
-        price_hist, 
-        y="Close", 
-        title="Silver Futures (SI=F) - Daily Close",
-        labels={"Close": "Price (USD)", "Date": "Date"}
-    )
-    fig_price.update_layout(height=350, showlegend=False)
+    bar_size = data_loader.PRICE_RANGES[price_range][0]
+    # Memoized per price frame + theme; unrelated reruns reuse the figure
+    fig_price = charts.price_line(price_hist, f"{asset.name} Futures ({asset.futures}) - {price_range} ({bar_size} bars)", is_dark_mode)
     st.plotly_chart(fig_price, use_container_width=True)
-else:
+    if len(price_hist) < raw_bars:
+        st.caption(f"Showing {len(price_hist):,} of {raw_bars:,} bars (LTTB downsampled)")
+elif get_refresher().get("prices").error:
     st.warning("⚠️ Could not fetch live price data (yfinance connection failed).")
+else:
+    st.info(f"⏳ Downloading {price_range} price history in the background; it appears on the next refresh.")
+stopwatch.lap("section.price_chart")
 
 # ---------------- FOOTER ----------------
 st.markdown("---")
@@ -758,4 +885,6 @@ st.markdown("---")
 # st.caption("Geospatial data currently unavailable in this dataset.")
 
 
-st.caption("⚠ Narrative Intelligence • Powered by n8n • Not Financial Advice")
\ No newline at end of file
+st.caption("⚠ Narrative Intelligence • Powered by n8n • Not Financial Advice")
+
+finish_rerun()
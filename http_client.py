@@ -0,0 +1,185 @@
+"""Pooled HTTP client for the n8n webhook.
+
+One keep-alive session per webhook with connect/read timeouts, jittered
+exponential retry, a circuit breaker that fails fast while the webhook is
+down, and single-flight coalescing so concurrent identical requests share
+one upstream call.
+"""
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds; the n8n workflow itself can take several seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open"""
+
+
+# ---------------- CIRCUIT BREAKER ----------------
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds lets one trial call through (half-open)"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """True if a call may go upstream now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Frees the half-open trial slot if a call ended without recording an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+# ---------------- SINGLE FLIGHT ----------------
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+# ---------------- CLIENT ----------------
+class WebhookClient:
+    """POSTs JSON to one webhook URL over a pooled keep-alive session"""
+
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT, retries=2, backoff=0.5,
+                 breaker=None, pool_size=10):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._flight = SingleFlight()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post_json(self, payload=None):
+        """Returns the decoded JSON response; identical in-flight calls share one request"""
+        key = json.dumps(payload, sort_keys=True)
+        return self._flight.do(key, lambda: self._post_with_retry(payload))
+
+    def _post_with_retry(self, payload):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.url}, skipping upstream call")
+        try:
+            return self._post(payload)
+        finally:
+            # Whatever escaped, the half-open trial must not stay claimed forever
+            self.breaker.release()
+
+    def _post(self, payload):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                    raise requests.HTTPError(response=response)
+                response.raise_for_status()
+                data = response.json()
+            except requests.RequestException as e:
+                if isinstance(e, requests.HTTPError):
+                    retryable = e.response is not None and e.response.status_code in RETRY_STATUSES
+                else:
+                    retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                if not retryable or attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise
+                # Full jitter keeps many replicas from retrying in lockstep
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            except ValueError:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return data
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(url, **kwargs):
+    """Returns the process-wide client for a URL, creating it on first use"""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = WebhookClient(url, **kwargs)
+        return client
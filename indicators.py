@@ -0,0 +1,164 @@
+"""Technical regime indicators.
+
+EMAs and crossovers, realized and Parkinson volatility, ATR and a simple
+trend/volatility regime, computed from price-store bars with vectorized
+rolling operations. The engine is incremental: each update only processes
+bars after the last one it has seen. Recursive indicators (EMA, ATR) are
+seeded from the previous row; rolling ones reuse a short tail of history.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from payload_model import BEARISH, BULLISH, NEUTRAL
+
+EMA_FAST = 20
+EMA_SLOW = 50
+VOL_WINDOW = 20
+ATR_WINDOW = 14
+# Trailing rows used to rank current volatility as low/medium/high
+VOL_LOOKBACK = 252
+
+# Bars per year for annualizing volatility (COMEX trades ~23h a day)
+BARS_PER_YEAR = {
+    "1m": 252 * 23 * 60,
+    "5m": 252 * 23 * 12,
+    "15m": 252 * 23 * 4,
+    "30m": 252 * 23 * 2,
+    "1h": 252 * 23,
+    "1d": 252,
+    "1wk": 52,
+}
+
+OHLC = ["Open", "High", "Low", "Close"]
+
+
+def _ewm(values, alpha, seed=None):
+    """EMA (adjust=False) continuing from `seed`, the previous output value"""
+    if seed is None or np.isnan(seed):
+        return values.ewm(alpha=alpha, adjust=False).mean()
+    seeded = pd.concat([pd.Series([seed]), values.reset_index(drop=True)], ignore_index=True)
+    out = seeded.ewm(alpha=alpha, adjust=False).mean().iloc[1:]
+    out.index = values.index
+    return out
+
+
+def compute(bars, interval="1d", history=None):
+    """Indicator rows for `bars`, continuing from a previously computed `history`
+
+    `bars` needs Open/High/Low/Close. Only rows of `bars` are returned.
+    """
+    bars = bars[OHLC].dropna(subset=["Close"])
+    last = history.iloc[-1] if history is not None and len(history) else None
+    tail = history[OHLC].iloc[-(max(VOL_WINDOW, ATR_WINDOW) + 1):] if last is not None else None
+    ctx = pd.concat([tail, bars]) if tail is not None else bars
+    n = len(bars)
+
+    close, high, low = ctx["Close"], ctx["High"], ctx["Low"]
+    annualize = np.sqrt(BARS_PER_YEAR.get(interval, 252))
+
+    log_ret = np.log(close).diff()
+    realized = log_ret.rolling(VOL_WINDOW).std() * annualize
+    hl = np.log(high / low) ** 2
+    parkinson = np.sqrt(hl.rolling(VOL_WINDOW).mean() / (4 * np.log(2))) * annualize
+
+    prev_close = close.shift()
+    true_range = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+
+    out = bars.copy()
+    seed = (lambda col: None) if last is None else (lambda col: float(last[col]))
+    out["ema_fast"] = _ewm(bars["Close"], 2 / (EMA_FAST + 1), seed("ema_fast"))
+    out["ema_slow"] = _ewm(bars["Close"], 2 / (EMA_SLOW + 1), seed("ema_slow"))
+    out["atr"] = _ewm(true_range.iloc[-n:], 1 / ATR_WINDOW, seed("atr"))  # Wilder smoothing
+    out["atr_pct"] = out["atr"] / out["Close"]
+    out["realized_vol"] = realized.iloc[-n:]
+    out["parkinson_vol"] = parkinson.iloc[-n:]
+
+    # +1 while fast > slow, -1 below; a cross is any change of that sign
+    spread_sign = np.sign(out["ema_fast"] - out["ema_slow"])
+    prev_sign = spread_sign.shift(fill_value=np.sign(last["ema_fast"] - last["ema_slow"]) if last is not None else 0.0)
+    out["ema_sign"] = spread_sign
+    out["cross"] = np.where((spread_sign != prev_sign) & (prev_sign != 0), spread_sign, 0.0)
+    return out
+
+
+def classify(frame):
+    """Regime of the latest row as a plain dict (JSON-serializable)"""
+    if frame is None or frame.empty:
+        return None
+    row = frame.iloc[-1]
+    close, fast, slow = float(row["Close"]), float(row["ema_fast"]), float(row["ema_slow"])
+    if fast > slow and close > slow:
+        trend = BULLISH
+    elif fast < slow and close < slow:
+        trend = BEARISH
+    else:
+        trend = NEUTRAL
+
+    vols = frame["realized_vol"].dropna().iloc[-VOL_LOOKBACK:]
+    current_vol = float(row["realized_vol"]) if not np.isnan(row["realized_vol"]) else None
+    if current_vol is None or len(vols) < VOL_WINDOW:
+        vol_level, vol_pct = "medium", None
+    else:
+        vol_pct = float((vols < current_vol).mean())
+        vol_level = "low" if vol_pct < 1 / 3 else "high" if vol_pct > 2 / 3 else "medium"
+
+    crosses = frame.index[frame["cross"] != 0]
+    last_cross = None
+    if len(crosses):
+        ts = crosses[-1]
+        last_cross = {"at": ts.isoformat(), "direction": BULLISH if frame.at[ts, "cross"] > 0 else BEARISH}
+
+    def num(col):
+        value = float(row[col])
+        return None if np.isnan(value) else value
+
+    return {
+        "as_of": frame.index[-1].isoformat(),
+        "trend": trend,
+        "volatility_level": vol_level,
+        "vol_percentile": vol_pct,
+        "close": close,
+        "ema_fast": fast,
+        "ema_slow": slow,
+        "realized_vol": num("realized_vol"),
+        "parkinson_vol": num("parkinson_vol"),
+        "atr": num("atr"),
+        "atr_pct": num("atr_pct"),
+        "last_cross": last_cross,
+    }
+
+
+class IndicatorEngine:
+    """Keeps computed indicator frames per ticker and extends them as bars arrive"""
+
+    def __init__(self, store, interval="1d", max_rows=5000):
+        self.store = store
+        self.interval = interval
+        self.max_rows = max_rows
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def update(self, ticker):
+        """Processes bars newer than the last one seen and returns the frame
+
+        The newest stored bar may still be forming and get rewritten by the
+        next refresh, so it is always recomputed.
+        """
+        with self._lock:
+            frame = self._frames.get(ticker)
+            if frame is None or frame.empty:
+                frame = compute(self.store.read(ticker, self.interval), self.interval)
+            else:
+                new = self.store.read(ticker, self.interval, start=frame.index[-1])
+                if not new.empty:
+                    base = frame.iloc[:-1]
+                    frame = pd.concat([base, compute(new, self.interval, history=base)])
+            frame = frame.iloc[-self.max_rows:]
+            self._frames[ticker] = frame
+            return frame
+
+    def snapshot(self, ticker):
+        """update() + classify() in one call"""
+        return classify(self.update(ticker))
@@ -0,0 +1,222 @@
+"""Local macro pressure index.
+
+Computes the five macro_pressure_index gauges from local macro series
+(CSV or Parquet files with `date` and `value` columns in AGF_MACRO_DIR)
+instead of taking them as opaque numbers from n8n. Each series is turned
+into a rolling change (YoY CPI, rate deltas, DXY/INR moves, spread
+widening) and z-scored against its own trailing window; a pressure is the
+normal CDF of the signed mean of its inputs' z-scores, so 0.5 means
+"normal for the window".
+
+Without AGF_MACRO_DIR there are no local gauges. macro_sample/ holds
+made-up series for trying the feature out; gauges computed from it are
+flagged as sample data (MacroIndex.is_sample).
+
+Rolling statistics are kept per series and updated one observation at a
+time; re-reading a file only feeds rows newer than the last one seen.
+Files are treated as append-only.
+"""
+import math
+import os
+import threading
+from collections import deque
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Real series must be configured explicitly; without them there are no local gauges
+MACRO_DIR = os.environ.get("AGF_MACRO_DIR") or None
+# Made-up illustrative series, only used when AGF_MACRO_DIR points here
+SAMPLE_DIR = os.path.join(BASE_DIR, "macro_sample")
+
+Z_WINDOW = 36
+MIN_PERIODS = 12
+
+# series -> (transform, lag in observations)
+SERIES = {
+    "cpi": ("pct", 12),          # YoY inflation
+    "fed_funds": ("diff", 6),    # Policy rate change
+    "us10y": ("diff", 3),
+    "dxy": ("pct", 3),
+    "usd_inr": ("pct", 3),
+    "hy_spread": ("diff", 3),    # Credit spread widening
+    "term_spread": ("level", 0), # 10y-2y; inversion flags recession risk
+}
+
+# gauge -> [(series, sign)]
+PRESSURES = {
+    "cpi_pressure": [("cpi", 1)],
+    "interest_rate_pressure": [("fed_funds", 1), ("us10y", 1)],
+    "recession_risk": [("hy_spread", 1), ("term_spread", -1)],
+    "usd_strength_pressure": [("dxy", 1), ("usd_inr", 1)],
+}
+
+# Shared with the local narrative engine's coverage-based fallback
+STRESS_WEIGHTS = {
+    "cpi_pressure": 0.35,
+    "interest_rate_pressure": 0.25,
+    "recession_risk": 0.2,
+    "usd_strength_pressure": 0.2,
+}
+
+
+def overall_stress(pressures):
+    """Weighted mean of the gauges present, re-weighted over those"""
+    weights = {k: w for k, w in STRESS_WEIGHTS.items() if k in pressures}
+    if not weights:
+        return None
+    return round(sum(w * pressures[k] for k, w in weights.items()) / sum(weights.values()), 2)
+
+
+def _normal_cdf(z):
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+class RollingStats:
+    """Mean/std over the last `window` values with O(1) push"""
+
+    def __init__(self, window=Z_WINDOW):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+    def zscore(self, x, min_periods=MIN_PERIODS):
+        """z of x against the current window, or None while it is too short"""
+        n = len(self.values)
+        if n < min_periods:
+            return None
+        mean = self.total / n
+        var = max(self.total_sq / n - mean * mean, 0.0) * n / (n - 1)
+        return 0.0 if var <= 1e-18 else (x - mean) / math.sqrt(var)
+
+
+class SeriesState:
+    """Rolling change + z-score state of one macro series"""
+
+    __slots__ = ("name", "transform", "lag", "levels", "stats", "last_date", "last_value", "z")
+
+    def __init__(self, name, transform, lag, window=Z_WINDOW):
+        self.name = name
+        self.transform = transform
+        self.lag = lag
+        self.levels = deque(maxlen=lag + 1)
+        self.stats = RollingStats(window)
+        self.last_date = None
+        self.last_value = None
+        self.z = None
+
+    def observe(self, date, value):
+        """Feeds one observation; older or repeated dates are ignored"""
+        if self.last_date is not None and date <= self.last_date:
+            return False
+        self.last_date, self.last_value = date, value
+        self.levels.append(value)
+        if self.transform == "level":
+            change = value
+        elif len(self.levels) <= self.lag:
+            return True
+        elif self.transform == "pct":
+            change = value / self.levels[0] - 1.0
+        else:
+            change = value - self.levels[0]
+        # z against the trailing window, then add the new change to it
+        self.z = self.stats.zscore(change)
+        self.stats.push(change)
+        return True
+
+
+def _read_series(path):
+    """[(date, value)] sorted by date from a CSV or Parquet file"""
+    import pandas as pd
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df = df.dropna(subset=["value"])
+    dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    return sorted(zip(dates, df["value"].astype(float)))
+
+
+class MacroIndex:
+    """Incrementally maintained macro pressure gauges over a directory of series"""
+
+    def __init__(self, directory=MACRO_DIR, window=Z_WINDOW):
+        self.directory = directory
+        self.series = {name: SeriesState(name, t, lag, window) for name, (t, lag) in SERIES.items()}
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        """True if a directory of macro series was configured"""
+        return self.directory is not None
+
+    @property
+    def is_sample(self):
+        """True if the configured series are the bundled sample data"""
+        return self.configured and os.path.realpath(self.directory) == os.path.realpath(SAMPLE_DIR)
+
+    def _path(self, name):
+        if self.directory is None:
+            return None
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.directory, name + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def refresh(self, until=None):
+        """Feeds rows newer than the last seen date from files that changed;
+        returns the number of observations processed
+
+        With `until` (ISO date) only rows up to that date are fed, e.g. to
+        replay the gauges of a fresh index as of a past day; files are then
+        re-read in full on the next refresh.
+        """
+        fed = 0
+        with self._lock:
+            for name, state in self.series.items():
+                path = self._path(name)
+                if path is None:
+                    continue
+                mtime = os.path.getmtime(path)
+                if until is None:
+                    if self._mtimes.get(path) == mtime:
+                        continue
+                    self._mtimes[path] = mtime
+                for date, value in _read_series(path):
+                    if until is not None and date > until:
+                        break
+                    fed += state.observe(date, value)
+        return fed
+
+    def observe(self, name, date, value):
+        """Feeds a single new observation (ISO date string) for a series"""
+        with self._lock:
+            return self.series[name].observe(date, value)
+
+    def pressures(self):
+        """Gauges in [0, 1] for which some input has enough history, plus
+        overall_macro_stress over those; None if no gauge has any"""
+        out = {}
+        for gauge, inputs in PRESSURES.items():
+            zs = [sign * self.series[s].z for s, sign in inputs if self.series[s].z is not None]
+            if zs:
+                out[gauge] = round(_normal_cdf(sum(zs) / len(zs)), 2)
+        if not out:
+            return None
+        out["overall_macro_stress"] = overall_stress(out)
+        return out
+
+    def as_of(self):
+        """Latest observation date per series"""
+        return {name: s.last_date for name, s in self.series.items()}
+
+    def compute(self):
+        """refresh() + pressures()"""
+        self.refresh()
+        return self.pressures()
@@ -0,0 +1,172 @@
+"""Hot-path instrumentation.
+
+Process-wide timers and counters for data fetches, cache hits/misses and
+dashboard sections. Keeps a rolling window of recent samples per timer
+for p50/p95, and exports the same numbers as JSON and OpenMetrics text.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_DIR = os.environ.get("AGF_METRICS_DIR", os.path.join(BASE_DIR, ".metrics"))
+
+# Samples kept per timer for the rolling quantiles
+WINDOW = 200
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class Metrics:
+    """Rolling timers plus monotonic counters, safe to use from any thread"""
+
+    def __init__(self, window=WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: [0, 0.0])  # name -> [count, sum seconds]
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    # ---------------- RECORD ----------------
+    def observe(self, name, seconds):
+        with self._lock:
+            self._samples[name].append(seconds)
+            total = self._totals[name]
+            total[0] += 1
+            total[1] += seconds
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    @contextmanager
+    def timer(self, name):
+        """Times the enclosed block under `name`, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name, fn):
+        """Wraps a callable so every call is timed under `name`"""
+        def wrapper(*args, **kwargs):
+            with self.timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    # ---------------- READ ----------------
+    def summary(self):
+        """{"timers": {name: {count, sum, p50, p95, last}}, "counters": {...}}"""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+            totals = {k: tuple(v) for k, v in self._totals.items()}
+            counters = dict(self._counters)
+        timers = {}
+        for name, values in sorted(samples.items()):
+            ordered = sorted(values)
+            timers[name] = {
+                "count": totals[name][0],
+                "sum": totals[name][1],
+                "p50": _quantile(ordered, 0.50),
+                "p95": _quantile(ordered, 0.95),
+                "last": values[-1] if values else 0.0,
+            }
+        return {"timers": timers, "counters": dict(sorted(counters.items()))}
+
+    def to_json(self):
+        return json.dumps({"generated_at": time.time(), **self.summary()}, indent=2)
+
+    def to_openmetrics(self, prefix="agforecast"):
+        """Renders timers as summaries and counters as counters"""
+        summary = self.summary()
+        lines = []
+        if summary["timers"]:
+            lines.append(f"# TYPE {prefix}_duration_seconds summary")
+            for name, t in summary["timers"].items():
+                label = f'name="{_label(name)}"'
+                lines.append(f'{prefix}_duration_seconds{{{label},quantile="0.5"}} {t["p50"]:.6f}')
+                lines.append(f'{prefix}_duration_seconds{{{label},quantile="0.95"}} {t["p95"]:.6f}')
+                lines.append(f'{prefix}_duration_seconds_count{{{label}}} {t["count"]}')
+                lines.append(f'{prefix}_duration_seconds_sum{{{label}}} {t["sum"]:.6f}')
+        if summary["counters"]:
+            lines.append(f"# TYPE {prefix}_events counter")
+            for name, value in summary["counters"].items():
+                lines.append(f'{prefix}_events_total{{name="{_label(name)}"}} {value}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    # ---------------- EXPORT ----------------
+    def export(self, directory=METRICS_DIR):
+        """Writes metrics.json and metrics.prom atomically into `directory`"""
+        os.makedirs(directory, exist_ok=True)
+        for filename, body in (("metrics.json", self.to_json()), ("metrics.prom", self.to_openmetrics())):
+            path = os.path.join(directory, filename)
+            # One temp file per call: session threads of a process export concurrently
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    def export_if_due(self, interval=15, directory=METRICS_DIR):
+        """Exports at most once per `interval` seconds; cheap to call every rerun
+
+        Never raises on I/O errors: a full disk or unwritable directory must
+        not break the page that called it.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_export < interval:
+                return False
+            self._last_export = now
+        try:
+            self.export(directory)
+        except OSError:
+            return False
+        return True
+
+
+class Stopwatch:
+    """Records consecutive laps of a linear script under section names"""
+
+    def __init__(self, registry=None):
+        self._registry = registry or REGISTRY
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, name):
+        """Observes the time since the previous lap (or start) under `name`"""
+        now = time.perf_counter()
+        self._registry.observe(name, now - self._last)
+        self._last = now
+
+    def total(self, name):
+        """Observes the time since the stopwatch was created under `name`"""
+        self._registry.observe(name, time.perf_counter() - self._start)
+
+
+def _label(value):
+    return re.sub(r'["\\\n]', "_", value)
+
+
+# Process-wide registry used by the dashboard, refresher jobs and tools
+REGISTRY = Metrics()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+incr = REGISTRY.incr
@@ -0,0 +1,116 @@
+"""Narrative momentum history.
+
+Keeps, per narrative (keyed by source and cluster ID, see
+narrative_clusters.py), the confidence and momentum of every snapshot it
+appeared in, plus a time-decayed momentum:
+
+    decayed = w * decayed + (1 - w) * momentum,  w = 0.5 ** (dt / half_life)
+
+so irregularly spaced snapshots are weighted by how long ago they arrived,
+not by how many there were. Each track is a fixed-capacity ring of NumPy
+arrays and the number of tracks is capped (least recently updated ones are
+dropped), so memory stays bounded however long the service runs.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+HISTORY_POINTS = 128
+HALF_LIFE_SECONDS = 6 * 3600
+MAX_TRACKS = 512
+
+
+class Track:
+    """Ring buffer of one narrative's snapshots"""
+
+    __slots__ = ("times", "confidence", "momentum", "decayed", "start", "size", "last_digest")
+
+    def __init__(self, capacity=HISTORY_POINTS):
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.confidence = np.empty(capacity, dtype=np.float32)
+        self.momentum = np.empty(capacity, dtype=np.float32)
+        self.decayed = np.empty(capacity, dtype=np.float32)
+        self.start = 0
+        self.size = 0
+        self.last_digest = None
+
+    def __len__(self):
+        return self.size
+
+    def _last(self):
+        return (self.start + self.size - 1) % len(self.times)
+
+    def append(self, ts, confidence, momentum, half_life=HALF_LIFE_SECONDS):
+        capacity = len(self.times)
+        if self.size:
+            last = self._last()
+            w = 0.5 ** (max(ts - self.times[last], 0.0) / half_life)
+            decayed = w * self.decayed[last] + (1 - w) * momentum
+        else:
+            decayed = momentum
+        if self.size < capacity:
+            i = (self.start + self.size) % capacity
+            self.size += 1
+        else:
+            i = self.start  # Overwrite the oldest point
+            self.start = (self.start + 1) % capacity
+        self.times[i] = ts
+        self.confidence[i] = confidence
+        self.momentum[i] = momentum
+        self.decayed[i] = decayed
+
+    def series(self):
+        """Chronological copies of the buffered arrays"""
+        order = (self.start + np.arange(self.size)) % len(self.times)
+        return {
+            "times": self.times[order],
+            "confidence": self.confidence[order],
+            "momentum": self.momentum[order],
+            "decayed": self.decayed[order],
+        }
+
+
+class MomentumHistory:
+    """Bounded per-narrative momentum tracks, updated one snapshot at a time"""
+
+    def __init__(self, capacity=HISTORY_POINTS, half_life=HALF_LIFE_SECONDS, max_tracks=MAX_TRACKS):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.max_tracks = max_tracks
+        self._tracks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, key, confidence, momentum, digest=None, ts=None):
+        """Appends one point; a repeat of the track's last digest is ignored"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                track = self._tracks[key] = Track(self.capacity)
+                while len(self._tracks) > self.max_tracks:
+                    self._tracks.popitem(last=False)
+            elif digest is not None and track.last_digest == digest:
+                return False
+            self._tracks.move_to_end(key)
+            track.append(ts, confidence, momentum, self.half_life)
+            track.last_digest = digest
+            return True
+
+    def observe_snapshot(self, keys, narratives, digest=None, ts=None):
+        """observe() for each narrative of a snapshot; `keys` is parallel to `narratives`"""
+        ts = time.time() if ts is None else ts
+        return sum(
+            self.observe(key, n.confidence_score, n.momentum_score, digest, ts)
+            for key, n in zip(keys, narratives)
+        )
+
+    def series(self, key):
+        """Chronological arrays for a track, or None if it is unknown"""
+        with self._lock:
+            track = self._tracks.get(key)
+            return None if track is None or not track.size else track.series()
+
+    def __len__(self):
+        return len(self._tracks)
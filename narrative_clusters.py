@@ -0,0 +1,462 @@
+"""Narrative clustering across snapshots.
+
+Near-duplicate narratives ("Inflation Hedge" vs. a reworded variant with
+overlapping drivers) are grouped under a stable cluster ID that persists
+across snapshots and restarts. Each narrative becomes a sparse TF-IDF
+vector over its name, key drivers, supporting data and reasoning; it is
+compared only against clusters that share one of its most distinctive
+terms (inverted index over bounded cluster centroids), so assigning a new
+narrative never touches all pairs, however long the history.
+
+State lives in a keyed SQLite file shared by every replica on the host.
+A save writes only what changed since the last one: counters and
+centroids are merged into the stored rows as deltas rather than
+overwritten, cluster IDs are allocated in the database so replicas never
+hand out the same one, and rows other replicas wrote are pulled back in.
+Fingerprint assignments are aged out after ASSIGNMENT_MAX_AGE and capped
+at MAX_ASSIGNMENTS; an expired narrative is simply matched again.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CLUSTER_STATE_PATH = os.environ.get(
+    "AGF_CLUSTER_STATE", os.path.join(BASE_DIR, ".narrative_clusters.sqlite")
+)
+
+# Cosine similarity needed to join an existing cluster
+SIMILARITY_THRESHOLD = 0.45
+# Terms kept per centroid, terms of a new narrative used to find candidates,
+# and candidate clusters scored per assignment
+CENTROID_TERMS = 64
+QUERY_TERMS = 12
+MAX_CANDIDATES = 50
+MAX_ALIASES = 5
+
+# Fingerprint -> cluster assignments not seen for this long are dropped,
+# and at most this many of the most recent are kept
+ASSIGNMENT_MAX_AGE = 30 * 86400
+MAX_ASSIGNMENTS = 50_000
+
+# IDF weights are refreshed when the corpus has grown by this factor, so
+# cached centroid vectors stay valid between refreshes
+IDF_REFRESH_GROWTH = 1.05
+
+# Field weights: the name says most about what a narrative is
+FIELD_WEIGHTS = (("narrative_name", 3.0), ("key_drivers", 2.0), ("supporting_data", 1.0), ("reasoning_summary", 1.0))
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or that the this to was were
+    will with into over than more less pointing pressure silver narrative narratives
+""".split())
+
+
+def _field_text(narrative, field):
+    value = getattr(narrative, field)
+    if field == "key_drivers":
+        return " ".join(value)
+    if field == "supporting_data":
+        return " ".join(" ".join(v) for v in value.values())
+    return value
+
+
+def _stem(token):
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+def term_frequencies(narrative):
+    """Field-weighted, length-normalized term frequencies of a Narrative"""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        tokens = [_stem(t) for t in _TOKEN.findall(_field_text(narrative, field).lower()) if t not in _STOPWORDS]
+        if not tokens:
+            continue
+        share = weight / len(tokens)
+        for t in tokens:
+            tf[t] += share
+    return tf
+
+
+def fingerprint(narrative):
+    """Exact-duplicate key: normalized name plus sorted drivers"""
+    raw = narrative.narrative_name.strip().lower() + "|" + "|".join(sorted(d.lower() for d in narrative.key_drivers))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class Cluster:
+    __slots__ = (
+        "cid", "label", "aliases", "tf", "count", "snapshots", "first_seen", "last_seen", "last_digest",
+        "_vec", "_vec_epoch",
+    )
+
+    def __init__(self, cid, label, first_seen):
+        self.cid = cid
+        self.label = label
+        self.aliases = []
+        self.tf = {}
+        self.count = 0
+        self.snapshots = 0
+        self.first_seen = self.last_seen = first_seen
+        self.last_digest = None
+        self._vec = None  # Weighted centroid, valid for IDF epoch _vec_epoch
+        self._vec_epoch = -1
+
+    @classmethod
+    def from_dict(cls, cid, d):
+        c = cls(cid, d["label"], d["first_seen"])
+        for s in cls.__slots__[2:9]:
+            setattr(c, s, d[s])
+        return c
+
+
+def _trim_centroid(tf):
+    if len(tf) <= CENTROID_TERMS:
+        return dict(tf)
+    return dict(sorted(tf.items(), key=lambda kv: -kv[1])[:CENTROID_TERMS])
+
+
+class _ClusterDelta:
+    """What one replica changed in a cluster since its last save"""
+
+    __slots__ = ("tf", "count", "snapshots")
+
+    def __init__(self):
+        self.tf = Counter()
+        self.count = 0
+        self.snapshots = 0
+
+
+class NarrativeClusterer:
+    """Incremental TF-IDF clustering with persisted, stable cluster IDs"""
+
+    def __init__(self, path=CLUSTER_STATE_PATH, threshold=SIMILARITY_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.n_docs = 0
+        self.df = Counter()
+        self.clusters = {}
+        self.assignments = OrderedDict()  # fingerprint -> cluster ID, least recently seen first
+        self.postings = defaultdict(set)  # term -> IDs of clusters whose centroid has it
+        self.next_id = 1
+        self._seen = {}  # fingerprint -> last time it was assigned
+        self._idf_epoch = 0
+        self._idf_n = 0
+        self._idf_table = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reset_pending()
+        self._synced_seq = 0
+        if path:
+            self._open()
+
+    # ---------------- PERSISTENCE ----------------
+    def _reset_pending(self):
+        self._pending_docs = 0
+        self._pending_df = Counter()
+        self._pending_clusters = {}  # cid -> _ClusterDelta
+        self._pending_assignments = {}  # fingerprint -> (cid, last seen)
+
+    @property
+    def dirty(self):
+        return bool(self._pending_clusters or self._pending_assignments)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        conn.execute("CREATE TABLE IF NOT EXISTS df (term TEXT PRIMARY KEY, count INTEGER, seq INTEGER)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS clusters (cid TEXT PRIMARY KEY, label TEXT, aliases TEXT, tf TEXT,"
+            " count INTEGER, snapshots INTEGER, first_seen REAL, last_seen REAL, last_digest TEXT, seq INTEGER)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS assignments (fp TEXT PRIMARY KEY, cid TEXT, last_seen REAL, seq INTEGER)")
+        for table in ("df", "clusters", "assignments"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_seq ON {table} (seq)")
+        conn.execute("CREATE INDEX IF NOT EXISTS assignments_last_seen ON assignments (last_seen)")
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('seq', 0), ('n_docs', 0), ('next_id', 1)")
+        with self._lock:
+            self._pull(conn)
+        legacy = os.path.splitext(self.path)[0] + ".json"
+        if not self.clusters and os.path.exists(legacy):
+            self._import_json(legacy)
+
+    def _import_json(self, path):
+        """Loads a state file written before the SQLite store, unless another replica already did"""
+        with open(path) as f:
+            state = json.load(f)
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT count(*) FROM clusters").fetchone()[0] == 0:
+                    self._pending_docs = state["n_docs"]
+                    self._pending_df = Counter(state["df"])
+                    now = time.time()
+                    for cid, d in state["clusters"].items():
+                        delta = self._pending_clusters[cid] = _ClusterDelta()
+                        delta.tf, delta.count, delta.snapshots = Counter(d["tf"]), d["count"], d["snapshots"]
+                        self.clusters[cid] = Cluster.from_dict(cid, {**d, "tf": {}, "count": 0, "snapshots": 0})
+                    for fp, cid in state["assignments"].items():
+                        self._pending_assignments[fp] = (cid, now)
+                    conn.execute("UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (state["next_id"],))
+                    self._push(conn)
+                    self._reset_pending()
+                self._pull(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _meta(self, conn, key):
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _allocate_id(self):
+        """Next cluster ID, unique across every replica sharing the store"""
+        if not self.path:
+            cid, self.next_id = self.next_id, self.next_id + 1
+            return f"N{cid:05d}"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cid = self._meta(conn, "next_id")
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'next_id'", (cid + 1,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.next_id = cid + 1
+        return f"N{cid:05d}"
+
+    def _set_centroid(self, cluster, tf):
+        for t in cluster.tf.keys() - tf.keys():
+            self.postings[t].discard(cluster.cid)
+        for t in tf.keys() - cluster.tf.keys():
+            self.postings[t].add(cluster.cid)
+        cluster.tf = tf
+        cluster._vec_epoch = -1
+
+    def _touch(self, fp, cid, ts):
+        self.assignments[fp] = cid
+        self.assignments.move_to_end(fp)
+        self._seen[fp] = max(ts, self._seen.get(fp, ts))
+
+    def _pull(self, conn):
+        """Applies rows written (by any replica) since the last pull; caller holds the lock"""
+        since = self._synced_seq
+        self._synced_seq = self._meta(conn, "seq")
+        self.n_docs = self._meta(conn, "n_docs") + self._pending_docs
+        self.next_id = self._meta(conn, "next_id")
+        for term, count in conn.execute("SELECT term, count FROM df WHERE seq > ?", (since,)):
+            self.df[term] = count + self._pending_df.get(term, 0)
+        rows = conn.execute(
+            "SELECT cid, label, aliases, tf, count, snapshots, first_seen, last_seen, last_digest"
+            " FROM clusters WHERE seq > ?", (since,)
+        )
+        for cid, label, aliases, tf, count, snapshots, first_seen, last_seen, last_digest in rows:
+            cluster = self.clusters.get(cid)
+            if cluster is None:
+                cluster = self.clusters[cid] = Cluster(cid, label, first_seen)
+            delta = self._pending_clusters.get(cid)
+            tf = Counter(json.loads(tf))
+            if delta is not None:
+                tf.update(delta.tf)
+                count, snapshots = count + delta.count, snapshots + delta.snapshots
+            self._set_centroid(cluster, _trim_centroid(tf))
+            cluster.label, cluster.count, cluster.snapshots = label, count, snapshots
+            cluster.aliases = list(dict.fromkeys(json.loads(aliases) + cluster.aliases))[:MAX_ALIASES]
+            if last_seen >= cluster.last_seen:
+                cluster.last_seen, cluster.last_digest = last_seen, last_digest
+        for fp, cid, last_seen in conn.execute(
+            "SELECT fp, cid, last_seen FROM assignments WHERE seq > ? ORDER BY last_seen", (since,)
+        ):
+            if fp not in self._pending_assignments:
+                self._touch(fp, cid, last_seen)
+        self._prune(time.time())
+
+    def _prune(self, now):
+        """Drops the least recently seen assignments past the age or count limit"""
+        cutoff = now - ASSIGNMENT_MAX_AGE
+        while self.assignments:
+            fp = next(iter(self.assignments))
+            if len(self.assignments) <= MAX_ASSIGNMENTS and self._seen[fp] >= cutoff:
+                break
+            del self.assignments[fp]
+            del self._seen[fp]
+
+    def save(self):
+        """Merges this replica's changes into the store and pulls in other
+        replicas' changes; returns False if there was nothing to write"""
+        if not self.path:
+            return False
+        with self._lock:
+            wrote = self.dirty
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if wrote:
+                    self._push(conn)
+                    self._reset_pending()
+                self._pull(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wrote
+
+    def _push(self, conn):
+        """Writes pending deltas as one new sequence number; caller holds the lock"""
+        seq = self._meta(conn, "seq") + 1
+        now = time.time()
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'seq'", (seq,))
+        conn.execute("UPDATE meta SET value = value + ? WHERE key = 'n_docs'", (self._pending_docs,))
+        conn.executemany(
+            "INSERT INTO df VALUES (?, ?, ?) ON CONFLICT (term) DO UPDATE SET count = count + excluded.count,"
+            " seq = excluded.seq",
+            [(term, count, seq) for term, count in self._pending_df.items()],
+        )
+        for cid, delta in self._pending_clusters.items():
+            cluster = self.clusters[cid]
+            row = conn.execute(
+                "SELECT aliases, tf, count, snapshots, last_seen, last_digest FROM clusters WHERE cid = ?", (cid,)
+            ).fetchone()
+            tf, count, snapshots, aliases = Counter(delta.tf), delta.count, delta.snapshots, cluster.aliases
+            last_seen, last_digest = cluster.last_seen, cluster.last_digest
+            if row is not None:
+                tf.update(json.loads(row[1]))
+                count, snapshots = count + row[2], snapshots + row[3]
+                aliases = list(dict.fromkeys(json.loads(row[0]) + aliases))[:MAX_ALIASES]
+                if row[4] > last_seen:
+                    last_seen, last_digest = row[4], row[5]  # Another replica saw it later
+            conn.execute(
+                "INSERT OR REPLACE INTO clusters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cid, cluster.label, json.dumps(aliases), json.dumps(_trim_centroid(tf), separators=(",", ":")),
+                 count, snapshots, cluster.first_seen, last_seen, last_digest, seq),
+            )
+        # The first replica to assign a fingerprint keeps it; later ones only refresh last_seen
+        conn.executemany(
+            "INSERT INTO assignments VALUES (?, ?, ?, ?) ON CONFLICT (fp) DO UPDATE SET"
+            " last_seen = max(last_seen, excluded.last_seen), seq = excluded.seq",
+            [(fp, cid, seen, seq) for fp, (cid, seen) in self._pending_assignments.items()],
+        )
+        conn.execute("DELETE FROM assignments WHERE last_seen < ?", (now - ASSIGNMENT_MAX_AGE,))
+        conn.execute(
+            "DELETE FROM assignments WHERE fp IN (SELECT fp FROM assignments ORDER BY last_seen DESC"
+            " LIMIT -1 OFFSET ?)", (MAX_ASSIGNMENTS,)
+        )
+
+    # ---------------- VECTORS ----------------
+    def _refresh_idf(self):
+        """Starts a new IDF epoch once the corpus has grown enough"""
+        if self.n_docs >= self._idf_n * IDF_REFRESH_GROWTH + 1:
+            self._idf_n = self.n_docs
+            self._idf_table = {}
+            self._idf_epoch += 1
+
+    def _idf(self, term):
+        idf = self._idf_table.get(term)
+        if idf is None:
+            idf = self._idf_table[term] = math.log((1 + self._idf_n) / (1 + self.df.get(term, 0))) + 1.0
+        return idf
+
+    def _weighted(self, tf):
+        """Unit-length TF-IDF vector under the current document frequencies"""
+        vec = {t: w * self._idf(t) for t, w in tf.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {t: w / norm for t, w in vec.items()}
+
+    def _centroid(self, cluster):
+        if cluster._vec_epoch != self._idf_epoch:
+            cluster._vec = self._weighted(cluster.tf)
+            cluster._vec_epoch = self._idf_epoch
+        return cluster._vec
+
+    def _similarity(self, vec, cluster):
+        centroid = self._centroid(cluster)
+        if len(vec) > len(centroid):
+            vec, centroid = centroid, vec
+        return sum(w * centroid.get(t, 0.0) for t, w in vec.items())
+
+    def _add_to_centroid(self, cluster, tf):
+        merged = Counter(cluster.tf)
+        merged.update(tf)
+        self._set_centroid(cluster, _trim_centroid(merged))
+
+    # ---------------- ASSIGNMENT ----------------
+    def _candidates(self, vec):
+        """Clusters sharing the narrative's most distinctive terms, most overlap first"""
+        top_terms = sorted(vec, key=vec.get, reverse=True)[:QUERY_TERMS]
+        hits = Counter()
+        for t in top_terms:
+            hits.update(self.postings.get(t, ()))
+        return [cid for cid, _ in hits.most_common(MAX_CANDIDATES)]
+
+    def assign(self, narrative, digest=None, now=None):
+        """Returns the cluster ID for a narrative, creating a cluster if no
+        existing one is similar enough"""
+        now = now or time.time()
+        fp = fingerprint(narrative)
+        with self._lock:
+            cid = self.assignments.get(fp)
+            if cid is None:
+                tf = term_frequencies(narrative)
+                self.n_docs += 1
+                self._pending_docs += 1
+                self.df.update(tf.keys())
+                self._pending_df.update(tf.keys())
+                self._refresh_idf()
+                vec = self._weighted(tf)
+
+                best, best_sim = None, self.threshold
+                for candidate in self._candidates(vec):
+                    sim = self._similarity(vec, self.clusters[candidate])
+                    if sim >= best_sim:
+                        best, best_sim = candidate, sim
+
+                if best is None:
+                    best = self._allocate_id()
+                    self.clusters[best] = Cluster(best, narrative.narrative_name, now)
+                cluster = self.clusters[best]
+                delta = self._pending_clusters.setdefault(best, _ClusterDelta())
+                self._add_to_centroid(cluster, tf)
+                delta.tf.update(tf)
+                cluster.count += 1
+                delta.count += 1
+                name = narrative.narrative_name
+                if name != cluster.label and name not in cluster.aliases and len(cluster.aliases) < MAX_ALIASES:
+                    cluster.aliases.append(name)
+                cid = best
+
+            self._touch(fp, cid, now)
+            self._pending_assignments[fp] = (cid, now)
+            cluster = self.clusters[cid]
+            delta = self._pending_clusters.setdefault(cid, _ClusterDelta())
+            cluster.last_seen = max(cluster.last_seen, now)
+            if digest is not None and cluster.last_digest != digest:
+                cluster.last_digest = digest
+                cluster.snapshots += 1
+                delta.snapshots += 1
+            return cid
+
+    def assign_snapshot(self, narratives, digest=None):
+        """Cluster IDs parallel to `narratives`"""
+        now = time.time()
+        return [self.assign(n, digest, now) for n in narratives]
+
+    def cluster(self, cid):
+        return self.clusters.get(cid)
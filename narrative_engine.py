@@ -0,0 +1,371 @@
+"""Local narrative engine.
+
+Builds the same payload the n8n workflow returns (market_state,
+dominant_narratives, emerging_narratives, macro_pressure_index,
+market_summary, trading_signal) from local price history and a local
+text corpus, so a refresh is a few milliseconds of in-process work.
+"""
+import json
+import math
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+from macro_index import overall_stress
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(BASE_DIR, "corpus.jsonl")
+
+# Docs needed before a narrative is promoted from "emerging" to "dominant"
+MIN_DOMINANT_HITS = 2
+
+# ---------------- LEXICON ----------------
+# Each entry mirrors one narrative the n8n agent typically reports.
+NARRATIVE_LEXICON = [
+    {
+        "narrative_name": "Inflation Hedge",
+        "narrative_type": "macro",
+        "price_impact_direction": "bullish",
+        "expected_time_horizon": "medium",
+        "pressure": "cpi_pressure",
+        "terms": ["inflation", "cpi", "store of value", "hedge", "debasement", "purchasing power"],
+    },
+    {
+        "narrative_name": "Industrial & Green Energy Demand",
+        "narrative_type": "industrial",
+        "price_impact_direction": "bullish",
+        "expected_time_horizon": "long",
+        "pressure": None,
+        "terms": ["solar", "photovoltaic", "industrial demand", "electronics", " ev ", "electric vehicle", "green energy"],
+    },
+    {
+        "narrative_name": "Supply Shortage / Deficit",
+        "narrative_type": "supply",
+        "price_impact_direction": "bullish",
+        "expected_time_horizon": "medium",
+        "pressure": None,
+        "terms": ["deficit", "supply crunch", "shortage", "mine output", "mining output", "inventories"],
+    },
+    {
+        "narrative_name": "Speculative & ETF Momentum",
+        "narrative_type": "speculative",
+        "price_impact_direction": "bullish",
+        "expected_time_horizon": "short",
+        "pressure": None,
+        "terms": ["etf", "breakout", "short squeeze", "inflow", "rally", "all-time high"],
+    },
+    {
+        "narrative_name": "Rate Hike Pressure",
+        "narrative_type": "macro",
+        "price_impact_direction": "bearish",
+        "expected_time_horizon": "medium",
+        "pressure": "interest_rate_pressure",
+        "terms": ["rate hike", "hawkish", "yields", "fed funds", "tightening", "real rates"],
+    },
+    {
+        "narrative_name": "Strong Dollar Headwind",
+        "narrative_type": "macro",
+        "price_impact_direction": "bearish",
+        "expected_time_horizon": "short",
+        "pressure": "usd_strength_pressure",
+        "terms": ["strong dollar", "dollar strength", "dxy", "usd rally", "greenback"],
+    },
+    {
+        "narrative_name": "Recession & Demand Slowdown",
+        "narrative_type": "demand",
+        "price_impact_direction": "bearish",
+        "expected_time_horizon": "long",
+        "pressure": "recession_risk",
+        "terms": ["recession", "slowdown", "contraction", "weak demand", "layoffs", "pmi"],
+    },
+]
+
+SIGNAL_LEVELS = [
+    (0.45, "strong_buy"),
+    (0.15, "buy"),
+    (-0.15, "neutral"),
+    (-0.45, "sell"),
+]
+
+_corpus_cache = {}
+
+
+# ---------------- CORPUS ----------------
+def _parse_timestamp(value):
+    """Parses an ISO string or epoch number into a UTC epoch float"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Loads the JSONL text corpus, re-reading only when the file changes"""
+    if not os.path.exists(path):
+        return []
+    mtime = os.path.getmtime(path)
+    cached = _corpus_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    docs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = doc.get("text") or doc.get("title") or ""
+            docs.append({
+                "text": text,
+                "lower": " " + text.lower() + " ",
+                "source": doc.get("source", "news"),
+                "ts": _parse_timestamp(doc.get("timestamp")),
+            })
+    _corpus_cache[path] = (mtime, docs)
+    return docs
+
+
+# ---------------- PRICE FEATURES ----------------
+def compute_price_features(price_history, metal="silver"):
+    """Derives trend, volatility and evidence strings from a Close series"""
+    features = {"trend": "neutral", "volatility": "medium", "change_pct": 0.0, "evidence": []}
+    if price_history is None or len(price_history) < 2 or "Close" not in price_history:
+        return features
+
+    close = price_history["Close"].dropna()
+    if len(close) < 2:
+        return features
+
+    change_pct = (close.iloc[-1] / close.iloc[0] - 1) * 100
+    returns = close.pct_change().dropna()
+    ann_vol = float(returns.std() * math.sqrt(252) * 100) if len(returns) > 1 else 0.0
+
+    features["change_pct"] = float(change_pct)
+    features["ann_vol"] = ann_vol
+    features["trend"] = "bullish" if change_pct > 2 else "bearish" if change_pct < -2 else "neutral"
+    features["volatility"] = "high" if ann_vol > 35 else "low" if ann_vol < 20 else "medium"
+    features["evidence"].append(f"{metal.title()} spot price action ({change_pct:+.1f}% over window)")
+    features["evidence"].append(f"Realized volatility {ann_vol:.0f}% annualized")
+    return features
+
+
+# ---------------- SCORING ----------------
+def score_narratives(docs):
+    """Counts lexicon hits per narrative, split into recent and older halves"""
+    if docs:
+        timestamps = sorted(d["ts"] for d in docs)
+        recent_cutoff = timestamps[len(timestamps) // 2]
+    else:
+        recent_cutoff = 0.0
+
+    scored = []
+    for spec in NARRATIVE_LEXICON:
+        term_counts = Counter()
+        hits, recent_hits = [], 0
+        for d in docs:
+            matched = [t for t in spec["terms"] if t in d["lower"]]
+            if not matched:
+                continue
+            term_counts.update(t.strip() for t in matched)
+            hits.append(d)
+            if d["ts"] >= recent_cutoff:
+                recent_hits += 1
+        scored.append({"spec": spec, "hits": hits, "recent_hits": recent_hits, "terms": term_counts})
+    return scored
+
+
+def _build_narrative(item, max_hits, price, metal="silver"):
+    """Turns a scored lexicon entry into a payload narrative dict"""
+    spec = item["spec"]
+    n_hits = len(item["hits"])
+    confidence = 0.4 + 0.5 * (n_hits / max_hits)
+    if spec["price_impact_direction"] == price["trend"]:
+        confidence += 0.05
+    momentum = 0.3 + 0.65 * (item["recent_hits"] / n_hits)
+
+    social = [d["text"] for d in item["hits"] if d["source"] == "social"][:2]
+    news = [d["text"] for d in item["hits"] if d["source"] != "social"][:2]
+    drivers = [t for t, _ in item["terms"].most_common(4)]
+
+    return {
+        "narrative_name": spec["narrative_name"],
+        "narrative_type": spec["narrative_type"],
+        "confidence_score": round(min(confidence, 0.95), 2),
+        "momentum_score": round(min(momentum, 0.95), 2),
+        "key_drivers": drivers,
+        "supporting_data": {
+            "macro": news if spec["narrative_type"] == "macro" else [],
+            "market": price["evidence"][:1],
+            "social": social if spec["narrative_type"] == "macro" else social + news,
+        },
+        "price_impact_direction": spec["price_impact_direction"],
+        "expected_time_horizon": spec["expected_time_horizon"],
+        "reasoning_summary": (
+            f"{n_hits} local documents reference {', '.join(drivers[:2]) or 'this theme'}, "
+            f"with {item['recent_hits']} in the most recent half of the corpus, "
+            f"pointing to {spec['price_impact_direction']} pressure on {metal}."
+        ),
+    }
+
+
+def _build_emerging(item, metal="silver"):
+    """Turns a low-coverage lexicon entry into an emerging narrative dict"""
+    spec = item["spec"]
+    recent = item["recent_hits"] > 0
+    return {
+        "theme": spec["narrative_name"],
+        "early_signals": [d["text"] for d in item["hits"]][:3],
+        "confidence_score": 0.45 if recent else 0.35,
+        "risk_level": "high" if spec["price_impact_direction"] == "bearish" else "medium",
+        "monitoring_priority": "high" if recent else "medium",
+        "why_it_matters": (
+            f"Early chatter around {', '.join(item['terms'])} could develop into a "
+            f"{spec['price_impact_direction']} {spec['narrative_type']} narrative for {metal}."
+        ),
+    }
+
+
+def _macro_pressure(scored, max_hits):
+    """Maps narrative coverage onto the five macro pressure gauges"""
+    pressures = {
+        "cpi_pressure": 0.0,
+        "interest_rate_pressure": 0.0,
+        "recession_risk": 0.0,
+        "usd_strength_pressure": 0.0,
+    }
+    for item in scored:
+        key = item["spec"]["pressure"]
+        if key and item["hits"]:
+            recent_share = item["recent_hits"] / len(item["hits"])
+            pressures[key] = round(min(0.95, 0.2 + 0.6 * len(item["hits"]) / max_hits + 0.15 * recent_share), 2)
+    pressures["overall_macro_stress"] = overall_stress(pressures)
+    return pressures
+
+
+def _trading_signal(dominant, price):
+    """Combines narrative direction and the price trend into a signal"""
+    weights = [n["confidence_score"] * n["momentum_score"] for n in dominant]
+    total = sum(weights)
+    if total:
+        narrative_score = sum(
+            w * (1 if n["price_impact_direction"] == "bullish" else -1)
+            for n, w in zip(dominant, weights)
+        ) / total
+    else:
+        narrative_score = 0.0
+    price_score = max(-1.0, min(1.0, price["change_pct"] / 10))
+    score = 0.7 * narrative_score + 0.3 * price_score
+
+    signal = "strong_sell"
+    for threshold, label in SIGNAL_LEVELS:
+        if score > threshold:
+            signal = label
+            break
+
+    bulls = [n["narrative_name"] for n in dominant if n["price_impact_direction"] == "bullish"]
+    bears = [n["narrative_name"] for n in dominant if n["price_impact_direction"] == "bearish"]
+    reasoning = []
+    if bulls:
+        reasoning.append(f"Bullish narratives in play: {', '.join(bulls)}")
+    if bears:
+        reasoning.append(f"Bearish narratives in play: {', '.join(bears)}")
+    reasoning.append(f"Price trend is {price['trend']} ({price['change_pct']:+.1f}% over the window)")
+    reasoning.append(f"Composite narrative/price score: {score:+.2f}")
+
+    return {
+        "signal": signal,
+        "confidence": round(min(0.95, 0.5 + abs(score) / 2), 2),
+        "reasoning": reasoning,
+    }
+
+
+# ---------------- PAYLOAD ----------------
+def build_payload(price_history=None, corpus_path=CORPUS_PATH, macro=None, emerging=None, metal="silver",
+                  as_of=None):
+    """Builds an n8n-compatible payload from local price history and corpus
+
+    `macro` is an optional macro_pressure_index computed from macro series
+    (see macro_index.py); gauges it lacks are estimated from corpus
+    coverage. `emerging` are extra emerging narrative dicts (e.g. bursting
+    themes from burst_detector.py), appended after the lexicon's own.
+    `metal` names the asset in generated text; the payload schema (e.g.
+    market_state.silver_trend) is the same for every asset. `as_of` (UTC
+    epoch seconds) ignores corpus documents published after it.
+    """
+    docs = load_corpus(corpus_path)
+    if as_of is not None:
+        docs = [d for d in docs if d["ts"] <= as_of]
+    price = compute_price_features(price_history, metal)
+    scored = score_narratives(docs)
+    max_hits = max([len(s["hits"]) for s in scored] + [1])
+
+    dominant = [
+        _build_narrative(s, max_hits, price, metal)
+        for s in scored if len(s["hits"]) >= MIN_DOMINANT_HITS
+    ]
+    dominant.sort(key=lambda n: n["confidence_score"], reverse=True)
+    lexicon_emerging = [_build_emerging(s, metal) for s in scored if 0 < len(s["hits"]) < MIN_DOMINANT_HITS]
+    seen = {e["theme"].lower() for e in lexicon_emerging}
+    emerging = lexicon_emerging + [e for e in emerging or () if e["theme"].lower() not in seen]
+
+    estimated = _macro_pressure(scored, max_hits)
+    if macro:
+        # Gauges the macro series cannot compute yet fall back to the corpus estimate
+        macro = {**estimated, **{k: v for k, v in macro.items() if k != "overall_macro_stress"}}
+        macro["overall_macro_stress"] = overall_stress(macro)
+    else:
+        macro = estimated
+    top_pressure = max(
+        ("cpi_pressure", "interest_rate_pressure", "recession_risk", "usd_strength_pressure"),
+        key=lambda k: macro[k],
+    )
+    regime_labels = {
+        "cpi_pressure": "CPI-driven",
+        "interest_rate_pressure": "Rate-driven",
+        "recession_risk": "Recession-driven",
+        "usd_strength_pressure": "USD-driven",
+    }
+    macro_regime = regime_labels[top_pressure] if macro[top_pressure] >= 0.5 else "Narrative-driven"
+    signal = _trading_signal(dominant, price)
+
+    top_names = ", ".join(n["narrative_name"] for n in dominant[:3]) or "no dominant narratives"
+    macro_share = sum(1 for n in dominant if n["narrative_type"] == "macro")
+    balance = "macro-driven" if macro_share * 2 >= len(dominant) and dominant else "narrative-driven"
+
+    return {
+        "market_state": {
+            "silver_trend": price["trend"],
+            "volatility_level": price["volatility"],
+            "macro_regime": macro_regime,
+            "regime_explanation": (
+                f"{metal.title()} is {price['trend']} ({price['change_pct']:+.1f}%) with {price['volatility']} "
+                f"volatility; the local corpus is led by {top_names}."
+            ),
+        },
+        "dominant_narratives": dominant,
+        "emerging_narratives": emerging,
+        "macro_pressure_index": macro,
+        "market_summary": {
+            "current_market_story": (
+                f"Across {len(docs)} local documents the leading {metal} narratives are {top_names}, "
+                f"while price action over the window is {price['trend']}."
+            ),
+            "narrative_vs_macro_balance": balance,
+            "forward_outlook": (
+                f"The composite read is {signal['signal'].replace('_', ' ')}; watch "
+                f"{', '.join(e['theme'] for e in emerging) or 'the current leaders'} for a shift in tone."
+            ),
+        },
+        "trading_signal": signal,
+    }
@@ -0,0 +1,99 @@
+"""Indexed narrative collection.
+
+Built once per snapshot: narratives are bucketed by direction, type,
+horizon and key driver in a single pass and pre-sorted by confidence,
+momentum and name, so filter/sort widget changes are set lookups rather
+than rescans of the whole list.
+"""
+from collections import defaultdict
+
+SORT_KEYS = {
+    "confidence": lambda n: (-n.confidence_score, -n.momentum_score, n.narrative_name),
+    "momentum": lambda n: (-n.momentum_score, -n.confidence_score, n.narrative_name),
+    "name": lambda n: (n.narrative_name.lower(),),
+}
+
+
+def _union(facet, values):
+    return set().union(*(facet.get(v, ()) for v in values))
+
+
+class NarrativeIndex:
+    """Pre-bucketed, pre-sorted view over a tuple of Narrative objects"""
+
+    def __init__(self, narratives):
+        self.narratives = tuple(narratives)
+        self.by_direction = defaultdict(set)
+        self.by_type = defaultdict(set)
+        self.by_horizon = defaultdict(set)
+        self.by_driver = defaultdict(set)
+
+        # One pass over the snapshot fills every bucket
+        for i, n in enumerate(self.narratives):
+            self.by_direction[n.price_impact_direction].add(i)
+            self.by_type[n.narrative_type].add(i)
+            self.by_horizon[n.expected_time_horizon].add(i)
+            for d in n.key_drivers:
+                self.by_driver[d.lower()].add(i)
+
+        self.order = {}
+        self.rank = {}
+        for key, sort_key in SORT_KEYS.items():
+            order = sorted(range(len(self.narratives)), key=lambda i: sort_key(self.narratives[i]))
+            rank = [0] * len(order)
+            for r, i in enumerate(order):
+                rank[i] = r
+            self.order[key] = order
+            self.rank[key] = rank
+
+    def __len__(self):
+        return len(self.narratives)
+
+    # ---------------- FACETS ----------------
+    def types(self):
+        return sorted(self.by_type)
+
+    def horizons(self):
+        return sorted(self.by_horizon)
+
+    def drivers(self):
+        return sorted(self.by_driver)
+
+    def count(self, direction):
+        return len(self.by_direction.get(direction, ()))
+
+    # ---------------- QUERY ----------------
+    def query(self, direction=None, types=None, horizons=None, drivers=None,
+              min_confidence=0.0, min_momentum=0.0, sort_by="confidence", limit=None):
+        """Returns narratives matching every given filter, in `sort_by` order
+
+        `types`, `horizons` and `drivers` are collections; a narrative matches
+        if it has any of the listed values. Empty/None means no filter.
+        """
+        buckets = []
+        if direction:
+            buckets.append(self.by_direction.get(direction, set()))
+        if types:
+            buckets.append(_union(self.by_type, types))
+        if horizons:
+            buckets.append(_union(self.by_horizon, horizons))
+        if drivers:
+            buckets.append(_union(self.by_driver, [d.lower() for d in drivers]))
+
+        if buckets:
+            # Intersect smallest first, then order the survivors by precomputed rank
+            buckets.sort(key=len)
+            candidates = set(buckets[0]).intersection(*buckets[1:])
+            ordered = sorted(candidates, key=self.rank[sort_by].__getitem__)
+        else:
+            ordered = self.order[sort_by]
+
+        result = []
+        for i in ordered:
+            n = self.narratives[i]
+            if n.confidence_score < min_confidence or n.momentum_score < min_momentum:
+                continue
+            result.append(n)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
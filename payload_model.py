@@ -0,0 +1,228 @@
+"""Typed payload model.
+
+Parses and validates an n8n-schema payload once per snapshot into compact
+__slots__ objects. Enum-like fields (direction, horizon, priority, risk,
+signal) are normalized at parse time, so render code reads plain
+attributes instead of re-walking raw dicts on every rerun.
+"""
+import hashlib
+import json
+
+# ---------------- NORMALIZED VALUES ----------------
+BULLISH, BEARISH, NEUTRAL = "bullish", "bearish", "neutral"
+DIRECTIONS = (BULLISH, BEARISH, NEUTRAL)
+HORIZONS = ("short", "medium", "long", "unknown")
+LEVELS = ("high", "medium", "low")
+SIGNALS = ("strong_buy", "buy", "neutral", "sell", "strong_sell")
+
+
+def normalize_direction(value):
+    text = str(value or "").lower()
+    if "bull" in text:
+        return BULLISH
+    if "bear" in text:
+        return BEARISH
+    return NEUTRAL
+
+
+def normalize_horizon(value):
+    text = str(value or "").lower()
+    if text.startswith(("short", "near", "immediate")):
+        return "short"
+    if text.startswith(("medium", "mid")):
+        return "medium"
+    if text.startswith(("long", "structural")):
+        return "long"
+    return "unknown"
+
+
+def normalize_level(value, default="medium"):
+    text = str(value or "").strip().lower()
+    return text if text in LEVELS else default
+
+
+def normalize_signal(value):
+    text = str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return text if text in SIGNALS else "neutral"
+
+
+def _score(value, default=0.0):
+    """Coerces to a float clipped to [0, 1]"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, 0.0), 1.0)
+
+
+def _text(value, default=""):
+    return default if value is None else str(value)
+
+
+def _text_list(value):
+    if not isinstance(value, (list, tuple)):
+        return ()
+    return tuple(str(v) for v in value if v is not None)
+
+
+def _dict(value):
+    return value if isinstance(value, dict) else {}
+
+
+# ---------------- MODEL ----------------
+class MarketState:
+    __slots__ = ("silver_trend", "volatility_level", "macro_regime", "regime_explanation")
+
+    def __init__(self, raw):
+        raw = _dict(raw)
+        self.silver_trend = normalize_direction(raw.get("silver_trend"))
+        self.volatility_level = normalize_level(raw.get("volatility_level"))
+        self.macro_regime = _text(raw.get("macro_regime"), "N/A")
+        self.regime_explanation = _text(raw.get("regime_explanation"))
+
+    def to_dict(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+
+class Narrative:
+    __slots__ = (
+        "narrative_name", "narrative_type", "confidence_score", "momentum_score",
+        "key_drivers", "supporting_data", "price_impact_direction",
+        "expected_time_horizon", "reasoning_summary",
+    )
+
+    def __init__(self, raw):
+        self.narrative_name = _text(raw.get("narrative_name"), "Unnamed narrative")
+        self.narrative_type = _text(raw.get("narrative_type"), "other").strip().lower() or "other"
+        self.confidence_score = _score(raw.get("confidence_score"))
+        self.momentum_score = _score(raw.get("momentum_score"))
+        self.key_drivers = _text_list(raw.get("key_drivers"))
+        self.supporting_data = {
+            str(k): _text_list(v) for k, v in _dict(raw.get("supporting_data")).items()
+        }
+        self.price_impact_direction = normalize_direction(raw.get("price_impact_direction"))
+        self.expected_time_horizon = normalize_horizon(raw.get("expected_time_horizon"))
+        self.reasoning_summary = _text(raw.get("reasoning_summary"))
+
+    def to_dict(self):
+        d = {s: getattr(self, s) for s in self.__slots__}
+        d["key_drivers"] = list(self.key_drivers)
+        d["supporting_data"] = {k: list(v) for k, v in self.supporting_data.items()}
+        return d
+
+
+class EmergingNarrative:
+    __slots__ = (
+        "theme", "early_signals", "confidence_score", "risk_level",
+        "monitoring_priority", "why_it_matters",
+    )
+
+    def __init__(self, raw):
+        self.theme = _text(raw.get("theme"), "Unnamed theme")
+        self.early_signals = _text_list(raw.get("early_signals"))
+        self.confidence_score = _score(raw.get("confidence_score"))
+        self.risk_level = normalize_level(raw.get("risk_level"))
+        self.monitoring_priority = normalize_level(raw.get("monitoring_priority"))
+        self.why_it_matters = _text(raw.get("why_it_matters"))
+
+    def to_dict(self):
+        d = {s: getattr(self, s) for s in self.__slots__}
+        d["early_signals"] = list(self.early_signals)
+        return d
+
+
+class MarketSummary:
+    __slots__ = ("current_market_story", "narrative_vs_macro_balance", "forward_outlook")
+
+    def __init__(self, raw):
+        raw = _dict(raw)
+        self.current_market_story = _text(raw.get("current_market_story"), "N/A")
+        self.narrative_vs_macro_balance = _text(raw.get("narrative_vs_macro_balance"), "N/A")
+        self.forward_outlook = _text(raw.get("forward_outlook"), "N/A")
+
+    def to_dict(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+
+class TradingSignal:
+    __slots__ = ("signal", "confidence", "reasoning")
+
+    def __init__(self, raw):
+        raw = _dict(raw)
+        self.signal = normalize_signal(raw.get("signal"))
+        self.confidence = _score(raw.get("confidence"))
+        self.reasoning = _text_list(raw.get("reasoning"))
+
+    @property
+    def label(self):
+        return self.signal.upper().replace("_", " ")
+
+    @property
+    def side(self):
+        """'buy', 'sell' or 'neutral'"""
+        return self.signal.rsplit("_", 1)[-1]
+
+    def to_dict(self):
+        return {"signal": self.signal, "confidence": self.confidence, "reasoning": list(self.reasoning)}
+
+
+class Payload:
+    """One parsed snapshot of the narrative agent's output"""
+
+    __slots__ = (
+        "market_state", "dominant_narratives", "emerging_narratives",
+        "macro_pressure_index", "market_summary", "trading_signal", "digest",
+    )
+
+    def __init__(self, raw, digest=""):
+        # Content hash of the raw payload; keys per-snapshot caches
+        self.digest = digest
+        self.market_state = MarketState(raw.get("market_state"))
+        self.dominant_narratives = tuple(
+            Narrative(n) for n in raw.get("dominant_narratives") or () if isinstance(n, dict)
+        )
+        self.emerging_narratives = tuple(
+            EmergingNarrative(e) for e in raw.get("emerging_narratives") or () if isinstance(e, dict)
+        )
+        self.macro_pressure_index = {
+            str(k): _score(v) for k, v in _dict(raw.get("macro_pressure_index")).items()
+        }
+        self.market_summary = MarketSummary(raw.get("market_summary"))
+        self.trading_signal = TradingSignal(raw.get("trading_signal"))
+
+    def to_dict(self):
+        """Serializes back to the n8n schema (normalized values)"""
+        return {
+            "market_state": self.market_state.to_dict(),
+            "dominant_narratives": [n.to_dict() for n in self.dominant_narratives],
+            "emerging_narratives": [e.to_dict() for e in self.emerging_narratives],
+            "macro_pressure_index": dict(self.macro_pressure_index),
+            "market_summary": self.market_summary.to_dict(),
+            "trading_signal": self.trading_signal.to_dict(),
+        }
+
+
+def format_supporting_data(supp_data):
+    """Helper to convert raw JSON supporting data into readable markdown"""
+    if not supp_data:
+        return "_No specific data points._"
+    lines = []
+    for category, items in supp_data.items():
+        if items:
+            lines.append(f"**{category.title()}:**")
+            lines.extend(f"- {item}" for item in items)
+    return "".join(line + "\n" for line in lines)
+
+
+def parse_payload(raw):
+    """Validates a raw webhook/engine/file payload and returns a Payload
+
+    Accepts the n8n list wrapper ([{...}]). Raises ValueError if the payload
+    is not an object.
+    """
+    if isinstance(raw, list):
+        raw = raw[0] if raw else None
+    if not isinstance(raw, dict):
+        raise ValueError(f"Expected a payload object, got {type(raw).__name__}")
+    digest = hashlib.sha1(json.dumps(raw, sort_keys=True, default=str).encode()).hexdigest()
+    return Payload(raw, digest)
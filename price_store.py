@@ -0,0 +1,291 @@
+"""Incremental on-disk price bar store.
+
+Bars are kept as Parquet, one directory per (ticker, interval). A refresh
+downloads only the bars after the last stored timestamp and appends them
+as a new part file; parts are compacted once enough pile up. Reads are
+memory-mapped, so long ranges load from disk without touching Yahoo.
+"""
+import os
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.environ.get("AGF_PRICE_STORE", os.path.join(BASE_DIR, ".price_store"))
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# First download per interval, bounded by what Yahoo serves for that bar size
+BACKFILL_PERIOD = {
+    "1m": "7d",
+    "5m": "60d",
+    "15m": "60d",
+    "30m": "60d",
+    "1h": "730d",
+    "1d": "10y",
+    "1wk": "10y",
+}
+
+PERIOD_OFFSETS = {
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "7d": pd.Timedelta(days=7),
+    "60d": pd.Timedelta(days=60),
+    "730d": pd.Timedelta(days=730),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Part files allowed per key before they are merged into one
+MAX_PARTS = 16
+
+# Times a read re-lists the parts when compaction removes one under it
+READ_RETRIES = 3
+# A compaction lock older than this was left by a crashed process
+COMPACT_LOCK_STALE_SECONDS = 300
+
+# A key Yahoo returned no bars for is not backfilled again for this long
+EMPTY_RETRY_SECONDS = 6 * 3600
+
+
+def period_start(period, now=None):
+    """Converts a yfinance-style period ('7d', '1mo', '10y') into a UTC start"""
+    now = now or pd.Timestamp.now(tz="UTC")
+    return now - PERIOD_OFFSETS[period]
+
+
+def _utc(ts):
+    """Returns a tz-aware UTC Timestamp, treating naive input as UTC"""
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _to_utc_index(df):
+    """Normalizes a bar frame to a tz-aware UTC DatetimeIndex named Date"""
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    df = df.copy()
+    df.index = index.rename("Date")
+    return df
+
+
+class PriceStore:
+    """Parquet-backed bar store keyed by ticker and interval"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------------- PATHS ----------------
+    def _key_dir(self, ticker, interval):
+        safe = ticker.replace("=", "_").replace("^", "_").replace("/", "_")
+        return os.path.join(self.root, f"{safe}__{interval}")
+
+    def _parts(self, ticker, interval):
+        key_dir = self._key_dir(ticker, interval)
+        if not os.path.isdir(key_dir):
+            return []
+        return sorted(
+            os.path.join(key_dir, f) for f in os.listdir(key_dir)
+            if f.startswith("part-") and f.endswith(".parquet")
+        )
+
+    # ---------------- READ ----------------
+    def _read_parts(self, ticker, interval, last_only=False, **kwargs):
+        """Reads the parts of a key (or only the newest) as one table, or None when there are none
+
+        Compaction may delete a part between listing and reading it; the
+        merged part that replaces it is already on disk, so the listing
+        is simply taken again.
+        """
+        for attempt in range(READ_RETRIES):
+            parts = self._parts(ticker, interval)
+            if not parts:
+                return None
+            if last_only:
+                parts = parts[-1:]
+            try:
+                return pa.concat_tables([pq.read_table(p, memory_map=True, **kwargs) for p in parts])
+            except FileNotFoundError:
+                if attempt == READ_RETRIES - 1:
+                    raise
+
+    def read(self, ticker, interval, start=None, end=None):
+        """Returns stored OHLCV bars for a key, optionally sliced to [start, end]"""
+        filters = []
+        if start is not None:
+            filters.append(("Date", ">=", _utc(start)))
+        if end is not None:
+            filters.append(("Date", "<=", _utc(end)))
+        table = self._read_parts(ticker, interval, filters=filters or None)
+        if table is None:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        df = table.to_pandas().set_index("Date")
+
+        # Later parts re-fetch the last (possibly still forming) bar; keep the newest
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        return df
+
+    def read_closes(self, tickers, interval, start=None, end=None):
+        """Returns Close columns for several tickers aligned on one index"""
+        closes = {t: self.read(t, interval, start=start, end=end)["Close"] for t in tickers}
+        frame = pd.DataFrame(closes).reindex(columns=list(tickers))
+        frame.index.name = "Date"
+        return frame
+
+    def last_timestamp(self, ticker, interval):
+        """Returns the newest stored bar time for a key, or None"""
+        # Appends only ever add bars at or after the stored last one, so the newest part holds it
+        table = self._read_parts(ticker, interval, last_only=True, columns=["Date"])
+        if table is None or not len(table):
+            return None
+        return _utc(pc.max(table.column("Date")).as_py())
+
+    # ---------------- WRITE ----------------
+    def append(self, ticker, interval, bars):
+        """Appends bars as a new part file and compacts when parts pile up"""
+        if bars is None or bars.empty:
+            return 0
+        bars = _to_utc_index(bars).reindex(columns=BAR_COLUMNS)
+        key_dir = self._key_dir(ticker, interval)
+        os.makedirs(key_dir, exist_ok=True)
+
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = os.path.join(key_dir, "." + name)
+        pq.write_table(pa.Table.from_pandas(bars.reset_index(), preserve_index=False), tmp_path)
+        os.replace(tmp_path, os.path.join(key_dir, name))
+
+        if len(self._parts(ticker, interval)) > MAX_PARTS:
+            self.compact(ticker, interval)
+        return len(bars)
+
+    def _lock_compaction(self, lock_path):
+        """Takes the key's compaction lock file; returns its fd, or None if held"""
+        for _ in range(2):
+            try:
+                return os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) < COMPACT_LOCK_STALE_SECONDS:
+                        return None  # Another thread or process is compacting this key
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+        return None
+
+    def compact(self, ticker, interval):
+        """Merges all part files of a key into one
+
+        The merged part takes the newest merged part's timestamp, so it
+        sorts before any part appended while compaction ran, and it is on
+        disk before the old parts are removed: a reader always finds every
+        bar, at worst twice.
+        """
+        key_dir = self._key_dir(ticker, interval)
+        lock_path = os.path.join(key_dir, ".compact.lock")
+        lock_fd = self._lock_compaction(lock_path)
+        if lock_fd is None:
+            return
+        try:
+            parts = self._parts(ticker, interval)
+            if len(parts) < 2:
+                return
+            tables = [pq.read_table(p, memory_map=True) for p in parts]
+            merged = pa.concat_tables(tables).to_pandas().set_index("Date")
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            stamp = os.path.basename(parts[-1]).split("-")[1]
+            name = f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp_path = os.path.join(key_dir, "." + name)
+            pq.write_table(pa.Table.from_pandas(merged.reset_index(), preserve_index=False), tmp_path)
+            os.replace(tmp_path, os.path.join(key_dir, name))
+            for p in parts:
+                os.remove(p)
+        finally:
+            os.close(lock_fd)
+            os.remove(lock_path)
+
+    # ---------------- REFRESH ----------------
+    def _empty_marker(self, ticker, interval):
+        return os.path.join(self._key_dir(ticker, interval), ".empty")
+
+    def _recently_empty(self, ticker, interval):
+        """True if a backfill of this key came back empty within EMPTY_RETRY_SECONDS"""
+        try:
+            return time.time() - os.path.getmtime(self._empty_marker(ticker, interval)) < EMPTY_RETRY_SECONDS
+        except OSError:
+            return False
+
+    def _mark_empty(self, ticker, interval):
+        key_dir = self._key_dir(ticker, interval)
+        os.makedirs(key_dir, exist_ok=True)
+        with open(self._empty_marker(ticker, interval), "w"):
+            pass
+
+    def update(self, tickers, interval="1d"):
+        """Fetches only bars newer than what is stored, in at most two batched downloads
+
+        Keys with bars inside Yahoo's lookback window for the interval get a
+        delta download from their oldest last bar. Empty keys, and keys whose
+        last bar is older than that window (a delta Yahoo would not serve),
+        get a fresh backfill. A key whose backfill came back empty is skipped
+        for EMPTY_RETRY_SECONDS instead of being re-downloaded every cycle.
+
+        Returns {ticker: rows appended}.
+        """
+        import yfinance as yf  # Lazy: reads never need it, only refreshes do
+
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        backfill_period = BACKFILL_PERIOD.get(interval, "1y")
+        limit = period_start(backfill_period)
+        last = {t: self.last_timestamp(t, interval) for t in tickers}
+        backfill = [
+            t for t in tickers
+            if (last[t] is None and not self._recently_empty(t, interval))
+            or (last[t] is not None and last[t] < limit)
+        ]
+        delta = [t for t in tickers if last[t] is not None and last[t] >= limit]
+
+        frames = []
+        if backfill:
+            frames.append((backfill, yf.download(
+                backfill, period=backfill_period, interval=interval,
+                group_by="ticker", progress=False, threads=True,
+            )))
+        if delta:
+            # Re-fetch from the oldest last bar so the forming bar gets refreshed
+            start = max(min(last[t] for t in delta), limit)
+            if interval in ("1d", "1wk"):
+                start = start.normalize()
+            frames.append((delta, yf.download(
+                delta, start=start.tz_convert(None).to_pydatetime(), interval=interval,
+                group_by="ticker", progress=False, threads=True,
+            )))
+
+        appended = dict.fromkeys(tickers, 0)
+        for group, raw in frames:
+            for t in group:
+                if raw is None or raw.empty or t not in raw.columns.get_level_values(0):
+                    if last[t] is None:
+                        self._mark_empty(t, interval)
+                    continue
+                bars = _to_utc_index(raw[t].dropna(how="all"))
+                if last[t] is not None:
+                    bars = bars[bars.index >= last[t]]
+                appended[t] = self.append(t, interval, bars)
+                if last[t] is None and not appended[t]:
+                    self._mark_empty(t, interval)
+                elif last[t] is None:
+                    try:
+                        os.remove(self._empty_marker(t, interval))
+                    except FileNotFoundError:
+                        pass
+        return appended
@@ -0,0 +1,149 @@
+"""Stale-while-revalidate background refresher.
+
+Keeps upstream data (n8n payload, market frame, ...) warm on its own
+schedule in a daemon thread. Renders read the last good snapshot and its
+age immediately and never wait on a cold fetch. Jobs refresh faster
+while COMEX is trading.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+
+# Scheduler wake-up granularity (seconds)
+TICK_SECONDS = 1.0
+
+
+def comex_is_open(now=None):
+    """True while CME Globex metals trade: Sun 18:00 to Fri 17:00 ET, with a
+    daily 17:00-18:00 ET maintenance break"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    weekday, hour = now.weekday(), now.hour  # Monday == 0
+    if weekday == 5:
+        return False
+    if weekday == 6:
+        return hour >= 18
+    if weekday == 4:
+        return hour < 17
+    return hour != 17
+
+
+class Snapshot:
+    """Last good value of a job plus when it was fetched and the last error"""
+
+    __slots__ = ("value", "fetched_at", "error", "is_seed")
+
+    def __init__(self, value=None, fetched_at=None, error=None, is_seed=False):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.error = error
+        self.is_seed = is_seed
+
+    @property
+    def age(self):
+        """Seconds since the value was fetched, or None if never fetched"""
+        return None if self.fetched_at is None else time.time() - self.fetched_at
+
+
+class _Job:
+    __slots__ = ("name", "fn", "interval", "market_interval", "next_run", "running", "pending", "snapshot")
+
+    def __init__(self, name, fn, interval, market_interval):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.market_interval = market_interval or interval
+        self.next_run = 0.0
+        self.running = False
+        self.pending = False  # refresh_now() asked for a run that has not started yet
+        self.snapshot = Snapshot()
+
+
+class BackgroundRefresher:
+    """Runs registered fetch jobs on a schedule and serves their snapshots"""
+
+    def __init__(self, max_workers=4, is_market_open=comex_is_open):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresher")
+        self._is_market_open = is_market_open
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------- SETUP ----------------
+    def register(self, name, fn, interval, market_interval=None, seed=None):
+        """Adds a job. `fn` returns the fresh value or raises on failure;
+        `seed` optionally provides a cheap local value until the first fetch"""
+        job = _Job(name, fn, interval, market_interval)
+        if seed is not None:
+            try:
+                job.snapshot = Snapshot(seed(), None, None, is_seed=True)
+            except Exception as e:
+                job.snapshot = Snapshot(error=str(e))
+        with self._lock:
+            self._jobs[name] = job
+
+    def start(self):
+        """Starts the scheduler thread; every job is fetched right away"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="refresher-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+
+    # ---------------- READ ----------------
+    def get(self, name):
+        """Returns the current Snapshot for a job without blocking"""
+        return self._jobs[name].snapshot
+
+    def names(self):
+        """Registered job names, sorted"""
+        with self._lock:
+            return sorted(self._jobs)
+
+    def refresh_now(self, name):
+        """Schedules a job to run on the next scheduler tick
+
+        If the job is running, it runs again right after, so data requested
+        mid-run (e.g. a newly watched price key) is not left to the next cycle.
+        """
+        job = self._jobs[name]
+        with self._lock:
+            job.pending = True
+            job.next_run = 0.0
+
+    # ---------------- SCHEDULER ----------------
+    def _interval(self, job):
+        return job.market_interval if self._is_market_open() else job.interval
+
+    def _run(self, job):
+        with self._lock:
+            job.pending = False
+        try:
+            value = job.fn()
+            job.snapshot = Snapshot(value, time.time())
+        except Exception as e:
+            # Keep serving the last good value; only record the failure
+            prev = job.snapshot
+            job.snapshot = Snapshot(prev.value, prev.fetched_at, str(e), prev.is_seed)
+        finally:
+            with self._lock:
+                job.next_run = 0.0 if job.pending else time.time() + self._interval(job)
+                job.running = False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                due = [j for j in self._jobs.values() if not j.running and j.next_run <= now]
+                for job in due:
+                    job.running = True
+            for job in due:
+                self._pool.submit(self._run, job)
+            self._stop.wait(TICK_SECONDS)
@@ -0,0 +1,339 @@
+"""Headless snapshot and report runner.
+
+Runs the dashboard's data pipeline without Streamlit: payload (n8n
+webhook, local engine or offline file), market pulse, price history,
+local indicators and macro gauges, and figures. Results are written as
+JSON, Parquet and a standalone HTML report, so nightly reports and
+precomputed snapshots can come from cron instead of a browser session:
+
+    python report.py                                   # every asset, local engine, today
+    python report.py --assets silver gold --source live
+    python report.py --dates 2026-09-01:2026-09-30 --workers 8
+
+Market data for every requested asset is delta-downloaded once, in one
+batched call, in the parent process. The (asset, date) jobs then run in
+a process pool and only read the local price store. Each job writes:
+
+    <out>/<date>/<asset>/payload.json    normalized n8n-schema payload
+    <out>/<date>/<asset>/snapshot.json   pulse, indicators, gauges, stage timings
+    <out>/<date>/<asset>/prices.parquet  daily OHLCV bars up to the date
+    <out>/<date>/<asset>/report.html     standalone report with the figures
+
+plus <out>/manifest.json listing every job's outcome.
+"""
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import charts
+import data_loader
+import narrative_engine
+from assets import ASSETS, all_tickers, get_asset
+from burst_detector import BurstDetector, FeedIngestor
+from downsample import downsample_frame
+from indicators import classify, compute
+from macro_index import MacroIndex
+from payload_model import parse_payload
+from price_store import STORE_DIR, PriceStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTS_DIR = os.environ.get("AGF_REPORTS_DIR", os.path.join(BASE_DIR, "reports"))
+
+SOURCES = ("local", "live", "offline")
+# Daily closes the local engine reads (the dashboard's 1-month market frame)
+ENGINE_LOOKBACK = pd.DateOffset(months=1)
+CHART_LOOKBACK = pd.DateOffset(years=1)
+
+
+# ---------------- PIPELINE ----------------
+def refresh_market(store, assets):
+    """One batched delta download of every asset's daily bars; returns an error string or None"""
+    try:
+        store.update(all_tickers(assets), "1d")
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def _as_of(date):
+    """End of `date` (YYYY-MM-DD) as a UTC Timestamp"""
+    return pd.Timestamp(date, tz="UTC") + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+
+def load_payload(asset, source, date, price_history, macro):
+    """Parsed payload for one asset and date, plus an error string (or None)"""
+    if source == "live":
+        if not asset.webhook_url:
+            return None, f"No n8n workflow configured for {asset.name} (AGF_WEBHOOK_{asset.key.upper()})"
+        raw, error = data_loader.fetch_webhook_payload(asset.webhook_url)
+        return (parse_payload(raw), None) if raw is not None else (None, error)
+    if source == "offline":
+        if not asset.offline_file:
+            return None, f"No offline snapshot for {asset.name}"
+        with open(os.path.join(BASE_DIR, asset.offline_file)) as f:
+            return parse_payload(json.load(f)), None
+
+    as_of = _as_of(date)
+    emerging = None
+    if date == today():
+        feed = FeedIngestor(BurstDetector())
+        feed.poll()
+        emerging = feed.detector.candidates(metal=asset.name.lower())
+    raw = narrative_engine.build_payload(
+        price_history, macro=macro, emerging=emerging, metal=asset.name.lower(), as_of=as_of.timestamp(),
+    )
+    return parse_payload(raw), None
+
+
+def build_snapshot(asset_key, source, date, store_root=STORE_DIR):
+    """Runs the pipeline for one asset and date; returns a dict of results"""
+    asset = get_asset(asset_key)
+    store = PriceStore(store_root)
+    as_of = _as_of(date)
+    timings = {}
+    start = time.perf_counter()
+
+    def lap(name):
+        nonlocal start
+        now = time.perf_counter()
+        timings[name] = round(now - start, 4)
+        start = now
+
+    bars = store.read(asset.futures, "1d", end=as_of)
+    closes = store.read_closes(asset.tickers, "1d", start=as_of - ENGINE_LOOKBACK, end=as_of)
+    price_history = data_loader.price_history_from_frame(closes, asset.futures)
+    pulse = data_loader.market_pulse_from_frame(closes, asset)
+    lap("prices")
+
+    macro_index = MacroIndex()
+    macro_index.refresh(until=date)
+    local_macro = macro_index.pressures()
+    macro_sample = local_macro is not None and macro_index.is_sample
+    lap("macro")
+
+    indicators = classify(compute(bars, "1d")) if not bars.empty else None
+    lap("indicators")
+
+    payload, error = load_payload(asset, source, date, price_history, local_macro)
+    lap("payload")
+
+    return {
+        "asset": asset, "source": source, "date": date, "payload": payload, "error": error,
+        "bars": bars, "closes": closes, "pulse": pulse, "indicators": indicators,
+        "local_macro": local_macro, "macro_sample": macro_sample, "timings": timings,
+    }
+
+
+# ---------------- OUTPUT ----------------
+def _figure_html(fig, include_plotlyjs):
+    return fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs, config={"displayModeBar": False})
+
+
+def render_report(snapshot, embed_plotlyjs=False):
+    """Standalone HTML page for one snapshot"""
+    asset, payload, pulse = snapshot["asset"], snapshot["payload"], snapshot["pulse"]
+    esc = html.escape
+    price, change, fx, etfs = pulse
+
+    figures = []
+    bars = snapshot["bars"]
+    if not bars.empty:
+        chart_bars = bars.loc[bars.index >= bars.index[-1] - CHART_LOOKBACK, ["Close"]]
+        figures.append(charts.price_line(
+            downsample_frame(chart_bars, "Close"), f"{asset.name} Futures ({asset.futures}) - 1Y (1d bars)", False,
+        ))
+    if payload is not None:
+        if payload.dominant_narratives:
+            figures.append(charts.narrative_scatter(payload.dominant_narratives, payload.digest, False))
+        if payload.macro_pressure_index:
+            figures.append(charts.macro_radar(payload.macro_pressure_index, False, snapshot["local_macro"]))
+    plotlyjs = True if embed_plotlyjs else "cdn"
+    figure_html = "".join(
+        _figure_html(fig, plotlyjs if i == 0 else False) for i, fig in enumerate(figures)
+    )
+
+    sections = [
+        f"<h1>AgForecast · {esc(asset.name)} · {esc(snapshot['date'])}</h1>",
+        f"<p class='muted'>Source: {esc(snapshot['source'])} · generated {esc(pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds'))}</p>",
+        f"<div class='kpis'><div><b>{esc(asset.futures)}</b> {price:,.2f} ({change:+.2f}%)</div>"
+        f"<div><b>{esc(asset.fx)}</b> {fx:,.2f}</div>"
+        + "".join(f"<div><b>{esc(e['Ticker'])}</b> {e['Change %']:+.1f}%</div>" for e in etfs)
+        + "</div>",
+    ]
+    if snapshot["error"]:
+        sections.append(f"<p class='error'>Payload unavailable: {esc(snapshot['error'])}</p>")
+    if payload is not None:
+        signal, summary, state = payload.trading_signal, payload.market_summary, payload.market_state
+        sections.append(
+            f"<h2>Signal: {esc(signal.signal)} ({signal.confidence*100:.0f}%)</h2>"
+            f"<p>{esc(summary.current_market_story)}</p><p><i>{esc(summary.forward_outlook)}</i></p>"
+            f"<p>Regime: {esc(state.macro_regime)} · Trend: {esc(state.silver_trend)} · Volatility: {esc(state.volatility_level)}</p>"
+            "<ul>" + "".join(f"<li>{esc(r)}</li>" for r in signal.reasoning) + "</ul>"
+        )
+    local = snapshot["indicators"]
+    if local:
+        sections.append(
+            f"<p class='muted'>Local indicators: trend {esc(local['trend'])}, volatility {esc(local['volatility_level'])}"
+            + (f", {local['realized_vol']*100:.0f}% annualized" if local["realized_vol"] is not None else "")
+            + "</p>"
+        )
+    sections.append(figure_html)
+    if snapshot["macro_sample"]:
+        sections.append("<p class='error'>Local macro gauges are computed from the bundled sample series "
+                        "(macro_sample/), which are made up, not market data.</p>")
+    if payload is not None and payload.dominant_narratives:
+        rows = "".join(
+            f"<tr><td>{esc(n.narrative_name)}</td><td>{esc(n.narrative_type)}</td><td>{esc(n.price_impact_direction)}</td>"
+            f"<td>{n.confidence_score:.2f}</td><td>{n.momentum_score:.2f}</td><td>{esc(', '.join(n.key_drivers))}</td></tr>"
+            for n in payload.dominant_narratives
+        )
+        sections.append(
+            "<h2>Dominant Narratives</h2><table><tr><th>Narrative</th><th>Type</th><th>Impact</th>"
+            f"<th>Confidence</th><th>Momentum</th><th>Key Drivers</th></tr>{rows}</table>"
+        )
+    if payload is not None and payload.emerging_narratives:
+        sections.append("<h2>Emerging Narratives</h2><ul>" + "".join(
+            f"<li><b>{esc(e.theme)}</b> ({esc(e.monitoring_priority)} priority): {esc(e.why_it_matters)}</li>"
+            for e in payload.emerging_narratives
+        ) + "</ul>")
+    sections.append("<p class='muted'>Narrative Intelligence · Not Financial Advice</p>")
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>AgForecast {esc(asset.name)} {esc(snapshot['date'])}</title>"
+        "<style>body{font-family:system-ui,sans-serif;max-width:1100px;margin:2rem auto;padding:0 1rem;color:#1b1f24}"
+        ".muted{color:#6b7280}.error{color:#b91c1c}.kpis{display:flex;gap:1.5rem;flex-wrap:wrap;margin:1rem 0}"
+        "table{border-collapse:collapse;width:100%}td,th{border-bottom:1px solid #e5e7eb;padding:6px;text-align:left}</style>"
+        "</head><body>" + "".join(sections) + "</body></html>"
+    )
+
+
+def snapshot_summary(snapshot):
+    """JSON-serializable part of a snapshot"""
+    price, change, fx, etfs = snapshot["pulse"]
+    payload = snapshot["payload"]
+    return {
+        "asset": snapshot["asset"].key,
+        "date": snapshot["date"],
+        "source": snapshot["source"],
+        "digest": payload.digest if payload is not None else None,
+        "signal": payload.trading_signal.signal if payload is not None else None,
+        "error": snapshot["error"],
+        "pulse": {"price": price, "change_pct": change, "fx": fx, "etfs": etfs},
+        "indicators": snapshot["indicators"],
+        "local_macro": snapshot["local_macro"],
+        "macro_sample": snapshot["macro_sample"],
+        "timings": snapshot["timings"],
+    }
+
+
+def run_job(asset_key, source, date, out_dir, store_root=STORE_DIR, embed_plotlyjs=False):
+    """Builds and writes one (asset, date) snapshot; returns its manifest entry"""
+    started = time.perf_counter()
+    job_dir = os.path.join(out_dir, date, asset_key)
+    os.makedirs(job_dir, exist_ok=True)
+    try:
+        snapshot = build_snapshot(asset_key, source, date, store_root)
+        if snapshot["payload"] is not None:
+            with open(os.path.join(job_dir, "payload.json"), "w") as f:
+                json.dump(snapshot["payload"].to_dict(), f, indent=2)
+        snapshot["bars"].to_parquet(os.path.join(job_dir, "prices.parquet"))
+        t = time.perf_counter()
+        with open(os.path.join(job_dir, "report.html"), "w", encoding="utf-8") as f:
+            f.write(render_report(snapshot, embed_plotlyjs))
+        snapshot["timings"]["report"] = round(time.perf_counter() - t, 4)
+        summary = snapshot_summary(snapshot)
+        with open(os.path.join(job_dir, "snapshot.json"), "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+        error = snapshot["error"]
+    except Exception as e:
+        summary, error = None, f"{type(e).__name__}: {e}"
+    return {
+        "asset": asset_key,
+        "date": date,
+        "source": source,
+        "ok": error is None,
+        "error": error,
+        "signal": (summary or {}).get("signal"),
+        "dir": os.path.relpath(job_dir, out_dir),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# ---------------- CLI ----------------
+def today():
+    return pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%d")
+
+
+def parse_dates(values):
+    """YYYY-MM-DD values and START:END ranges (inclusive) -> sorted unique dates"""
+    dates = set()
+    for value in values or [today()]:
+        if ":" in value:
+            first, last = value.split(":", 1)
+            dates.update(d.strftime("%Y-%m-%d") for d in pd.date_range(first, last, freq="D"))
+        else:
+            dates.add(pd.Timestamp(value).strftime("%Y-%m-%d"))
+    return sorted(dates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write dashboard snapshots and HTML reports without Streamlit")
+    parser.add_argument("--assets", nargs="+", default=["all"], choices=["all", *ASSETS], help="assets to process")
+    parser.add_argument("--source", choices=SOURCES, default="local", help="payload source")
+    parser.add_argument("--dates", nargs="+", metavar="DATE", help="YYYY-MM-DD or START:END (default: today, UTC)")
+    parser.add_argument("--out", default=REPORTS_DIR, help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (1 runs inline)")
+    parser.add_argument("--no-refresh", action="store_true", help="use stored bars without downloading new ones")
+    parser.add_argument("--embed-plotlyjs", action="store_true", help="inline plotly.js so reports work offline")
+    args = parser.parse_args(argv)
+
+    assets = list(ASSETS.values()) if "all" in args.assets else [ASSETS[k] for k in dict.fromkeys(args.assets)]
+    dates = parse_dates(args.dates)
+    if args.source == "live" and dates != [today()]:
+        parser.error("--source live only supports today's date")
+
+    started = time.perf_counter()
+    market_error = None
+    if not args.no_refresh:
+        market_error = refresh_market(PriceStore(), assets)
+        if market_error:
+            print(f"Market refresh failed, using stored bars: {market_error}", file=sys.stderr)
+
+    jobs = [(a.key, args.source, d, args.out, STORE_DIR, args.embed_plotlyjs) for d in dates for a in assets]
+    os.makedirs(args.out, exist_ok=True)
+    if args.workers <= 1 or len(jobs) == 1:
+        results = [run_job(*job) for job in jobs]
+    else:
+        # Spawned workers: the parent may hold yfinance/requests threads
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(run_job, *zip(*jobs)))
+
+    manifest = {
+        "generated_at": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "source": args.source,
+        "market_refresh_error": market_error,
+        "seconds": round(time.perf_counter() - started, 3),
+        "jobs": results,
+    }
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    failed = [r for r in results if not r["ok"]]
+    for r in results:
+        status = "ok" if r["ok"] else f"FAILED: {r['error']}"
+        print(f"{r['date']} {r['asset']:<10} {r['seconds']:>6.2f}s  {status}")
+    print(f"{len(results) - len(failed)}/{len(results)} snapshots written to {args.out} in {manifest['seconds']:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Runs the tests against the app modules with yfinance replaced offline.
+
+benchmarks/fake_yfinance.py stands in for yfinance (price_store imports it
+lazily), so nothing here leaves the machine.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("AGF_FAKE_YF_LATENCY", "0")
+
+import fake_yfinance  # noqa: E402
+
+sys.modules["yfinance"] = fake_yfinance
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import threading
+import time
+
+import api_server
+import cache_backend
+import refresher
+from assets import ASSETS, DEFAULT_ASSET
+from price_store import PriceStore
+
+
+def _prices(app, range_key):
+    rep, _ = asyncio.run(app.route(f"/api/v1/assets/{DEFAULT_ASSET}/prices", {"range": [range_key], "points": ["0"]}))
+    return json.loads(rep.body)
+
+
+def test_range_requested_mid_run_is_fetched_without_waiting_a_cycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(refresher, "TICK_SECONDS", 0.05)
+    service = api_server.DataService(
+        PriceStore(str(tmp_path / "prices")), cache_backend.from_url(f"sqlite:///{tmp_path / 'cache.sqlite'}"),
+    )
+    in_run, release = threading.Event(), threading.Event()
+    refresh = service.prices.refresh
+
+    def slow_refresh():
+        # The watched keys are already taken when the new range is requested
+        appended = refresh()
+        in_run.set()
+        release.wait(5)
+        return appended
+
+    # Only the prices job: the others would call the real webhook
+    service.refresher.register("prices", slow_refresh, interval=600)
+    service.refresher.start()
+    app = api_server.ApiServer(service)
+    try:
+        assert in_run.wait(5)
+        assert _prices(app, "6M")["bars"] == 0  # Not stored yet; the job is mid-run
+        release.set()
+
+        deadline = time.time() + 5
+        body = _prices(app, "6M")
+        while body["bars"] == 0 and time.time() < deadline:
+            time.sleep(0.05)
+            body = _prices(app, "6M")
+        assert body["bars"] > 0
+        assert body["ticker"] == ASSETS[DEFAULT_ASSET].futures
+    finally:
+        release.set()
+        service.stop()
@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+import pytest
+
+import burst_detector
+
+BACKGROUND = (
+    "Sticky CPI print revives inflation hedge demand",
+    "Solar panel makers lift industrial demand forecasts",
+    "Fed officials sound hawkish as Treasury yields climb",
+    "Dollar strength caps gains as DXY pushes higher",
+)
+BURST = "COMEX delivery squeeze: registered inventories drain as shorts scramble"
+
+
+@pytest.fixture
+def historical_feed(tmp_path):
+    """A week-old feed: quiet background for a day, then a burst in the last hour"""
+    start = pd.Timestamp("2026-10-05T00:00:00Z")
+    lines = []
+    for hour in range(24):
+        for i, text in enumerate(BACKGROUND[: 1 + hour % 2]):
+            ts = start + pd.Timedelta(hours=hour, minutes=10 * i)
+            lines.append({"timestamp": ts.isoformat(), "source": "news", "text": text})
+    for i in range(8):
+        ts = start + pd.Timedelta(hours=24, minutes=5 * i)
+        lines.append({"timestamp": ts.isoformat(), "source": "social", "text": f"{BURST} ({i})"})
+    path = tmp_path / "feed.jsonl"
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    return path
+
+
+def test_one_shot_cli_reports_bursts_of_a_historical_feed(historical_feed, capsys):
+    burst_detector.main([str(historical_feed)])
+    candidates = json.loads(capsys.readouterr().out)
+    assert candidates, "the burst in the feed's last hour was not reported"
+    assert candidates[0]["early_signals"][0].startswith(BURST)
+
+
+def test_wall_clock_closes_the_bucket_of_a_historical_feed(historical_feed):
+    # A live detector treats the feed's last hour as long over
+    feed = burst_detector.FeedIngestor(burst_detector.BurstDetector(), str(historical_feed))
+    feed.poll()
+    assert feed.detector.candidates() == []
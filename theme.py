@@ -0,0 +1,299 @@
+"""Dashboard theme.
+
+Both stylesheets and the logo data URI are built once per process and
+then served from memory on every rerun.
+"""
+import base64
+import os
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(BASE_DIR, "logo.png")
+
+# ---------------- PALETTES ----------------
+# Premium dark mode
+DARK = {
+    "bg": "#07090B", # Deep Charcoal
+    "bg_grad_1": "rgba(255, 255, 255, 0.02)",
+    "glass_bg": "rgba(18, 22, 26, 0.92)", # Frosted Glass
+    "border": "rgba(255, 255, 255, 0.04)",
+    "text": "#E6EEF6",
+    "muted": "#9AA4B2",
+    "cyan": "#00F6FF",
+    "magenta": "#FF4DD2",
+    "green": "#00D17A",
+    "amber": "#FFB86B",
+    "shadow": "0 18px 40px rgba(0,0,0,0.6)"
+}
+
+# Pro Light Mode (Inverted High Contrast)
+LIGHT = {
+    "bg": "#F5F7FA",
+    "bg_grad_1": "rgba(0, 0, 0, 0.03)",
+    "glass_bg": "rgba(255, 255, 255, 0.9)",
+    "border": "rgba(0, 0, 0, 0.06)",
+    "text": "#111827",
+    "muted": "#6B7280",
+    "cyan": "#00A3A8", # Darker for white bg
+    "magenta": "#D128A8",
+    "green": "#008F53",
+    "amber": "#D97706",
+    "shadow": "0 4px 12px rgba(0,0,0,0.08)"
+}
+
+
+def get_palette(dark_mode):
+    return DARK if dark_mode else LIGHT
+
+
+# ---------------- STYLES ----------------
+@lru_cache(maxsize=2)
+def get_stylesheet(dark_mode):
+    """Full <style> block for a theme; rendered once per theme per process"""
+    tm = get_palette(dark_mode)
+    return f"""
+<style>
+/* IMPORTS: Sora (Headers), Montserrat (Numbers), Inter (Body) */
+@import url('https://fonts.googleapis.com/css2?family=Sora:wght@600;700&family=Montserrat+Alternates:wght@700;800&family=Inter:wght@400;500;600&display=swap');
+
+/* VARIABLES */
+:root {{
+    --bg: {tm["bg"]};
+    --glass: {tm["glass_bg"]};
+    --border: {tm["border"]};
+    --fg: {tm["text"]};
+    --muted: {tm["muted"]};
+    --cyan: {tm["cyan"]};
+    --magenta: {tm["magenta"]};
+    --green: {tm["green"]};
+    --amber: {tm["amber"]};
+}}
+
+/* BASE SETTINGS */
+body {{
+    background-color: var(--bg);
+    color: var(--fg);
+    font-family: 'Inter', sans-serif;
+}}
+
+[data-testid="stAppViewContainer"] {{
+    background-color: var(--bg);
+    background-image: 
+        radial-gradient(circle at 10% 20%, rgba(0, 246, 255, 0.03) 0%, transparent 20%),
+        radial-gradient(circle at 90% 80%, rgba(255, 77, 210, 0.03) 0%, transparent 20%);
+}}
+
+[data-testid="stHeader"] {{
+    background: transparent;
+}}
+
+/* GLOWING TEXT UTILITY (Softened) */
+.neon-text {{
+    color: var(--fg);
+    text-shadow: 
+        0 0 10px rgba(0, 246, 255, 0.5),
+        0 0 20px rgba(0, 246, 255, 0.3);
+}}
+
+.neon-text-magenta {{
+    color: #fff;
+    text-shadow: 
+        0 0 10px rgba(255, 255, 255, 0.6),
+        0 0 20px rgba(255, 77, 210, 0.4),
+        0 0 40px rgba(255, 77, 210, 0.2);
+}}
+
+/* GLOBAL HEADER GLOW (Tasteful) */
+h1, h2, h3, h4 {{
+    font-family: 'Sora', sans-serif;
+    letter-spacing: -0.5px;
+    color: var(--fg) !important;
+    text-shadow: 0 4px 12px rgba(0, 0, 0, 0.5); /* Deep shadow for contrast */
+}}
+
+/* HOVER GLOW FOR HEADERS */
+h1:hover, h2:hover {{
+    text-shadow: 0 0 15px rgba(255, 255, 255, 0.15);
+    transition: text-shadow 0.3s ease;
+}}
+
+/* LOGIN CARD */
+.login-card {{
+    background: var(--glass);
+    border: 1px solid var(--border);
+    backdrop-filter: blur(14px);
+    padding: 40px;
+    border-radius: 20px;
+    box-shadow: {tm["shadow"]};
+    width: 100%;
+    max-width: 400px;
+    margin: auto;
+    animation: slideUp 0.6s cubic-bezier(.22,.98,.36,1) forwards;
+}}
+
+/* ANIMATIONS */
+@keyframes slideUp {{
+    from {{ opacity: 0; transform: translateY(10px); }}
+    to {{ opacity: 1; transform: translateY(0); }}
+}}
+@keyframes pulse {{
+    0% {{ box-shadow: 0 0 0 0 rgba(0, 246, 255, 0.4); }}
+    70% {{ box-shadow: 0 0 0 10px rgba(0, 246, 255, 0); }}
+    100% {{ box-shadow: 0 0 0 0 rgba(0, 246, 255, 0); }}
+}}
+@keyframes neonBreathe {{
+    0% {{ box-shadow: 0 0 20px rgba(0, 209, 122, 0.15); border-color: rgba(0, 209, 122, 0.2); }}
+    50% {{ box-shadow: 0 0 40px rgba(0, 209, 122, 0.35); border-color: rgba(0, 209, 122, 0.5); }}
+    100% {{ box-shadow: 0 0 20px rgba(0, 209, 122, 0.15); border-color: rgba(0, 209, 122, 0.2); }}
+}}
+
+/* PARTICLE GRID BACKGROUND (Subtle) */
+[data-testid="stAppViewContainer"]::before {{
+    content: '';
+    position: fixed;
+    top: 0;
+    left: 0;
+    width: 100%;
+    height: 100%;
+    pointer-events: none;
+    background-image: 
+        radial-gradient(circle, rgba(255,255,255,0.015) 1px, transparent 1px);
+    background-size: 40px 40px;
+    z-index: 0;
+    opacity: 0.5;
+}}
+
+/* GLASS CARD CLASS */
+.glass-card {{
+    background: linear-gradient(180deg, rgba(255,255,255,0.03), rgba(255,255,255,0.01));
+    backdrop-filter: blur(14px) saturate(120%);
+    border: 1px solid var(--border);
+    border-radius: 16px;
+    color: var(--fg);
+    transition: transform 0.38s cubic-bezier(.22,.98,.36,1), box-shadow 0.38s;
+    animation: slideUp 0.4s ease-out;
+}}
+.glass-card:hover {{
+    transform: translateY(-6px);
+    box-shadow: 0 18px 40px rgba(0,0,0,0.6);
+    border-top-color: var(--cyan);
+}}
+
+/* SIGNAL CARD (Neon Breathing) */
+.signal-card {{
+    background: var(--glass);
+    border: 2px solid rgba(0, 209, 122, 0.3);
+    border-radius: 18px;
+    padding: 28px;
+    text-align: center;
+    box-shadow: 0 6px 30px rgba(0,0,0,0.2);
+    margin-bottom: 20px;
+}}
+.signal-card.breathing {{
+    animation: neonBreathe 2s infinite ease-in-out;
+}}
+
+/* KPI CONTAINER */
+.kpi-container {{
+    font-family: 'Montserrat Alternates', sans-serif;
+    font-weight: 800;
+    color: var(--fg);
+    animation: slideUp 0.5s ease-out;
+}}
+.kpi-value {{
+    font-size: 3.5rem;
+    line-height: 1;
+    text-shadow: 0 0 20px rgba(0, 246, 255, 0.15);
+}}
+.kpi-label {{
+    font-family: 'Inter', sans-serif;
+    font-weight: 500;
+    color: var(--muted);
+    font-size: 0.85rem;
+    text-transform: uppercase;
+    letter-spacing: 1.5px;
+}}
+
+/* PROGRESS BAR (Momentum) */
+.progress-bar-container {{
+    background: rgba(255,255,255,0.05);
+    border-radius: 8px;
+    height: 10px;
+    overflow: hidden;
+}}
+.progress-bar-fill {{
+    height: 100%;
+    background: linear-gradient(90deg, var(--cyan), var(--green));
+    border-radius: 8px;
+    transition: width 0.8s cubic-bezier(.22,.98,.36,1);
+}}
+
+/* TAG CHIPS */
+.tag-chip {{
+    background: rgba(255,255,255,0.05);
+    border: 1px solid var(--border);
+    padding: 5px 14px;
+    border-radius: 6px;
+    font-size: 0.7rem;
+    font-family: 'Sora', sans-serif;
+    color: var(--muted);
+    display: inline-block;
+    margin: 4px;
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+}}
+
+/* EXPANDER GLASS STYLE */
+div[data-testid="stExpander"] {{
+    background: var(--glass);
+    backdrop-filter: blur(14px);
+    border: 1px solid var(--border);
+    border-radius: 16px;
+    box-shadow: {tm["shadow"]};
+    transition: transform 0.38s cubic-bezier(.22,.98,.36,1);
+    animation: slideUp 0.4s ease-out;
+}}
+div[data-testid="stExpander"]:hover {{
+    transform: translateY(-4px);
+    border-top: 1px solid var(--cyan);
+}}
+
+/* BUTTONS */
+div[data-testid="stButton"] > button {{
+    background: linear-gradient(135deg, var(--cyan) 0%, #00C2FF 100%);
+    color: #000;
+    font-weight: 700;
+    font-family: 'Sora', sans-serif;
+    border: none;
+    border-radius: 999px;
+    padding: 0.6rem 1.5rem;
+    transition: all 0.3s ease;
+    box-shadow: 0 4px 15px rgba(0, 246, 255, 0.3);
+}}
+div[data-testid="stButton"] > button:hover {{
+    transform: scale(1.05);
+    box-shadow: 0 6px 25px rgba(0, 246, 255, 0.5);
+}}
+
+/* REDUCED MOTION SUPPORT */
+@media (prefers-reduced-motion: reduce) {{
+    *, *::before, *::after {{
+        animation-duration: 0.01ms !important;
+        animation-iteration-count: 1 !important;
+        transition-duration: 0.01ms !important;
+    }}
+}}
+
+</style>
+"""
+
+
+# ---------------- ASSETS ----------------
+@lru_cache(maxsize=1)
+def get_logo_data_uri(path=LOGO_PATH):
+    """Base64 data URI of the logo, or "" if it can't be read"""
+    try:
+        with open(path, "rb") as f:
+            return "data:image/png;base64," + base64.b64encode(f.read()).decode()
+    except OSError:
+        return ""